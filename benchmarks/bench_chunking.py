@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark SmartChunker.chunk_with_overlap on large synthetic documents.
+Compares the old boundary search (rescan every break point for each chunk)
+with the bisect search now used by SmartChunker, then times full chunking.
+
+Usage:
+    python benchmarks/bench_chunking.py [--sizes 10,25,50,100] [--max-tokens N]
+                                        [--legacy-limit MB] [--output results.json]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from utils.smart_chunk import SmartChunker  # noqa: E402
+from utils.token_counter import get_token_counter  # noqa: E402
+
+WORDS = ("market revenue growth customer platform strategy analysis quarter "
+         "adoption pipeline margin retention enterprise segment forecast "
+         "pricing churn expansion partner launch roadmap operations").split()
+
+
+def synthetic_document(size_mb: float, seed: int = 42) -> str:
+    """Build an interview-style transcript of roughly size_mb megabytes."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(400):
+        speaker = "Q:" if i % 2 == 0 else "A:"
+        sentences = []
+        for _ in range(rng.randint(2, 6)):
+            words = rng.choices(WORDS, k=rng.randint(8, 20))
+            sentences.append(" ".join(words).capitalize() + ".")
+        if rng.random() < 0.3:
+            sentences.append(f"Revenue grew {rng.randint(1, 99)}% to ${rng.randint(1, 900)}M.")
+        paragraphs.append(f"{speaker} {' '.join(sentences)}")
+    block = "\n\n".join(paragraphs) + "\n\n"
+
+    target = int(size_mb * 1024 * 1024)
+    return (block * (target // len(block) + 1))[:target]
+
+
+def legacy_boundaries(break_points: List[int], text_len: int,
+                      window_chars: int, overlap_chars: int, min_chunk: int) -> List[int]:
+    """Chunk end positions using the previous linear scan per chunk."""
+    ends = []
+    start_idx = 0
+    while start_idx < text_len:
+        end_idx = start_idx + window_chars
+        if end_idx < text_len:
+            suitable_breaks = [
+                bp for bp in break_points if start_idx < bp <= end_idx]
+            if suitable_breaks:
+                end_idx = suitable_breaks[-1]
+        else:
+            end_idx = text_len
+        ends.append(end_idx)
+        start_idx = max(end_idx - overlap_chars, start_idx + min_chunk)
+    return ends
+
+
+def bisect_boundaries(break_points: List[int], text_len: int,
+                      window_chars: int, overlap_chars: int, min_chunk: int) -> List[int]:
+    """Chunk end positions using SmartChunker.last_break_before."""
+    ends = []
+    start_idx = 0
+    while start_idx < text_len:
+        end_idx = start_idx + window_chars
+        if end_idx < text_len:
+            end_idx = SmartChunker.last_break_before(
+                break_points, start_idx, end_idx)
+        else:
+            end_idx = text_len
+        ends.append(end_idx)
+        start_idx = max(end_idx - overlap_chars, start_idx + min_chunk)
+    return ends
+
+
+def run_size(size_mb: float, max_tokens: int, legacy_limit_mb: float) -> Dict:
+    """Benchmark one document size."""
+    text = synthetic_document(size_mb)
+    chunker = SmartChunker(max_tokens=max_tokens,
+                           token_counter=get_token_counter(backend="heuristic"))
+
+    content_type = chunker.detect_content_type(text)
+    break_points = chunker.find_semantic_breaks(text, content_type)
+    ratio = chunker.chars_per_token(text)
+    args = (break_points, len(text), max(1, int(max_tokens * ratio)),
+            int(chunker.overlap_tokens * ratio), chunker.min_chunk_size)
+
+    start = time.perf_counter()
+    new_ends = bisect_boundaries(*args)
+    bisect_time = time.perf_counter() - start
+
+    legacy_time = None
+    if size_mb <= legacy_limit_mb:
+        start = time.perf_counter()
+        old_ends = legacy_boundaries(*args)
+        legacy_time = time.perf_counter() - start
+        if old_ends != new_ends:
+            raise AssertionError(f"Boundaries differ at {size_mb} MB")
+
+    start = time.perf_counter()
+    chunks = chunker.chunk_with_overlap(text)
+    chunk_time = time.perf_counter() - start
+
+    return {
+        "size_mb": size_mb,
+        "break_points": len(break_points),
+        "chunks": len(chunks),
+        "legacy_boundary_seconds": legacy_time,
+        "bisect_boundary_seconds": bisect_time,
+        "chunk_with_overlap_seconds": chunk_time,
+    }
+
+
+def main():
+    sizes = [10.0, 25.0, 50.0, 100.0]
+    max_tokens = 15000
+    legacy_limit_mb = 100.0
+    output_file = None
+
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == "--sizes" and i + 1 < len(sys.argv):
+            sizes = [float(s) for s in sys.argv[i + 1].split(",")]
+            i += 2
+        elif sys.argv[i] == "--max-tokens" and i + 1 < len(sys.argv):
+            max_tokens = int(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--legacy-limit" and i + 1 < len(sys.argv):
+            legacy_limit_mb = float(sys.argv[i + 1])
+            i += 2
+        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
+            output_file = sys.argv[i + 1]
+            i += 2
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    print(f"📏 Chunking benchmark (max_tokens={max_tokens}, heuristic counter)")
+    print(f"{'Size':>8} {'Breaks':>9} {'Chunks':>7} {'Legacy':>10} {'Bisect':>10} {'Full chunk':>11}")
+
+    results = []
+    for size_mb in sizes:
+        result = run_size(size_mb, max_tokens, legacy_limit_mb)
+        results.append(result)
+        legacy = result["legacy_boundary_seconds"]
+        legacy_str = f"{legacy:.3f}s" if legacy is not None else "skipped"
+        print(f"{size_mb:>6.0f}MB {result['break_points']:>9} {result['chunks']:>7} "
+              f"{legacy_str:>10} {result['bisect_boundary_seconds']:>9.4f}s "
+              f"{result['chunk_with_overlap_seconds']:>10.2f}s")
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
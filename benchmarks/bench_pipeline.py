@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of prepare → generate → export against MockBackend.
+Runs the bundled samples (inputs/script_1.txt, inputs/script_2.txt) and
+synthetic scale-ups built from their vocabulary. Each input runs in a fresh
+process so peak RSS is its own. Reports wall time per pipeline and model
+stage, peak RSS, model calls and tokens, and saves everything as JSON so
+runs can be diffed.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 1,10,50] [--samples-only]
+                                        [--latency SPEC] [--concurrency N]
+                                        [--format marp|json|txt]
+                                        [--output results.json] [--compare old.json]
+"""
+
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "src" / "v2"))
+
+SAMPLES = ("script_1", "script_2")
+MODEL = "gpt-4-turbo"
+
+
+def synthetic_document(size_mb: float, seed: int = 42) -> str:
+    """A transcript of about size_mb megabytes using the samples' vocabulary.
+
+    Every sentence is drawn fresh, so the text does not repeat itself.
+    """
+    vocabulary = re.findall(r"[A-Za-z']+", " ".join(
+        (ROOT / "inputs" / f"{name}.txt").read_text(encoding='utf-8') for name in SAMPLES))
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    paragraphs: List[str] = []
+    size = 0
+    turn = 0
+    while size < target:
+        # Draw the words of a whole paragraph at once; per-word calls are slow at 50 MB
+        lengths = [rng.randint(8, 24) for _ in range(rng.randint(2, 6))]
+        words = rng.choices(vocabulary, k=sum(lengths))
+        sentences = []
+        for length in lengths:
+            sentence, words = words[:length], words[length:]
+            sentences.append(" ".join(sentence).capitalize() + ".")
+        speaker = "Interviewer:" if turn % 2 == 0 else "Respondent:"
+        paragraph = f"{speaker} {' '.join(sentences)}"
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+        turn += 1
+    return "\n\n".join(paragraphs)[:target]
+
+
+def load_input(name: str) -> str:
+    if name in SAMPLES:
+        return (ROOT / "inputs" / f"{name}.txt").read_text(encoding='utf-8')
+    return synthetic_document(float(name[len("synthetic_"):-len("mb")]))
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def stage_breakdown(telemetry) -> Dict[str, Dict[str, Any]]:
+    """Wall-clock span, calls and tokens per model stage from the call events."""
+    totals = telemetry.summary()["stages"]
+    spans: Dict[str, List[float]] = {}
+    for event in telemetry.events:
+        start = event.timestamp - event.total_seconds
+        span = spans.setdefault(event.stage, [start, event.timestamp])
+        span[0] = min(span[0], start)
+        span[1] = max(span[1], event.timestamp)
+    return {stage: {
+        # Stages 2-4 overlap, so these spans can add up to more than generate
+        "wall_seconds": round(spans[stage][1] - spans[stage][0], 3),
+        "calls": entry["calls"],
+        "prompt_tokens": entry["prompt_tokens"],
+        "completion_tokens": entry["completion_tokens"],
+        "truncated": entry["truncated"],
+    } for stage, entry in totals.items()}
+
+
+def run_case(name: str, latency: str, concurrency: int, output_format: str) -> Dict[str, Any]:
+    """Run one input through the pipeline in this process."""
+    from generate_slides import ProfessionalSlideGenerator
+    from pipeline import DeckPipeline
+    from utils.llm_backends import MockBackend
+    from utils.model_router import ModelRouter
+    from utils.rate_limiter import AsyncRateLimiter
+    from utils.token_counter import get_token_counter
+
+    start = time.perf_counter()
+    text = load_input(name)
+    load_seconds = time.perf_counter() - start
+
+    counter = get_token_counter(MODEL)
+    backend = MockBackend(latency=latency, count_tokens=counter.count)
+    generator = ProfessionalSlideGenerator(
+        model=MODEL, concurrency=concurrency, backend=backend, token_counter=counter,
+        # The mock has no quota; a limiter would only measure its own waits
+        rate_limiter=AsyncRateLimiter(rpm=1_000_000, tpm=1_000_000_000),
+        router=ModelRouter(MODEL))
+
+    result = DeckPipeline(generator=generator).run(text, output_format=output_format)
+    summary = generator.telemetry.summary()
+    return {
+        "input": name,
+        "input_bytes": len(text.encode('utf-8')),
+        "slides": result.slide_count,
+        "load_seconds": round(load_seconds, 3),
+        "timings": {stage: round(seconds, 3) for stage, seconds in result.timings.items()},
+        "total_seconds": round(sum(result.timings.values()), 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "calls": summary["calls"],
+        "errors": summary["errors"],
+        "prompt_tokens": summary["prompt_tokens"],
+        "completion_tokens": summary["completion_tokens"],
+        "stages": stage_breakdown(generator.telemetry),
+    }
+
+
+def run_isolated(name: str, options: List[str]) -> Dict[str, Any]:
+    """Run one case in a child process so its peak RSS is not shared."""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_file = Path(tmp) / "result.json"
+        child = subprocess.run(
+            [sys.executable, __file__, "--case", name, "--result", str(result_file)] + options,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if child.returncode != 0 or not result_file.exists():
+            raise RuntimeError(f"{name} failed:\n{child.stderr[-2000:]}")
+        return json.loads(result_file.read_text(encoding='utf-8'))
+
+
+def compare(results: List[Dict[str, Any]], baseline_file: str):
+    """Print total time, tokens and peak RSS against an earlier results file."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {r["input"]: r for r in json.load(f)["results"]}
+
+    def change(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "n/a"
+        return f"{(new - old) / old:+.1%}"
+
+    print(f"\n📊 Compared with {baseline_file}")
+    for result in results:
+        old = baseline.get(result["input"])
+        if not old:
+            print(f"   {result['input']}: not in baseline")
+            continue
+        print(f"   {result['input']}: time {change(result['total_seconds'], old['total_seconds'])}, "
+              f"prompt tokens {change(result['prompt_tokens'], old['prompt_tokens'])}, "
+              f"calls {change(result['calls'], old['calls'])}, "
+              f"peak RSS {change(result['peak_rss_mb'], old['peak_rss_mb'])}")
+
+
+def main():
+    sizes = [1.0, 10.0, 50.0]
+    latency = "fixed:0.05"
+    concurrency = 4
+    output_format = "marp"
+    output_file = None
+    compare_file = None
+    case = None
+    result_file = None
+
+    i = 1
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == "--samples-only":
+            sizes = []
+            i += 1
+        elif i + 1 >= len(sys.argv):
+            print(__doc__)
+            sys.exit(1)
+        elif arg == "--sizes":
+            sizes = [float(s) for s in sys.argv[i + 1].split(",")]
+            i += 2
+        elif arg == "--latency":
+            latency = sys.argv[i + 1]
+            i += 2
+        elif arg == "--concurrency":
+            concurrency = int(sys.argv[i + 1])
+            i += 2
+        elif arg == "--format":
+            output_format = sys.argv[i + 1]
+            i += 2
+        elif arg == "--output":
+            output_file = sys.argv[i + 1]
+            i += 2
+        elif arg == "--compare":
+            compare_file = sys.argv[i + 1]
+            i += 2
+        # Internal: the child process for one input
+        elif arg == "--case":
+            case = sys.argv[i + 1]
+            i += 2
+        elif arg == "--result":
+            result_file = sys.argv[i + 1]
+            i += 2
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if case:
+        result = run_case(case, latency, concurrency, output_format)
+        Path(result_file).write_text(json.dumps(result), encoding='utf-8')
+        return
+
+    options = ["--latency", latency, "--concurrency", str(concurrency), "--format", output_format]
+    cases = list(SAMPLES) + [f"synthetic_{size:g}mb" for size in sizes]
+
+    print(f"⏱️ Pipeline benchmark (mock backend, latency {latency}, concurrency {concurrency}, "
+          f"{output_format} export)")
+    print(f"{'Input':>16} {'Size':>8} {'Slides':>6} {'Prepare':>8} {'Generate':>9} "
+          f"{'Export':>7} {'Calls':>6} {'Prompt tok':>11} {'Peak RSS':>9}")
+
+    results = []
+    for name in cases:
+        try:
+            result = run_isolated(name, options)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            continue
+        results.append(result)
+        timings = result["timings"]
+        rss = result["peak_rss_mb"]
+        rss_str = f"{rss:.0f}MB" if rss is not None else "n/a"
+        print(f"{name:>16} {result['input_bytes'] / 1024:>6.0f}KB {result['slides']:>6} "
+              f"{timings['prepare']:>7.2f}s {timings['generate']:>8.2f}s {timings['export']:>6.2f}s "
+              f"{result['calls']:>6} {result['prompt_tokens']:>11} {rss_str:>9}")
+
+    for result in results:
+        stages = ", ".join(f"{stage} {entry['wall_seconds']:.2f}s/{entry['calls']} calls"
+                           for stage, entry in result["stages"].items())
+        print(f"   {result['input']}: {stages}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": "mock",
+        "latency": latency,
+        "concurrency": concurrency,
+        "format": output_format,
+        "results": results,
+    }
+    if not output_file:
+        output_dir = ROOT / "outputs" / "benchmarks"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = str(output_dir / f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved: {output_file}")
+
+    if compare_file:
+        compare(results, compare_file)
+
+
+if __name__ == "__main__":
+    main()
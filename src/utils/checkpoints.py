@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Stage checkpoints for resumable slide generation runs.
+Each completed unit of work (analysis, structure, individual slides,
+polished chunks) is written as a small JSON file so an interrupted run can
+pick up where it stopped instead of starting over from Stage 1.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+
+class CheckpointStore:
+    """JSON checkpoint files for one pipeline run."""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, run_dir: str, fingerprint: str, resume: bool = False):
+        self.run_dir = Path(run_dir)
+        self.fingerprint = fingerprint
+        self.resumed = False
+        self._lock = threading.Lock()
+
+        manifest = self._read_json(self.run_dir / self.MANIFEST)
+        if resume and manifest and manifest.get('fingerprint') == fingerprint:
+            self.resumed = True
+        else:
+            if resume and manifest:
+                print("⚠️  Checkpoints belong to a different input or settings, starting fresh")
+            self.clear()
+
+    @staticmethod
+    def make_fingerprint(*parts: str) -> str:
+        """Hash the inputs that determine a run's results."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Any]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, value: Any):
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def load(self, name: str) -> Optional[Any]:
+        """Return the saved value for a unit of work, or None if not completed."""
+        if not self.resumed:
+            return None
+        entry = self._read_json(self.run_dir / f"{name}.json")
+        return entry['value'] if entry else None
+
+    def save(self, name: str, value: Any):
+        """Record a completed unit of work."""
+        with self._lock:
+            self._write_json(self.run_dir / f"{name}.json", {'value': value})
+
+    def clear(self):
+        """Delete all checkpoints and start a new manifest."""
+        with self._lock:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            self._write_json(self.run_dir / self.MANIFEST,
+                             {'fingerprint': self.fingerprint})
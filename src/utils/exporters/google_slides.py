@@ -13,10 +13,10 @@ Features:
 
 import os
 import json
-import re
 import pickle
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import List, Optional
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -24,6 +24,10 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from utils.slide_ir import Slide, load_slides, parse_script  # noqa: E402
+
 
 class GoogleSlidesClient:
     """Client for Google Slides API integration."""
@@ -77,65 +81,24 @@ class GoogleSlidesClient:
             print(f"❌ Authentication failed: {e}")
             return False
 
-    def parse_slides_content(self, slides_file: Path) -> List[Dict[str, Any]]:
-        """Parse slides content from text file into structured data."""
-        print(f"📖 Parsing slides content from {slides_file}...")
+    def parse_slides_content(self, slides_file: Path) -> List[Slide]:
+        """Load slides from a .jsonl slide cache or a script text file."""
+        print(f"📖 Loading slides from {slides_file}...")
 
         try:
-            with open(slides_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            slides = []
-            # Split content by slide markers
-            slide_blocks = re.split(r'SLIDE \d+:', content)[1:]
-
-            for i, block in enumerate(slide_blocks, 1):
-                lines = [line.strip()
-                         for line in block.strip().split('\n') if line.strip()]
-
-                if not lines:
-                    continue
-
-                # First line is usually the title
-                title = lines[0] if lines else f"Slide {i}"
-
-                # Rest is content, join with newlines for bullet points
-                content_lines = lines[1:] if len(lines) > 1 else []
-
-                # Process bullet points
-                bullet_points = []
-                current_content = []
-
-                for line in content_lines:
-                    if line.startswith(('•', '-', '*')) or re.match(r'^\d+\.', line):
-                        if current_content:
-                            bullet_points.append(' '.join(current_content))
-                            current_content = []
-                        # Clean bullet point markers
-                        clean_line = re.sub(r'^[•\-\*]\s*', '', line)
-                        clean_line = re.sub(r'^\d+\.\s*', '', clean_line)
-                        bullet_points.append(clean_line)
-                    else:
-                        current_content.append(line)
-
-                # Add remaining content
-                if current_content:
-                    bullet_points.append(' '.join(current_content))
-
-                slide_data = {
-                    "slide_number": i,
-                    "title": title,
-                    "content": bullet_points,
-                    "full_content": '\n'.join(lines)
-                }
-                slides.append(slide_data)
+            slides = load_slides(slides_file)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Error reading slides: {e}")
+            return []
 
-            print(f"✅ Parsed {len(slides)} slides")
-            return slides
+        print(f"✅ Loaded {len(slides)} slides")
+        return slides
 
-        except Exception as e:
-            print(f"❌ Error parsing slides: {e}")
-            return []
+    def parse_slides_text(self, content: str) -> List[Slide]:
+        """Parse slides from an in-memory script."""
+        slides = parse_script(content)
+        print(f"✅ Parsed {len(slides)} slides")
+        return slides
 
     def create_presentation(self, title: str) -> Optional[str]:
         """Create a new Google Slides presentation."""
@@ -156,11 +119,11 @@ class GoogleSlidesClient:
             print(f"❌ Error creating presentation: {e}")
             return None
 
-    def add_slide(self, presentation_id: str, slide_data: Dict[str, Any]) -> bool:
+    def add_slide(self, presentation_id: str, slide_data: Slide) -> bool:
         """Add a slide with title and content to the presentation."""
         try:
             # Create slide
-            slide_id = f"slide_{slide_data['slide_number']}"
+            slide_id = f"slide_{slide_data.number}"
 
             requests = [
                 {
@@ -217,7 +180,7 @@ class GoogleSlidesClient:
                 content_requests.append({
                     'insertText': {
                         'objectId': title_placeholder_id,
-                        'text': slide_data['title']
+                        'text': slide_data.title
                     }
                 })
                 # Format title with smaller font
@@ -237,9 +200,9 @@ class GoogleSlidesClient:
                 })
 
             # Insert content
-            if body_placeholder_id and slide_data['content']:
+            if body_placeholder_id and slide_data.bullets:
                 content_text = '\n'.join(
-                    [f"• {item}" for item in slide_data['content']])
+                    [f"• {item}" for item in slide_data.bullets])
                 content_requests.append({
                     'insertText': {
                         'objectId': body_placeholder_id,
@@ -278,18 +241,22 @@ class GoogleSlidesClient:
             return True
 
         except HttpError as e:
-            print(f"❌ Error adding slide {slide_data['slide_number']}: {e}")
+            print(f"❌ Error adding slide {slide_data.number}: {e}")
             return False
 
     def generate_presentation(self, slides_file: Path, presentation_title: str) -> Optional[str]:
         """Generate Google Slides presentation from slides content."""
+        return self.generate_presentation_from_slides(
+            self.parse_slides_content(slides_file), presentation_title)
+
+    def generate_presentation_from_slides(self, slides: List[Slide],
+                                          presentation_title: str) -> Optional[str]:
+        """Generate Google Slides presentation from already parsed slides."""
 
         if not self.service:
             if not self.authenticate():
                 return None
 
-        # Parse slides content
-        slides = self.parse_slides_content(slides_file)
         if not slides:
             print("❌ No slides to process")
             return None
@@ -337,7 +304,7 @@ class GoogleSlidesClient:
                                     content_requests.append({
                                         'insertText': {
                                             'objectId': element['objectId'],
-                                            'text': first_slide['title']
+                                            'text': first_slide.title
                                         }
                                     })
                                     # Format title
@@ -357,9 +324,9 @@ class GoogleSlidesClient:
                                     })
                                 elif placeholder_type == 'BODY':
                                     body_placeholder_id = element['objectId']
-                                    if first_slide['content']:
+                                    if first_slide.bullets:
                                         content_text = '\n'.join(
-                                            [f"• {item}" for item in first_slide['content']])
+                                            [f"• {item}" for item in first_slide.bullets])
                                         content_requests.append({
                                             'insertText': {
                                                 'objectId': element['objectId'],
@@ -405,7 +372,7 @@ class GoogleSlidesClient:
             if self.add_slide(presentation_id, slide):
                 success_count += 1
             else:
-                print(f"⚠️  Failed to add slide {slide['slide_number']}")
+                print(f"⚠️  Failed to add slide {slide.number}")
 
         print(f"✅ Successfully created {success_count}/{len(slides)} slides")
 
@@ -418,8 +385,6 @@ class GoogleSlidesClient:
 
 def main():
     """CLI interface for Google Slides integration."""
-    import sys
-
     if len(sys.argv) < 3:
         print(
             "Usage: python google_slides.py <slides_file> <presentation_title> [credentials_file]")
@@ -430,6 +395,7 @@ def main():
         print("\nExample:")
         print("  python google_slides.py slides.txt 'My Presentation'")
         print("  python google_slides.py slides.txt 'Business Plan' my_credentials.json")
+        print("  python google_slides.py outputs/script_1_slides.jsonl 'My Presentation'")
         sys.exit(1)
 
     slides_file = Path(sys.argv[1])
@@ -4,11 +4,14 @@ Converts Claude-generated slide outlines to Marp-compatible Markdown.
 Takes structured text and outputs presentation-ready Markdown.
 """
 
-import re
 import sys
-import json
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Optional
+from urllib.parse import quote
+
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from utils.slide_ir import Slide, load_slides, parse_script  # noqa: E402
 
 
 class MarpGenerator:
@@ -16,52 +19,9 @@ class MarpGenerator:
         self.theme = theme
         self.background_color = background_color
 
-    def parse_claude_output(self, text: str) -> List[Dict]:
+    def parse_claude_output(self, text: str) -> List[Slide]:
         """Parse Claude's structured slide output into slide objects."""
-        slides = []
-
-        # Split by slide markers
-        slide_sections = re.split(r'^SLIDE \d+:', text, flags=re.MULTILINE)
-
-        # Skip first empty split
-        for i, section in enumerate(slide_sections[1:], 1):
-            slide = self._parse_single_slide(section, i)
-            if slide:
-                slides.append(slide)
-
-        return slides
-
-    def _parse_single_slide(self, text: str, slide_num: int) -> Optional[Dict]:
-        """Parse a single slide section."""
-        lines = text.strip().split('\n')
-        if not lines:
-            return None
-
-        # Extract title (first line)
-        title = lines[0].strip()
-
-        # Extract bullet points
-        bullets = []
-        visual = ""
-        speaker_notes = ""
-
-        for line in lines[1:]:
-            line = line.strip()
-            if line.startswith('•') or line.startswith('-'):
-                bullets.append(line.lstrip('•-').strip())
-            elif line.startswith('[VISUAL:'):
-                visual = re.sub(r'\[VISUAL:\s*(.*?)\]', r'\1', line)
-            elif line.startswith('[SPEAKER NOTE:'):
-                speaker_notes = re.sub(
-                    r'\[SPEAKER NOTE:\s*(.*?)\]', r'\1', line)
-
-        return {
-            'number': slide_num,
-            'title': title,
-            'bullets': bullets,
-            'visual': visual,
-            'speaker_notes': speaker_notes
-        }
+        return parse_script(text)
 
     def generate_marp_header(self) -> str:
         """Generate Marp YAML header."""
@@ -75,25 +35,25 @@ class: lead
 
 """
 
-    def slide_to_markdown(self, slide: Dict) -> str:
+    def slide_to_markdown(self, slide: Slide) -> str:
         """Convert a slide object to Marp markdown."""
-        md = f"# {slide['title']}\n\n"
+        md = f"# {slide.title}\n\n"
 
         # Add bullet points
-        for bullet in slide['bullets']:
+        for bullet in slide.bullets:
             md += f"- {bullet}\n"
 
-        # Add visual note if present
-        if slide['visual']:
-            md += f"\n![bg right:40%](https://via.placeholder.com/800x600?text={slide['visual'].replace(' ', '+')})\n"
+        # Add a placeholder image for the visual, unless the slide is text only
+        if slide.visual and not slide.text_only:
+            md += f"\n![bg right:40%](https://via.placeholder.com/800x600?text={quote(slide.visual, safe='')})\n"
 
         # Add speaker notes as HTML comment
-        if slide['speaker_notes']:
-            md += f"\n<!--\nSpeaker Notes:\n{slide['speaker_notes']}\n-->\n"
+        if slide.speaker_notes:
+            md += f"\n<!--\nSpeaker Notes:\n{slide.speaker_notes}\n-->\n"
 
         return md
 
-    def generate_marp_presentation(self, slides: List[Dict]) -> str:
+    def generate_marp_presentation(self, slides: List[Slide]) -> str:
         """Generate complete Marp presentation."""
         presentation = self.generate_marp_header()
 
@@ -109,14 +69,12 @@ def convert_to_marp(input_file: str, output_file: Optional[str] = None, theme: s
     """
     Main conversion function.
     """
-    # Read input file
+    # Read the slide IR cache (.jsonl) or parse the script text
     input_path = Path(input_file)
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    slides = load_slides(input_path)
 
     # Generate Marp presentation
     generator = MarpGenerator(theme=theme)
-    slides = generator.parse_claude_output(content)
 
     if not slides:
         raise ValueError(
@@ -146,6 +104,7 @@ def main():
             "Usage: python marp_generator.py input_file [output_file] [theme]")
         print("Themes: default, gaia, uncover")
         print("Example: python marp_generator.py claude_output.txt slides.md uncover")
+        print("         python marp_generator.py outputs/script_1_slides.jsonl slides.md")
         sys.exit(1)
 
     input_file = sys.argv[1]
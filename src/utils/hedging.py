@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Request hedging for tail latency.
+When a call is still running after the stage's observed p90 latency, a
+duplicate is sent and whichever finishes first wins; the other is cancelled.
+Hedges are capped at a fraction of the calls made, which bounds the extra
+spend.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class _SentEvent(asyncio.Event):
+    """An Event that remembers when it was set."""
+
+    def __init__(self):
+        super().__init__()
+        self.at: Optional[float] = None
+
+    def set(self):
+        if self.at is None:
+            self.at = time.monotonic()
+        super().set()
+
+
+class HedgePolicy:
+    """Fire a duplicate request once a call outlives the p90 latency."""
+
+    def __init__(self, max_extra: float = 0.2, percentile: float = 0.9,
+                 min_samples: int = 5, window: int = 50):
+        # Hedges may add at most max_extra × the calls made so far
+        self.max_extra = max_extra
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, latency: float):
+        """Record the API latency of a completed call; run() does this for its calls."""
+        self.latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """The observed p90 latency, or None until enough calls have completed."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)]
+
+    def _reserve(self) -> bool:
+        if self.hedges + 1 > self.max_extra * self.calls:
+            return False
+        self.hedges += 1
+        return True
+
+    async def run(self, make_call: Callable[[Optional[asyncio.Event]], Awaitable[Any]],
+                  outcome: Optional[Dict[str, bool]] = None) -> Any:
+        """Await make_call(sent), hedging it with make_call(None) if it runs long.
+
+        make_call sets ``sent`` once the request has left the rate limiter, so
+        time spent queueing for headroom never triggers a hedge. The latency
+        observed is always the original request's, from send to completion;
+        when the hedge wins, the time the original had run so far is used, so
+        winning hedges cannot drag the p90 down.
+
+        When a hedge is sent, ``outcome["hedged"]`` is set, and
+        ``outcome["hedge_won"]`` too if its response was the one returned.
+        """
+        outcome = {} if outcome is None else outcome
+        self.calls += 1
+        start = time.monotonic()
+        sent = _SentEvent()
+
+        def observe_primary():
+            self.observe(time.monotonic() - (sent.at or start))
+
+        tasks = [asyncio.ensure_future(make_call(sent))]
+        primary = tasks[0]
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                result = await primary
+                observe_primary()
+                return result
+
+            waiter = asyncio.ensure_future(sent.wait())
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if not primary.done():
+                await asyncio.wait({primary}, timeout=delay)
+            if primary.done() or not self._reserve():
+                result = await primary
+                observe_primary()
+                return result
+
+            tasks.append(asyncio.ensure_future(make_call(None)))
+            outcome["hedged"] = True
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                            outcome["hedge_won"] = True
+                        # A lower bound for the original when the hedge wins
+                        if not (primary.done() and primary.exception() is not None):
+                            observe_primary()
+                        return task.result()
+            # Both failed: surface the original call's error to the retry policy
+            return primary.result()
+        finally:
+            # Cancel the losing request (or both, if the caller was cancelled)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def report(self) -> List[str]:
+        if not self.calls:
+            return []
+        delay = self.hedge_delay()
+        threshold = f", p90 {delay:.1f}s" if delay is not None else ""
+        return [f"{self.hedges} hedged of {self.calls} calls "
+                f"(cap {self.max_extra:.0%}{threshold}), {self.hedge_wins} won by the hedge"]
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Pluggable chat-completion backends for ProfessionalSlideGenerator.
+OpenAIBackend talks to the API. RecordingBackend wraps another backend and
+appends every request/response pair to a JSON-lines cassette;
+ReplayBackend serves a cassette back offline with a configurable synthetic
+latency, so the whole pipeline can be benchmarked deterministically
+without an API key. MockBackend needs no cassette: it writes format-valid
+responses for each stage, for benchmarking inputs that were never recorded.
+"""
+
+import abc
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Union
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+from utils.llm_cache import ResponseCache
+
+# Only the limits are replayed; remaining/reset values belong to the recording's moment
+REPLAYED_HEADERS = ('x-ratelimit-limit-requests', 'x-ratelimit-limit-tokens')
+
+
+class BackendResponse:
+    """A completion (or a stream of chunks) plus the HTTP response headers."""
+
+    def __init__(self, response: Any, headers: Optional[Mapping[str, Any]] = None):
+        self.response = response
+        self.headers = headers or {}
+
+
+class ChatBackend(abc.ABC):
+    """Interface: turn one chat.completions request dict into a BackendResponse.
+
+    Non-streamed responses expose ``choices[0].message.content``,
+    ``choices[0].finish_reason`` and ``usage`` like the OpenAI SDK objects;
+    streamed ones are async iterables of chunks with ``choices[0].delta``.
+    """
+
+    @abc.abstractmethod
+    async def create(self, request: Dict[str, Any]) -> BackendResponse:
+        """Send one request and return its response."""
+
+
+class OpenAIBackend(ChatBackend):
+    """The OpenAI API via AsyncOpenAI, with the SDK's own retries disabled."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        if openai is None:
+            raise ImportError("openai package not installed. Run: pip install openai")
+        # Retries go through the generator's retry policy and rate limiter instead
+        self.client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+
+    async def create(self, request: Dict[str, Any]) -> BackendResponse:
+        raw = await self.client.chat.completions.with_raw_response.create(**request)
+        return BackendResponse(raw.parse(), raw.headers)
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Cassette key: the same fields the response cache keys on."""
+    return ResponseCache.make_key(**{name: request[name] for name in
+                                     ("model", "messages", "max_tokens", "temperature", "stop")
+                                     if name in request})
+
+
+def _usage_dict(usage: Any) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {"prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cached_tokens": getattr(details, 'cached_tokens', None) or 0}
+
+
+def _usage_object(usage: Optional[Dict[str, int]]) -> Any:
+    if usage is None:
+        return None
+    return SimpleNamespace(
+        prompt_tokens=usage["prompt_tokens"],
+        completion_tokens=usage["completion_tokens"],
+        total_tokens=usage["prompt_tokens"] + usage["completion_tokens"],
+        prompt_tokens_details=SimpleNamespace(cached_tokens=usage.get("cached_tokens", 0)))
+
+
+def completion_object(content: str, finish_reason: Optional[str] = "stop",
+                      usage: Optional[Dict[str, int]] = None) -> Any:
+    """A minimal stand-in for an OpenAI ChatCompletion."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content),
+                                 finish_reason=finish_reason)],
+        usage=_usage_object(usage))
+
+
+def chunk_object(content: Optional[str] = None, finish_reason: Optional[str] = None,
+                 usage: Optional[Dict[str, int]] = None) -> Any:
+    """A minimal stand-in for an OpenAI ChatCompletionChunk."""
+    choices = [] if content is None and finish_reason is None else [SimpleNamespace(
+        delta=SimpleNamespace(content=content), finish_reason=finish_reason)]
+    return SimpleNamespace(choices=choices, usage=_usage_object(usage))
+
+
+class RecordingBackend(ChatBackend):
+    """Pass requests to another backend and append each exchange to a cassette."""
+
+    def __init__(self, inner: ChatBackend, cassette_path: Union[str, Path],
+                 append: bool = False):
+        self.inner = inner
+        self.cassette_path = Path(cassette_path)
+        self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+        if not append:
+            self.cassette_path.write_text('', encoding='utf-8')
+        self.recorded = 0
+
+    def _write(self, request: Dict[str, Any], content: str, finish_reason: Optional[str],
+               usage: Any, headers: Mapping[str, Any], latency: float,
+               time_to_first_token: Optional[float] = None):
+        entry = {
+            "key": request_key(request),
+            "model": request["model"],
+            "stream": bool(request.get("stream")),
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": _usage_dict(usage),
+            "headers": {name: headers.get(name) for name in REPLAYED_HEADERS
+                        if headers.get(name) is not None},
+            "latency": round(latency, 4),
+            "time_to_first_token": None if time_to_first_token is None
+            else round(time_to_first_token, 4),
+        }
+        # Appended one line at a time, so an interrupted run keeps what it recorded
+        with open(self.cassette_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.recorded += 1
+
+    async def create(self, request: Dict[str, Any]) -> BackendResponse:
+        start = time.monotonic()
+        result = await self.inner.create(request)
+        if not request.get("stream"):
+            choice = result.response.choices[0]
+            self._write(request, choice.message.content, choice.finish_reason,
+                        getattr(result.response, 'usage', None), result.headers,
+                        time.monotonic() - start)
+            return result
+        return BackendResponse(self._record_stream(request, result, start), result.headers)
+
+    async def _record_stream(self, request: Dict[str, Any], result: BackendResponse,
+                             start: float) -> AsyncIterator[Any]:
+        parts: List[str] = []
+        finish_reason = None
+        usage = None
+        first_token = None
+        async for chunk in result.response:
+            usage = getattr(chunk, 'usage', None) or usage
+            if chunk.choices:
+                finish_reason = getattr(chunk.choices[0], 'finish_reason', None) or finish_reason
+                if chunk.choices[0].delta.content:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self._write(request, "".join(parts), finish_reason, usage, result.headers,
+                    time.monotonic() - start, first_token)
+
+
+class CassetteMissError(Exception):
+    """A replayed run made a request that the cassette does not contain."""
+
+
+class LatencyModel:
+    """Synthetic call latency for replay.
+
+    Specs: "recorded" or "recorded:<scale>" (the recorded latency, scaled),
+    "fixed:<seconds>", "uniform:<low>,<high>", "lognormal:<median>,<sigma>",
+    or "none". Draws come from a seeded generator, so a replay is repeatable.
+    """
+
+    def __init__(self, spec: str = "recorded", seed: int = 0):
+        self.spec = spec
+        kind, _, args = spec.partition(':')
+        self.kind = kind
+        self.args = [float(value) for value in args.split(',')] if args else []
+        if kind not in ("recorded", "fixed", "uniform", "lognormal", "none"):
+            raise ValueError(f"Unknown latency model: {spec}")
+        self.rng = random.Random(seed)
+
+    def sample(self, recorded: float) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "recorded":
+            return recorded * (self.args[0] if self.args else 1.0)
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(self.args[0], self.args[1])
+        median, sigma = self.args
+        return median * self.rng.lognormvariate(0.0, sigma)
+
+
+class _SyntheticBackend(ChatBackend):
+    """Delivers prepared responses after a LatencyModel delay, streamed or not."""
+
+    def __init__(self, latency: Union[str, LatencyModel], stream_chunk_chars: int = 16):
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel(latency)
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+
+    async def _serve(self, request: Dict[str, Any], entry: Dict[str, Any]) -> BackendResponse:
+        """Answer with a cassette-style entry: content, finish_reason, usage, latency."""
+        total = self.latency.sample(entry["latency"])
+        if not request.get("stream"):
+            await asyncio.sleep(total)
+            return BackendResponse(
+                completion_object(entry["content"], entry["finish_reason"], entry["usage"]),
+                entry["headers"])
+
+        # Scale the recorded time to first token with the sampled total
+        recorded_ttft = entry.get("time_to_first_token")
+        ttft_share = (recorded_ttft / entry["latency"]) if recorded_ttft and entry["latency"] else 0.2
+        await asyncio.sleep(total * ttft_share)
+        return BackendResponse(self._stream(entry, total * (1 - ttft_share)), entry["headers"])
+
+    async def _stream(self, entry: Dict[str, Any], duration: float) -> AsyncIterator[Any]:
+        content = entry["content"] or ""
+        pieces = [content[i:i + self.stream_chunk_chars]
+                  for i in range(0, len(content), self.stream_chunk_chars)]
+        delay = duration / max(len(pieces), 1)
+        # Pace against the deadline: sub-millisecond sleeps overshoot and would add up
+        start = time.monotonic()
+        for index, piece in enumerate(pieces, 1):
+            yield chunk_object(piece)
+            await asyncio.sleep(max(0.0, start + index * delay - time.monotonic()))
+        yield chunk_object(finish_reason=entry["finish_reason"] or "stop")
+        if entry["usage"]:
+            yield chunk_object(usage=entry["usage"])
+
+
+class ReplayBackend(_SyntheticBackend):
+    """Serve recorded responses from a cassette, offline.
+
+    Requests are matched on model, messages, max_tokens, temperature and,
+    when given, stop (see request_key).
+    Repeated identical requests are answered with their recordings in order.
+    A request missing from the cassette raises CassetteMissError.
+    """
+
+    def __init__(self, cassette_path: Union[str, Path],
+                 latency: Union[str, LatencyModel] = "recorded",
+                 stream_chunk_chars: int = 16):
+        super().__init__(latency, stream_chunk_chars)
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        with open(cassette_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+
+    def _next_entry(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        key = request_key(request)
+        recordings = self.entries.get(key)
+        if not recordings:
+            raise CassetteMissError(
+                f"No recording for this {request['model']} request; re-record the cassette")
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        return recordings[min(served, len(recordings) - 1)]
+
+    async def create(self, request: Dict[str, Any]) -> BackendResponse:
+        return await self._serve(request, self._next_entry(request))
+
+
+# Markers MockBackend uses to recognise each stage's prompt
+MOCK_SLIDE_NUMBER = re.compile(r'Slide number N = (\d+)')
+# Business terms mixed with short function words, so the filler has about the
+# token density of real prose
+MOCK_WORDS = ("revenue growth customer platform strategy market quarter adoption "
+              "pipeline margin retention enterprise segment forecast pricing "
+              "expansion partner launch roadmap operations team priority "
+              "the the the and and of of to to in in our we for with this that "
+              "is are by on as at it new").split()
+
+
+class MockBackend(_SyntheticBackend):
+    """Answer every stage locally with format-valid placeholder output.
+
+    Stage 2 gets ``slides`` "**SLIDE N:" blocks, Stage 3 a full slide in the
+    SLIDE_INSTRUCTIONS format, Stage 4 its input slides back, and analysis and
+    summaries a block of filler prose; a continuation request gets the rest of
+    the answer it continues. Output is deterministic per request, ends at the
+    first stop sequence and is cut off at ``max_tokens`` with finish_reason
+    "length", like the API. ``latency`` is a LatencyModel spec; usage is
+    counted with ``count_tokens`` (default: about 4 characters per token).
+    """
+
+    def __init__(self, latency: Union[str, LatencyModel] = "fixed:0.05", slides: int = 18,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 stream_chunk_chars: int = 16):
+        super().__init__(latency, stream_chunk_chars)
+        self.slides = slides
+        self.count_tokens = count_tokens or (lambda text: max(1, len(text) // 4))
+        self.calls = 0
+
+    def _filler(self, seed: str, words: int) -> str:
+        rng = random.Random(hashlib.sha256(seed.encode('utf-8')).hexdigest())
+        sentences = []
+        while words > 0:
+            length = min(words, rng.randint(8, 16))
+            sentences.append(" ".join(rng.choices(MOCK_WORDS, k=length)).capitalize() + ".")
+            words -= length
+        return " ".join(sentences)
+
+    def _content(self, prompt: str, key: str) -> str:
+        if "SLIDE STRUCTURE FORMAT" in prompt:
+            blocks = [f"**SLIDE {i}: {self._filler(key + str(i), 4)[:-1]}**\n"
+                      f"- Objective: {self._filler(key + 'o' + str(i), 12)}\n"
+                      f"- Key Content: {self._filler(key + 'k' + str(i), 24)}\n"
+                      f"- Visual Approach: TEXT ONLY\n"
+                      f"- Talking Points: {self._filler(key + 't' + str(i), 16)}\n"
+                      f"- Transition: {self._filler(key + 'n' + str(i), 10)}"
+                      for i in range(1, self.slides + 1)]
+            return f"TOTAL SLIDES: {self.slides}\n\n" + "\n\n".join(blocks)
+
+        slide = MOCK_SLIDE_NUMBER.search(prompt)
+        if slide:
+            bullets = "\n".join(f"• {self._filler(key + 'b' + str(i), 14)}" for i in range(4))
+            return (f"SLIDE {slide.group(1)}: {self._filler(key, 5)[:-1]}\n\n"
+                    f"**SPEAKER NOTES:**\n{self._filler(key + 's', 130)}\n\n"
+                    f"**SLIDE CONTENT:**\n{bullets}\n\n"
+                    f"**VISUAL SPECIFICATION:**\nTEXT ONLY\n\n"
+                    f"**TRANSITION TO NEXT SLIDE:**\n{self._filler(key + 't', 15)}")
+
+        if "SLIDES TO POLISH:" in prompt:
+            return prompt.split("SLIDES TO POLISH:", 1)[1].strip()
+        return self._filler(key, 600)
+
+    async def create(self, request: Dict[str, Any]) -> BackendResponse:
+        self.calls += 1
+        # A continuation request gets the rest of the answer it continues
+        messages = request["messages"]
+        first_reply = next((i for i, m in enumerate(messages) if m["role"] == "assistant"),
+                           len(messages))
+        original = dict(request, messages=messages[:first_reply])
+        written = "".join(m["content"] for m in messages[first_reply:] if m["role"] == "assistant")
+        content = self._content(original["messages"][-1]["content"],
+                                request_key(original))[len(written):]
+        for sequence in request.get("stop") or []:
+            if sequence in content:
+                content = content[:content.index(sequence)]
+        finish_reason = "stop"
+        tokens = self.count_tokens(content)
+        if tokens > request["max_tokens"]:
+            content = content[:len(content) * request["max_tokens"] // tokens]
+            finish_reason = "length"
+
+        usage = {"prompt_tokens": sum(self.count_tokens(m["content"]) for m in request["messages"]),
+                 "completion_tokens": self.count_tokens(content), "cached_tokens": 0}
+        return await self._serve(request, {
+            "content": content, "finish_reason": finish_reason, "usage": usage,
+            "headers": {}, "latency": 0.0, "time_to_first_token": None})
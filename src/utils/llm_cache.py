@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for LLM responses.
+Entries are keyed by a hash of the request parameters, expire after a TTL
+and are evicted least-recently-used once the cache exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """Persistent LRU cache for chat completion responses."""
+
+    def __init__(self,
+                 cache_dir: str = "outputs/.llm_cache",
+                 max_bytes: int = 200 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 refresh: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # refresh=True skips lookups but still stores fresh responses
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._total_bytes = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """Hash the request parameters (model, messages, max_tokens, ...)."""
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        """Build the in-memory size/recency index from the files on disk."""
+        for path in self.cache_dir.glob("*/*.json"):
+            stat = path.stat()
+            self._index[path.stem] = (stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+
+    def _remove(self, key: str):
+        size, _ = self._index.pop(key, (0, 0.0))
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry."""
+        with self._lock:
+            if self.refresh or key not in self._index:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if time.time() - entry.get('created', 0) > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            # Touch the file so recency survives across runs
+            now = time.time()
+            os.utime(path, (now, now))
+            self._index[key] = (self._index[key][0], now)
+            self.hits += 1
+            return entry['value']
+
+    def set(self, key: str, value: Any):
+        """Store value under key and evict old entries beyond the size budget."""
+        entry = {'created': time.time(), 'value': value}
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            old_size, _ = self._index.get(key, (0, 0.0))
+            self._index[key] = (len(data), time.time())
+            self._total_bytes += len(data) - old_size
+            self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under max_bytes."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Per-stage model routing with latency-triggered fallback.
+A routing table maps each generation stage to a model, optionally with a
+faster fallback model and a latency threshold. When the median latency of a
+stage's recent calls breaches its threshold, later calls of that stage go to
+the fallback. Every call's model, latency, tokens and estimated cost are
+recorded so a run can report what routing decided and what it saved.
+"""
+
+import json
+import os
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+# USD per million (input, output) tokens; unknown models are reported without cost
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+
+class Route:
+    """Model for one stage, with an optional fallback above max_latency seconds."""
+
+    def __init__(self, model: str, fallback: Optional[str] = None,
+                 max_latency: Optional[float] = None):
+        self.model = model
+        self.fallback = fallback
+        self.max_latency = max_latency
+
+    @classmethod
+    def from_config(cls, value: Union[str, Dict[str, Any]]) -> "Route":
+        """Build a route from "model" or {"model", "fallback", "max_latency"}."""
+        if isinstance(value, str):
+            return cls(value)
+        return cls(value["model"], value.get("fallback"), value.get("max_latency"))
+
+
+class ModelRouter:
+    """Pick the model for each stage and record the effect of those choices."""
+
+    def __init__(self, default_model: str,
+                 routes: Optional[Dict[str, Union[Route, str, Dict[str, Any]]]] = None,
+                 window: int = 3,
+                 prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.default_model = default_model
+        self.routes = {stage: route if isinstance(route, Route) else Route.from_config(route)
+                       for stage, route in (routes or {}).items()}
+        self.window = max(1, window)
+        self.prices = prices or MODEL_PRICES
+        # Stages that have switched to their fallback model for the rest of the run
+        self.fallen_back: Dict[str, str] = {}
+        self.decisions: List[Dict[str, Any]] = []
+        self._recent: Dict[str, Deque[float]] = {}
+        # (stage, model) -> calls, seconds, prompt and completion tokens
+        self.usage: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], default_model: str) -> "ModelRouter":
+        """Load a JSON routing table: {"default": model, "<stage>": route, ...}."""
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        default_model = table.pop("default", default_model)
+        return cls(default_model, table)
+
+    @classmethod
+    def from_env(cls, default_model: str, path: Optional[str] = None) -> "ModelRouter":
+        """Routing table from `path` or MODEL_ROUTES, else every stage on default_model."""
+        path = path or os.getenv('MODEL_ROUTES')
+        if not path:
+            return cls(default_model)
+        return cls.from_file(path, default_model)
+
+    def fingerprint(self) -> str:
+        """The default model and routing table as a stable string, for checkpoint fingerprints."""
+        return json.dumps({"default_model": self.default_model,
+                           "routes": {stage: vars(route) for stage, route in self.routes.items()}},
+                          sort_keys=True)
+
+    def route_for(self, stage: str) -> Optional[Route]:
+        """Route for a stage; "summary-map" falls back to the "summary" route."""
+        return self.routes.get(stage) or self.routes.get(stage.split('-')[0])
+
+    def model_for(self, stage: str) -> str:
+        if stage in self.fallen_back:
+            return self.fallen_back[stage]
+        route = self.route_for(stage)
+        return route.model if route else self.default_model
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+        """Estimated USD cost of a call, or None for a model without a price."""
+        price = self.prices.get(model)
+        if price is None:
+            return None
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+    def record(self, stage: str, model: str, latency: float,
+               prompt_tokens: int, completion_tokens: int):
+        """Record one completed call and fall back if the stage is too slow."""
+        entry = self.usage.setdefault((stage, model), {
+            "calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        entry["calls"] += 1
+        entry["seconds"] += latency
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+
+        route = self.route_for(stage)
+        if not route or not route.fallback or route.max_latency is None:
+            return
+        if stage in self.fallen_back or model != route.model:
+            return
+
+        recent = self._recent.setdefault(stage, deque(maxlen=self.window))
+        recent.append(latency)
+        if len(recent) < self.window:
+            return
+        median = statistics.median(recent)
+        if median > route.max_latency:
+            self.fallen_back[stage] = route.fallback
+            self.decisions.append({
+                "time": time.time(), "stage": stage, "from": model, "to": route.fallback,
+                "median_latency": round(median, 2), "max_latency": route.max_latency})
+            print(f"   🔀 {stage}: median latency {median:.1f}s > {route.max_latency:g}s, "
+                  f"routing to {route.fallback}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage, per-model calls, latency and cost, plus the routing decisions."""
+        stages = []
+        for (stage, model), entry in self.usage.items():
+            cost = self.cost(model, entry["prompt_tokens"], entry["completion_tokens"])
+            baseline = self.cost(self.default_model, entry["prompt_tokens"],
+                                 entry["completion_tokens"])
+            stages.append({
+                "stage": stage,
+                "model": model,
+                "calls": entry["calls"],
+                "avg_latency": round(entry["seconds"] / entry["calls"], 2),
+                "prompt_tokens": entry["prompt_tokens"],
+                "completion_tokens": entry["completion_tokens"],
+                "cost_usd": None if cost is None else round(cost, 4),
+                # The same tokens on the default model, to show what routing saved
+                "default_model_cost_usd": None if baseline is None else round(baseline, 4),
+            })
+        return {"default_model": self.default_model,
+                "routes": {stage: vars(route) for stage, route in self.routes.items()},
+                "stages": stages,
+                "decisions": self.decisions}
+
+    def report(self) -> List[str]:
+        """One line per stage and model: calls, average latency and estimated cost."""
+        lines = []
+        for entry in self.summary()["stages"]:
+            line = (f"{entry['stage']} → {entry['model']}: {entry['calls']} calls, "
+                    f"{entry['avg_latency']:.1f}s avg")
+            if entry["cost_usd"] is not None:
+                line += f", ${entry['cost_usd']:.4f}"
+                baseline = entry["default_model_cost_usd"]
+                if entry["model"] != self.default_model and baseline is not None:
+                    line += f" (${baseline:.4f} on {self.default_model})"
+            lines.append(line)
+        return lines
+
+    def save(self, path: Union[str, Path]):
+        """Write the run's routing summary as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
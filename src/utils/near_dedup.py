@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate sentence removal with MinHash and locality-sensitive hashing.
+Transcripts often repeat the same statements, and every repeat is paid for in
+Stage 1 and strategic-summary prompt tokens. In a single pass, each sentence
+is shingled into word bigrams, MinHashed and looked up in LSH band buckets of
+recently kept sentences. A sentence whose bigram Jaccard similarity to a kept
+one reaches the threshold is dropped, unless it has numbers the kept one
+lacks or differs from it by a negation or a name. The kept text comes with a
+map back to offsets in the original.
+"""
+
+import bisect
+import hashlib
+import itertools
+import re
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from utils.token_counter import TokenCounter, get_token_counter
+
+# A sentence: up to a terminator followed by whitespace, or to the end of the line
+UNIT_PATTERN = re.compile(r'\S[^\n]*?(?:[.!?]+["\'”’)\]]*(?=\s|\Z)|(?=\n)|\Z)')
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Bigram Jaccard similarity at which a sentence counts as a repeat
+DEFAULT_THRESHOLD = 0.9
+# Kept sentences remembered for comparison; older ones are forgotten
+DEFAULT_WINDOW = 10000
+WORD_CACHE_SIZE = 50000
+
+# Words that flip a statement; "won't" tokenizes as "won" + "t"
+NEGATIONS = frozenset({
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without",
+    "cannot", "t", "cant", "dont", "doesnt", "didnt", "wont", "isnt", "arent", "wasnt",
+    "werent", "shouldnt", "wouldnt", "couldnt", "havent", "hasnt", "hadnt"})
+
+# 16-bit MinHash values per signature
+NUM_HASHES = 32
+# Candidates whose estimate is this far below the threshold skip the exact check
+ESTIMATE_SLACK = 0.2
+
+
+@dataclass
+class DedupReport:
+    """What near-duplicate removal dropped."""
+    units: int = 0
+    removed: int = 0
+    chars_removed: int = 0
+    tokens_removed: int = 0
+    tokens_before: int = 0
+
+    @property
+    def tokens_after(self) -> int:
+        return self.tokens_before - self.tokens_removed
+
+    def summary(self) -> str:
+        share = self.tokens_removed / self.tokens_before if self.tokens_before else 0.0
+        return (f"removed {self.removed} of {self.units} sentences as near-duplicates, "
+                f"saving {self.tokens_removed} tokens ({share:.0%})")
+
+
+@dataclass
+class DedupResult:
+    """Deduplicated text plus a map from its offsets to the original's."""
+    text: str
+    report: DedupReport
+    # (offset in text, offset in the original, length) for each kept run
+    segments: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    def source_offset(self, offset: int) -> int:
+        """Offset in the original text of the character at `offset` in `text`."""
+        if not self.segments:
+            return offset
+        starts = [segment[0] for segment in self.segments]
+        index = max(0, bisect.bisect_right(starts, offset) - 1)
+        start, source, length = self.segments[index]
+        return source + min(offset - start, length)
+
+
+@dataclass
+class _KeptSentence:
+    tokens: Tuple[str, ...]
+    signature: Tuple[int, ...]
+    keys: List[Tuple[int, ...]]
+    numbers: FrozenSet[str]
+    exact_key: int
+
+
+def shingles(words: Sequence[str], size: int = 2) -> Set[Tuple[str, ...]]:
+    """Word n-grams of a sentence; a shorter sentence is its own shingle."""
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+class NearDuplicateFilter:
+    """Single-pass MinHash/LSH filter; decides sentence by sentence.
+
+    ``bands`` × ``rows`` hash values are used for LSH, which makes nearly
+    every pair from 0.8 similarity a candidate. A candidate is a repeat when
+    the exact Jaccard similarity of its word bigrams to the kept sentence
+    reaches ``threshold``, and it is kept anyway if it has numbers the kept
+    sentence lacks, or if the words that differ include a negation or a
+    capitalised word (a name). Only the last ``window`` kept sentences are
+    remembered, so memory stays bounded on any input.
+
+    Sentences under ``min_words`` words are too short to compare: they are
+    dropped only as exact repeats inside a run of dropped sentences (a
+    repeated "Got it." between repeated statements), never on their own.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, bands: int = 8, rows: int = 4,
+                 shingle_words: int = 2, min_words: int = 6,
+                 window: Optional[int] = DEFAULT_WINDOW):
+        if bands * rows > NUM_HASHES:
+            raise ValueError(f"bands × rows must be at most {NUM_HASHES}")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_words = shingle_words
+        self.min_words = min_words
+        self.window = window
+        self.buckets: List[Dict[Tuple[int, ...], int]] = [{} for _ in range(bands)]
+        # Kept sentences by id, oldest first
+        self.kept: "OrderedDict[int, _KeptSentence]" = OrderedDict()
+        self.next_id = 0
+        # Hash of each kept sentence's words, so exact repeats skip MinHash
+        self.exact: Dict[int, int] = {}
+        # Short sentences seen, least recent first
+        self.short_seen: "OrderedDict[str, None]" = OrderedDict()
+        self.previous_dropped = False
+        # Per word, one random table entry for each position in a shingle
+        self.word_hashes: Dict[str, Tuple[Tuple[int, ...], ...]] = {}
+
+    def word_hash(self, word: str) -> Tuple[Tuple[int, ...], ...]:
+        entry = self.word_hashes.get(word)
+        if entry is None:
+            if len(self.word_hashes) >= WORD_CACHE_SIZE:
+                # Entries are derived from the word alone, so starting over is safe
+                self.word_hashes.clear()
+            entry = tuple(
+                struct.unpack(f"<{NUM_HASHES}H",
+                              hashlib.blake2b(word.encode('utf-8'), digest_size=NUM_HASHES * 2,
+                                              person=bytes([position])).digest())
+                for position in range(self.shingle_words))
+            self.word_hashes[word] = entry
+        return entry
+
+    def signature(self, words: Sequence[str]) -> Tuple[int, ...]:
+        """MinHash signature of the sentence's word shingles.
+
+        Shingles are hashed by tabulation: the XOR of each word's table entry
+        for its position. Words repeat far more than shingles, so after the
+        first few sentences hashing is one dict lookup per word.
+        """
+        size = self.shingle_words
+        cached = self.word_hashes.get
+        tables = [cached(word) or self.word_hash(word) for word in words]
+        if not tables:
+            return (0,) * NUM_HASHES
+        count = max(1, len(tables) - size + 1)
+        values = [entry[0] for entry in tables[:count]]
+        for position in range(1, min(size, len(tables))):
+            values = [tuple(a ^ b for a, b in zip(value, entry[position]))
+                      for value, entry in zip(values, tables[position:position + count])]
+        return tuple(map(min, zip(*values)))
+
+    def similarity(self, first: Sequence[int], second: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(a == b for a, b in zip(first, second)) / NUM_HASHES
+
+    def repeats(self, tokens: Sequence[str], numbers: FrozenSet[str],
+                kept: _KeptSentence) -> bool:
+        """Whether a sentence repeats a kept one closely enough to drop."""
+        if not numbers <= kept.numbers:
+            return False
+        words = [token.lower() for token in tokens]
+        kept_words = [token.lower() for token in kept.tokens]
+        # Different names or a negation change the fact, however similar the rest is
+        differing = set(words).symmetric_difference(kept_words)
+        if differing & NEGATIONS:
+            return False
+        if any(token[0].isupper() and token.lower() in differing
+               for token in itertools.chain(tokens, kept.tokens)):
+            return False
+        ours = shingles(words, self.shingle_words)
+        theirs = shingles(kept_words, self.shingle_words)
+        return len(ours & theirs) / len(ours | theirs) >= self.threshold
+
+    def is_duplicate(self, sentence: str) -> bool:
+        """True if `sentence` repeats one already kept; otherwise keep and index it."""
+        tokens = TOKEN_PATTERN.findall(sentence)
+        if len(tokens) < self.min_words:
+            key = " ".join(tokens).lower()
+            duplicate = bool(tokens) and key in self.short_seen and self.previous_dropped
+            self.short_seen[key] = None
+            self.short_seen.move_to_end(key)
+            if self.window is not None and len(self.short_seen) > self.window:
+                self.short_seen.popitem(last=False)
+            self.previous_dropped = duplicate
+            return duplicate
+
+        numbers = frozenset(NUMBER_PATTERN.findall(sentence))
+        words = [token.lower() for token in tokens]
+        exact_key = hash(" ".join(words))
+        match = self.exact.get(exact_key)
+        if match is not None and self.repeats(tokens, numbers, self.kept[match]):
+            self.previous_dropped = True
+            return True
+
+        signature = self.signature(words)
+        rows = self.rows
+        keys = [signature[band * rows:(band + 1) * rows] for band in range(self.bands)]
+        checked = set()
+        for bucket, key in zip(self.buckets, keys):
+            match = bucket.get(key)
+            if match is None or match in checked:
+                continue
+            checked.add(match)
+            kept = self.kept[match]
+            if (self.similarity(signature, kept.signature) >= self.threshold - ESTIMATE_SLACK
+                    and self.repeats(tokens, numbers, kept)):
+                self.previous_dropped = True
+                return True
+
+        self.remember(_KeptSentence(tuple(tokens), signature, keys, numbers, exact_key))
+        self.previous_dropped = False
+        return False
+
+    def remember(self, sentence: _KeptSentence):
+        """Index a kept sentence, forgetting the oldest beyond the window."""
+        unit_id = self.next_id
+        self.next_id += 1
+        self.kept[unit_id] = sentence
+        # The newest sentence wins a shared key, so evicting the oldest loses little
+        self.exact[sentence.exact_key] = unit_id
+        for bucket, key in zip(self.buckets, sentence.keys):
+            bucket[key] = unit_id
+
+        if self.window is not None and len(self.kept) > self.window:
+            old_id, old = self.kept.popitem(last=False)
+            if self.exact.get(old.exact_key) == old_id:
+                del self.exact[old.exact_key]
+            for bucket, key in zip(self.buckets, old.keys):
+                if bucket.get(key) == old_id:
+                    del bucket[key]
+
+
+class _SpanWriter:
+    """Collects kept spans of the original, tidying the whitespace around drops."""
+
+    def __init__(self):
+        self.spans: List[Tuple[int, int]] = []
+        self.at_line_start = True
+        self.previous_kept = True
+
+    def keep(self, start: int, end: int, text: str):
+        if start >= end:
+            return
+        if self.spans and self.spans[-1][1] == start:
+            self.spans[-1] = (self.spans[-1][0], end)
+        else:
+            self.spans.append((start, end))
+        self.at_line_start = text[end - 1] == '\n'
+
+    def gap(self, start: int, end: int, text: str):
+        """Whitespace after a sentence: kept after a kept sentence, or to end a line."""
+        if self.previous_kept:
+            self.keep(start, end, text)
+        elif not self.at_line_start and '\n' in text[start:end]:
+            self.keep(text.index('\n', start, end), end, text)
+
+
+def filter_spans(text: str, dedup: NearDuplicateFilter, report: DedupReport,
+                 token_counter: TokenCounter, final: bool = True,
+                 writer: Optional[_SpanWriter] = None) -> Tuple[List[Tuple[int, int]], int]:
+    """Run `text` through the filter; returns the kept spans and the end of the decided text.
+
+    With ``final=False`` the last sentence may be incomplete, so it is left
+    undecided for the caller to carry into the next block.
+    """
+    writer = writer or _SpanWriter()
+    writer.spans = []
+    units = list(UNIT_PATTERN.finditer(text))
+    if not final and units:
+        units.pop()
+    decided = units[-1].end() if units else (len(text) if final else 0)
+
+    position = 0
+    for unit in units:
+        writer.gap(position, unit.start(), text)
+        report.units += 1
+        if dedup.is_duplicate(unit.group()):
+            report.removed += 1
+            report.chars_removed += len(unit.group())
+            report.tokens_removed += token_counter.count(unit.group())
+            writer.previous_kept = False
+        else:
+            writer.keep(unit.start(), unit.end(), text)
+            writer.previous_kept = True
+        position = unit.end()
+    if final:
+        writer.gap(position, len(text), text)
+        decided = len(text)
+    return writer.spans, decided
+
+
+def remove_near_duplicates(text: str, threshold: float = DEFAULT_THRESHOLD,
+                           token_counter: Optional[TokenCounter] = None) -> DedupResult:
+    """Drop near-duplicate sentences from `text` in one pass."""
+    token_counter = token_counter or get_token_counter()
+    report = DedupReport(tokens_before=token_counter.count(text))
+    spans, _ = filter_spans(text, NearDuplicateFilter(threshold), report, token_counter)
+
+    parts = []
+    segments = []
+    offset = 0
+    for start, end in spans:
+        parts.append(text[start:end])
+        segments.append((offset, start, end - start))
+        offset += end - start
+    return DedupResult("".join(parts), report, segments)
+
+
+def stream_remove_near_duplicates(blocks: Iterable[str], report: DedupReport,
+                                  threshold: float = DEFAULT_THRESHOLD,
+                                  token_counter: Optional[TokenCounter] = None) -> Iterator[str]:
+    """remove_near_duplicates over text blocks; joining the pieces gives the same text.
+
+    Only the last, possibly incomplete sentence is held between blocks, and
+    the filter remembers at most DEFAULT_WINDOW kept sentences, so memory
+    does not grow with the input.
+    """
+    token_counter = token_counter or get_token_counter()
+    dedup = NearDuplicateFilter(threshold)
+    writer = _SpanWriter()
+    carry = ""
+    for block in blocks:
+        report.tokens_before += token_counter.count(block)
+        text = carry + block
+        spans, decided = filter_spans(text, dedup, report, token_counter, final=False,
+                                      writer=writer)
+        kept = "".join(text[start:end] for start, end in spans)
+        if kept:
+            yield kept
+        carry = text[decided:]
+
+    spans, _ = filter_spans(carry, dedup, report, token_counter, writer=writer)
+    kept = "".join(carry[start:end] for start, end in spans)
+    if kept:
+        yield kept
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+In-memory BM25 passage index for grounding slide generation in the source.
+The document is split into short SmartChunker passages and indexed once;
+each slide then retrieves only the few passages that match its structure.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from utils.smart_chunk import SmartChunker
+from utils.token_counter import TokenCounter, get_token_counter
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do for from had has have how if in into
+is it its more not of on or our should so than that the their them then there
+these they this to was we were what when which who will with would you your
+slide slides speaker notes content visual title key point points
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word terms with stopwords removed."""
+    return [term for term in TOKEN_PATTERN.findall(text.lower())
+            if term not in STOPWORDS and len(term) > 1]
+
+
+class PassageIndex:
+    """Okapi BM25 over an inverted index of passages."""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75,
+                 token_counter: Optional[TokenCounter] = None):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self.token_counter = token_counter or get_token_counter()
+
+        # term -> [(passage index, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for doc_id, passage in enumerate(passages):
+            terms = tokenize(passage)
+            self.lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                self.postings[term].append((doc_id, freq))
+
+        count = len(passages)
+        self.avg_length = (sum(self.lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    @classmethod
+    def from_text(cls, text: str, passage_tokens: int = 200,
+                  token_counter: Optional[TokenCounter] = None) -> "PassageIndex":
+        """Split text into small overlapping SmartChunker passages and index them."""
+        counter = token_counter or get_token_counter()
+        chunker = SmartChunker(max_tokens=passage_tokens,
+                               overlap_tokens=passage_tokens // 10,
+                               min_chunk_size=200,
+                               token_counter=counter)
+        # Slice by position so the chunker's context-bridge markers are left out
+        passages = [text[meta.start_pos:meta.end_pos].strip()
+                    for _, meta in chunker.chunk_with_overlap(text)]
+        return cls([p for p in passages if p], token_counter=counter)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[float, int]]:
+        """Return up to k (score, passage index) pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, freq in self.postings[term]:
+                norm = 1 - self.b + self.b * \
+                    self.lengths[doc_id] / (self.avg_length or 1)
+                scores[doc_id] += idf * freq * \
+                    (self.k1 + 1) / (freq + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, doc_id) for doc_id, score in ranked[:k]]
+
+    def top_passages(self, query: str, k: int = 4, token_budget: int = 600) -> List[str]:
+        """Best-matching passages for query that together fit in token_budget."""
+        selected = []
+        used = 0
+        for _, doc_id in self.search(query, k):
+            tokens = self.token_counter.count(self.passages[doc_id])
+            if used + tokens > token_budget:
+                continue
+            selected.append(self.passages[doc_id])
+            used += tokens
+        return selected
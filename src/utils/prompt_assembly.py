@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Prompt assembly for provider-side prefix caching.
+Every request is laid out as one byte-identical shared prefix (system
+message), then the static instructions for its stage, then the per-call
+variables. Identical leading tokens across calls let the provider serve
+them from its prompt cache; PromptStats reports how much of each stage's
+prompt that covers.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from utils.token_counter import TokenCounter, get_token_counter
+
+
+class PromptStats:
+    """Per-stage prompt token accounting."""
+
+    FIELDS = ("calls", "prompt_tokens", "reused_prefix_tokens",
+              "api_prompt_tokens", "api_cached_tokens")
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, int]] = {}
+
+    def _stage(self, stage: str) -> Dict[str, int]:
+        return self.stages.setdefault(stage, dict.fromkeys(self.FIELDS, 0))
+
+    def record_prompt(self, stage: str, prompt_tokens: int, reused_prefix_tokens: int):
+        """Record an assembled prompt and how many leading tokens an earlier call shared."""
+        entry = self._stage(stage)
+        entry["calls"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["reused_prefix_tokens"] += reused_prefix_tokens
+
+    def record_usage(self, stage: str, prompt_tokens: int, cached_tokens: int):
+        """Record the provider-reported usage for a call that reached the API."""
+        entry = self._stage(stage)
+        entry["api_prompt_tokens"] += prompt_tokens
+        entry["api_cached_tokens"] += cached_tokens
+
+    def report(self) -> List[str]:
+        """One line per stage: tokens sent, and tokens left once shared prefixes are cached."""
+        lines = []
+        for stage, entry in self.stages.items():
+            uncached = entry["prompt_tokens"] - entry["reused_prefix_tokens"]
+            line = (f"{stage}: {entry['calls']} calls, {entry['prompt_tokens']} prompt tokens, "
+                    f"{uncached} after prefix caching")
+            if entry["api_cached_tokens"]:
+                line += f" (API reported {entry['api_cached_tokens']}/{entry['api_prompt_tokens']} cached)"
+            lines.append(line)
+        return lines
+
+
+class PromptAssembler:
+    """Build chat messages as shared prefix → stage instructions → variables."""
+
+    def __init__(self, shared_prefix: str,
+                 token_counter: Optional[TokenCounter] = None,
+                 stats: Optional[PromptStats] = None):
+        self.shared_prefix = shared_prefix
+        self.token_counter = token_counter or get_token_counter()
+        self.stats = stats or PromptStats()
+        self._prefix_tokens = self.token_counter.count(shared_prefix)
+        self._seen_instructions = set()
+
+    def build(self, stage: str, instructions: str, variables: str = "") -> List[Dict[str, str]]:
+        """Assemble messages for one call and record its token layout.
+
+        ``instructions`` must not contain per-call values, so every call of a
+        stage shares the system message and instructions verbatim.
+        """
+        instructions = instructions.strip()
+        variables = variables.strip()
+        user_content = f"{instructions}\n\n{variables}" if variables else instructions
+
+        count = self.token_counter.count
+        instruction_tokens = count(instructions)
+        total_tokens = self._prefix_tokens + \
+            instruction_tokens + count(variables)
+
+        # The shared prefix is reusable after the first call of the run; the
+        # stage instructions after the first call of that stage
+        digest = hashlib.sha256(instructions.encode('utf-8')).digest()
+        reused = self._prefix_tokens if self.stats.stages else 0
+        if digest in self._seen_instructions:
+            reused += instruction_tokens
+        self._seen_instructions.add(digest)
+        self.stats.record_prompt(stage, total_tokens, reused)
+
+        return [
+            {"role": "system", "content": self.shared_prefix},
+            {"role": "user", "content": user_content}
+        ]
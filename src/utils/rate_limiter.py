@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Adaptive client-side rate limiting for model API calls.
+Two token buckets (requests per minute and tokens per minute) gate every
+request. The buckets are corrected from the provider's x-ratelimit-*
+response headers, and a 429's Retry-After pauses all callers at once.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Mapping, Optional
+
+# Durations in x-ratelimit-reset-* headers look like "1s", "6m0s" or "20ms"
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit reset duration into seconds."""
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, Any]]) -> Optional[float]:
+    """Read retry-after-ms / retry-after (in seconds) from response headers."""
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass  # HTTP-date form is not worth supporting here
+    return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `capacity` units per minute."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.period = period
+        self.capacity = float(capacity)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level +
+                         (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (capped at capacity)."""
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def set_capacity(self, capacity: float):
+        """Adopt a new per-minute limit, keeping the headroom already earned."""
+        self.level += capacity - self.capacity
+        self.capacity = float(capacity)
+
+
+class AsyncRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter for asyncio callers."""
+
+    def __init__(self, rpm: int = 500, tpm: int = 30000):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.total_wait = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # A lock belongs to one event loop; the sync wrappers start a new loop per run
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: int):
+        """Wait until one request using `tokens` tokens fits within the limits."""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(self.blocked_until - now,
+                           self.requests.wait_time(1),
+                           self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+                self.total_wait += wait
+                await asyncio.sleep(wait)
+
+    def release(self, tokens: int):
+        """Return the tokens of a request that failed without a completion."""
+        self.tokens.refill(time.monotonic())
+        self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, Any]]):
+        """Sync the buckets with the provider's x-ratelimit-* headers."""
+        if not headers:
+            return
+        now = time.monotonic()
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            limit = _to_int(headers.get(f'x-ratelimit-limit-{kind}'))
+            if limit:
+                bucket.refill(now)
+                bucket.set_capacity(limit)
+
+            remaining = _to_int(headers.get(f'x-ratelimit-remaining-{kind}'))
+            if remaining is None:
+                continue
+            bucket.refill(now)
+            bucket.level = min(bucket.level, remaining)
+            if remaining <= 0:
+                reset = parse_duration(
+                    headers.get(f'x-ratelimit-reset-{kind}'))
+                if reset:
+                    self.pause(reset)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds` (e.g. a 429's Retry-After)."""
+        self.blocked_until = max(self.blocked_until,
+                                 time.monotonic() + seconds)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Retry policy and circuit breaker for model API calls.
+Transient failures (timeouts, connection errors, 429s, 5xx) are retried with
+bounded exponential backoff and full jitter; client errors fail immediately.
+Repeated transient failures open a circuit breaker so a degraded provider
+fails fast instead of stalling every remaining call.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+RETRYABLE = "retryable"
+RATE_LIMITED = "rate_limited"
+FATAL = "fatal"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit is open."""
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort an exception into RETRYABLE, RATE_LIMITED or FATAL."""
+    if openai is not None:
+        if isinstance(error, openai.RateLimitError):
+            return RATE_LIMITED
+        # APITimeoutError is a subclass of APIConnectionError
+        if isinstance(error, openai.APIConnectionError):
+            return RETRYABLE
+
+    if isinstance(error, CircuitOpenError):
+        return FATAL
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return RETRYABLE
+
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return RATE_LIMITED
+    if status in (408, 409) or (status is not None and status >= 500):
+        return RETRYABLE
+    return FATAL
+
+
+class CircuitBreaker:
+    """Opens after consecutive transient failures; probes again after a cool-down."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        state = self.state
+        if state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(
+                f"Provider circuit open after {self.failures} consecutive failures; "
+                f"retry in {remaining:.0f}s")
+        if state == "half-open":
+            # Let a single probe through; everyone else keeps failing fast
+            if self._probing:
+                raise CircuitOpenError("Provider circuit half-open; probe in progress")
+            self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.state == "half-open":
+                print(f"   🔌 Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Bounded exponential backoff with full jitter and per-call timeouts."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0,
+                 max_delay: float = 30.0, base_timeout: float = 30.0,
+                 min_tokens_per_second: float = 20.0, max_timeout: float = 300.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.base_timeout = base_timeout
+        self.min_tokens_per_second = min_tokens_per_second
+        self.max_timeout = max_timeout
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def timeout_for(self, max_tokens: int) -> float:
+        """Per-call timeout that leaves room for a slow but healthy completion."""
+        return min(self.max_timeout,
+                   self.base_timeout + max_tokens / self.min_tokens_per_second)
+
+    async def call(self, make_call: Callable[[], Awaitable[Any]],
+                   breaker: Optional[CircuitBreaker] = None,
+                   label: str = "model call") -> Any:
+        """Await make_call() until it succeeds, fails fatally or attempts run out.
+
+        make_call should bound the request itself with timeout_for(), so time
+        spent queueing for rate-limit headroom never counts as a timeout.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            if breaker:
+                breaker.before_call()
+            try:
+                result = await make_call()
+            except Exception as e:
+                kind = classify_error(e)
+                if breaker:
+                    # A 429 or client error still means the provider answered
+                    if kind == RETRYABLE:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if kind == FATAL or attempt == self.max_attempts:
+                    raise
+                reason = "timed out" if isinstance(
+                    e, asyncio.TimeoutError) else type(e).__name__
+                # Rate-limited calls already wait on the limiter's Retry-After pause
+                delay = self.backoff(attempt) if kind == RETRYABLE else 0.0
+                print(f"   🔁 Retrying {label} in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{self.max_attempts}): {reason}")
+                await asyncio.sleep(delay)
+                continue
+
+            if breaker:
+                breaker.record_success()
+            return result
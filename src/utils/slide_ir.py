@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Typed slide intermediate representation shared by every exporter.
+A generated script is parsed once, in a single pass over its lines, into
+Slide objects; Marp, JSON and Google Slides all render from those instead of
+re-parsing the "SLIDE N:" text. Decks are cached on disk as JSON lines, one
+slide per line.
+"""
+
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+# "SLIDE 3: Title", "**SLIDE 3: Title**" or "## SLIDE 3: Title" at line start
+SLIDE_HEADER = re.compile(r'^[#*\s]*SLIDE\s+\d+\s*:\s*(.*?)[*\s]*$')
+# "**SPEAKER NOTES:**", "SLIDE CONTENT:", "**TRANSITION TO NEXT SLIDE:** text" ...
+SECTION_HEADER = re.compile(
+    r'^[#*\s]*(SPEAKER NOTES?|SLIDE CONTENT|VISUAL SPECIFICATION|VISUAL|'
+    r'TRANSITION(?: TO NEXT SLIDE)?)[*\s]*:[*\s]*(.*)$')
+# Older one-line forms: "[VISUAL: ...]" and "[SPEAKER NOTE: ...]"
+BRACKET_FIELD = re.compile(r'^\[(VISUAL|SPEAKER NOTES?):\s*(.*?)\]$')
+BULLET = re.compile(r'^(?:[•*-]|\d+\.)\s+')
+SEPARATOR = re.compile(r'^(?:-{3,}|={3,})$')
+TEXT_ONLY = re.compile(r'^\W*TEXT[\s_-]*ONLY\b', re.IGNORECASE)
+
+SECTION_FIELDS = {
+    'speaker note': 'speaker_notes',
+    'speaker notes': 'speaker_notes',
+    'slide content': 'bullets',
+    'visual specification': 'visual',
+    'visual': 'visual',
+    'transition': 'transition',
+    'transition to next slide': 'transition',
+}
+
+
+@dataclass
+class Slide:
+    """One slide: title, bullets, speaker notes, visual spec and transition."""
+    __slots__ = ('number', 'title', 'bullets', 'speaker_notes', 'visual', 'transition')
+    number: int
+    title: str
+    bullets: List[str]
+    speaker_notes: str
+    visual: str
+    transition: str
+
+    @property
+    def text_only(self) -> bool:
+        """True when the visual specification asks for no visual ("TEXT ONLY")."""
+        return TEXT_ONLY.match(self.visual) is not None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_text(self) -> str:
+        """The slide in the generator's "SLIDE N:" script format."""
+        parts = [f"SLIDE {self.number}: {self.title}"]
+        if self.bullets:
+            parts.append("**SLIDE CONTENT:**\n" + "\n".join(f"• {b}" for b in self.bullets))
+        if self.speaker_notes:
+            parts.append(f"**SPEAKER NOTES:**\n{self.speaker_notes}")
+        if self.visual:
+            parts.append(f"**VISUAL SPECIFICATION:**\n{self.visual}")
+        if self.transition:
+            parts.append(f"**TRANSITION TO NEXT SLIDE:**\n{self.transition}")
+        return "\n\n".join(parts)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Slide":
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+
+class _SlideBuilder:
+    """Accumulates the lines of the slide currently being parsed."""
+
+    def __init__(self, number: int, title: str):
+        self.number = number
+        self.title = title
+        self.bullets: List[str] = []
+        self.text = {'speaker_notes': [], 'visual': [], 'transition': []}
+        # Lines before any section header are slide content, as in the short format
+        self.field = 'bullets'
+        self._paragraph: List[str] = []
+
+    def add_line(self, line: str):
+        bracket = BRACKET_FIELD.match(line)
+        if bracket:
+            self._flush()
+            self.text[SECTION_FIELDS[bracket.group(1).lower()]].append(bracket.group(2))
+            return
+
+        section = SECTION_HEADER.match(line)
+        if section:
+            self._flush()
+            self.field = SECTION_FIELDS[section.group(1).lower()]
+            line = section.group(2).strip()
+            if not line:
+                return
+
+        if self.field != 'bullets':
+            self.text[self.field].append(line)
+        elif BULLET.match(line):
+            self._flush()
+            self.bullets.append(BULLET.sub('', line, count=1))
+        else:
+            # Consecutive plain lines form one bullet
+            self._paragraph.append(line)
+
+    def _flush(self):
+        if self._paragraph:
+            self.bullets.append(' '.join(self._paragraph))
+            self._paragraph = []
+
+    def build(self) -> Slide:
+        self._flush()
+        return Slide(
+            number=self.number,
+            title=self.title or f"Slide {self.number}",
+            bullets=self.bullets,
+            speaker_notes='\n'.join(self.text['speaker_notes']),
+            visual='\n'.join(self.text['visual']),
+            transition='\n'.join(self.text['transition']),
+        )
+
+
+def parse_script(text: str) -> List[Slide]:
+    """Parse a generated "SLIDE N:" script into slides in one pass.
+
+    Slides are numbered by position; anything before the first header (such as
+    the metadata block written by write_script) is skipped.
+    """
+    slides: List[Slide] = []
+    current: Optional[_SlideBuilder] = None
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        header = SLIDE_HEADER.match(line)
+        if header:
+            if current:
+                slides.append(current.build())
+            current = _SlideBuilder(len(slides) + 1, header.group(1).strip())
+        elif current and line and not SEPARATOR.match(line):
+            current.add_line(line)
+
+    if current:
+        slides.append(current.build())
+    return slides
+
+
+def write_slides(path: Union[str, Path], slides: Iterable[Slide]):
+    """Save slides as JSON lines, one slide per line."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for slide in slides:
+            f.write(json.dumps(slide.to_dict(), ensure_ascii=False) + '\n')
+
+
+def read_slides(path: Union[str, Path]) -> List[Slide]:
+    """Load slides saved by write_slides."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Slide.from_dict(json.loads(line)) for line in f if line.strip()]
+
+
+def load_slides(path: Union[str, Path]) -> List[Slide]:
+    """Load a .jsonl slide cache, or parse a script text file."""
+    path = Path(path)
+    if path.suffix == '.jsonl':
+        return read_slides(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_script(f.read())
+
+
+def slides_path_for(script_path: Union[str, Path]) -> Path:
+    """The JSON-lines slide cache saved next to a generated script."""
+    script_path = Path(script_path)
+    stem = script_path.stem
+    if stem.endswith('_comprehensive_script'):
+        stem = stem[:-len('_comprehensive_script')]
+    return script_path.with_name(f"{stem}_slides.jsonl")
@@ -7,10 +7,29 @@ Handles various input formats and provides multiple chunking strategies.
 import re
 import sys
 import json
+from bisect import bisect_right
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+# Make the utils package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.token_counter import TokenCounter, get_token_counter  # noqa: E402
+
+
+# Characters read past a chunk window so breaks near its end are still matched
+STREAM_LOOKAHEAD = 4096
+
+
+def read_blocks(file_path: str, block_size: int = 65536) -> Iterator[str]:
+    """Yield a text file in fixed-size blocks instead of reading it whole."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
 
 @dataclass
 class ChunkMetadata:
@@ -28,14 +47,22 @@ class SmartChunker:
     def __init__(self,
                  max_tokens: int = 15000,
                  overlap_tokens: int = 200,
-                 min_chunk_size: int = 1000):
+                 min_chunk_size: int = 1000,
+                 token_counter: Optional[TokenCounter] = None):
         self.max_tokens = max_tokens
         self.overlap_tokens = overlap_tokens
         self.min_chunk_size = min_chunk_size
+        self.token_counter = token_counter or get_token_counter()
 
     def estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (1 token ≈ 4 characters for English)."""
-        return len(text) // 4
+        """Count tokens with the shared token counter."""
+        return self.token_counter.count(text)
+
+    def chars_per_token(self, text: str, sample_size: int = 20000) -> float:
+        """Measure the character/token ratio on a sample to size chunk windows."""
+        sample = text[:sample_size]
+        tokens = self.estimate_tokens(sample)
+        return len(sample) / tokens if tokens else 4.0
 
     def detect_content_type(self, text: str) -> str:
         """Detect the type of content for better chunking strategy."""
@@ -76,6 +103,18 @@ class SmartChunker:
 
         return sorted(set(breaks))
 
+    @staticmethod
+    def last_break_before(break_points: List[int], start_idx: int, end_idx: int) -> int:
+        """Return the last break in (start_idx, end_idx], or end_idx if there is none.
+
+        break_points must be sorted; the binary search keeps chunking
+        O(chunks × log breaks) instead of rescanning every break per chunk.
+        """
+        pos = bisect_right(break_points, end_idx) - 1
+        if pos >= 0 and break_points[pos] > start_idx:
+            return break_points[pos]
+        return end_idx
+
     def chunk_with_overlap(self, text: str) -> List[Tuple[str, ChunkMetadata]]:
         """Create overlapping chunks for better context preservation."""
         content_type = self.detect_content_type(text)
@@ -85,17 +124,19 @@ class SmartChunker:
         start_idx = 0
         chunk_id = 1
 
+        # Convert token budgets to character windows
+        ratio = self.chars_per_token(text)
+        window_chars = max(1, int(self.max_tokens * ratio))
+        overlap_chars = int(self.overlap_tokens * ratio)
+
         while start_idx < len(text):
             # Find the end point for this chunk
-            # Convert tokens to chars
-            end_idx = start_idx + (self.max_tokens * 4)
+            end_idx = start_idx + window_chars
 
-            # Adjust end to nearest semantic break
+            # Adjust end to the last semantic break inside the window
             if end_idx < len(text):
-                suitable_breaks = [
-                    bp for bp in break_points if start_idx < bp <= end_idx]
-                if suitable_breaks:
-                    end_idx = suitable_breaks[-1]
+                end_idx = self.last_break_before(
+                    break_points, start_idx, end_idx)
             else:
                 end_idx = len(text)
 
@@ -128,12 +169,97 @@ class SmartChunker:
             chunks.append((chunk_text, metadata))
 
             # Calculate next start position with overlap
-            next_start = end_idx - (self.overlap_tokens * 4)
+            next_start = end_idx - overlap_chars
             start_idx = max(next_start, start_idx + self.min_chunk_size)
             chunk_id += 1
 
         return chunks
 
+    def chunk_stream(self, blocks: Iterable[str]) -> Iterator[Tuple[str, ChunkMetadata]]:
+        """Streaming version of chunk_with_overlap.
+
+        Consumes text blocks (e.g. from read_blocks) and yields chunks as soon
+        as their window is complete, keeping roughly one chunk of text in
+        memory. Content type and the char/token ratio come from the start of
+        the stream rather than the whole document.
+        """
+        blocks = iter(blocks)
+        buffer = ""
+        offset = 0  # absolute position of buffer[0] in the stream
+        eof = False
+
+        def fill(min_len: int):
+            nonlocal buffer, eof
+            parts = [buffer]
+            size = len(buffer)
+            while not eof and size < min_len:
+                block = next(blocks, None)
+                if block is None:
+                    eof = True
+                else:
+                    parts.append(block)
+                    size += len(block)
+            buffer = "".join(parts)
+
+        fill(20000)
+        ratio = self.chars_per_token(buffer)
+        window_chars = max(1, int(self.max_tokens * ratio))
+        overlap_chars = int(self.overlap_tokens * ratio)
+
+        fill(window_chars + STREAM_LOOKAHEAD)
+        content_type = self.detect_content_type(buffer)
+
+        start_idx = 0
+        chunk_id = 1
+        while True:
+            fill(start_idx + window_chars + STREAM_LOOKAHEAD)
+            if start_idx >= len(buffer):
+                break
+
+            end_idx = start_idx + window_chars
+            is_last = end_idx >= len(buffer)
+            if is_last:
+                end_idx = len(buffer)
+            else:
+                # Breaks are found in the current window only, never the whole stream
+                window = buffer[start_idx:end_idx + STREAM_LOOKAHEAD]
+                window_breaks = [
+                    start_idx + bp for bp in self.find_semantic_breaks(window, content_type)]
+                end_idx = self.last_break_before(
+                    window_breaks, start_idx, end_idx)
+
+            chunk_text = buffer[start_idx:end_idx].strip()
+
+            # Skip tiny chunks
+            if len(chunk_text) < self.min_chunk_size and chunk_id > 1:
+                break
+
+            metadata = ChunkMetadata(
+                chunk_id=chunk_id,
+                start_pos=offset + start_idx,
+                end_pos=offset + end_idx,
+                token_count=self.estimate_tokens(chunk_text),
+                content_type=content_type,
+                has_headers=bool(
+                    re.search(r'^#{1,6}\s', chunk_text, re.MULTILINE)),
+                has_data=bool(re.search(r'\d+%|\$\d+|\d+,\d+', chunk_text))
+            )
+
+            if chunk_id > 1:
+                chunk_text = f"[CONTEXT: This continues from previous section]\n\n{chunk_text}"
+            if not is_last:
+                chunk_text = f"{chunk_text}\n\n[CONTINUES: This section continues in next chunk]"
+
+            yield chunk_text, metadata
+
+            # Drop text that no later chunk can overlap with
+            next_start = max(end_idx - overlap_chars,
+                             start_idx + self.min_chunk_size)
+            buffer = buffer[next_start:]
+            offset += next_start
+            start_idx = 0
+            chunk_id += 1
+
     def chunk_by_sections(self, text: str) -> List[Tuple[str, ChunkMetadata]]:
         """Chunk by logical sections (headers, speakers, etc.)."""
         content_type = self.detect_content_type(text)
@@ -183,7 +309,8 @@ def smart_chunk_file(input_file: str,
                      output_file: Optional[str] = None,
                      strategy: str = "overlap",
                      max_tokens: int = 15000,
-                     format_output: str = "text") -> str:
+                     format_output: str = "text",
+                     stream: bool = False) -> str:
     """
     Main chunking function with multiple strategies.
 
@@ -193,21 +320,13 @@ def smart_chunk_file(input_file: str,
         strategy: "overlap" or "sections"
         max_tokens: Maximum tokens per chunk
         format_output: "text", "json", or "markdown"
+        stream: Read and write incrementally (overlap strategy only)
     """
-    # Read input
     input_path = Path(input_file)
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
     # Initialize chunker
     chunker = SmartChunker(max_tokens=max_tokens)
 
-    # Choose chunking strategy
-    if strategy == "sections":
-        chunks = chunker.chunk_by_sections(content)
-    else:
-        chunks = chunker.chunk_with_overlap(content)
-
     # Determine output path
     if output_file is None:
         suffix = f"_{format_output}" if format_output != "text" else ""
@@ -217,6 +336,25 @@ def smart_chunk_file(input_file: str,
     else:
         output_path = Path(output_file)
 
+    if stream:
+        if strategy != "overlap":
+            raise ValueError("Streaming mode only supports the 'overlap' strategy")
+        total = write_chunks_stream(
+            chunker.chunk_stream(read_blocks(str(input_path))),
+            output_path, input_path, max_tokens, format_output)
+        print(f"Created {total} chunks -> {output_path}")
+        return str(output_path)
+
+    # Read input
+    with open(input_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # Choose chunking strategy
+    if strategy == "sections":
+        chunks = chunker.chunk_by_sections(content)
+    else:
+        chunks = chunker.chunk_with_overlap(content)
+
     # Format and write output
     if format_output == "json":
         output_data = {
@@ -272,6 +410,66 @@ def smart_chunk_file(input_file: str,
     return str(output_path)
 
 
+def write_chunks_stream(chunks: Iterable[Tuple[str, ChunkMetadata]],
+                        output_path: Path,
+                        input_path: Path,
+                        max_tokens: int,
+                        format_output: str) -> int:
+    """Write chunks as they are produced; returns the number written."""
+    total = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if format_output == "json":
+            # Chunks first, so the metadata block can carry the final count
+            f.write('{\n  "chunks": [')
+        elif format_output == "markdown":
+            f.write(f"# Chunked Document: {input_path.name}\n\n")
+            f.write(
+                f"**Strategy:** overlap (streamed) | **Max Tokens:** {max_tokens}\n\n")
+
+        for text, meta in chunks:
+            if format_output == "json":
+                entry = {
+                    "text": text,
+                    "metadata": {
+                        "chunk_id": meta.chunk_id,
+                        "token_count": meta.token_count,
+                        "content_type": meta.content_type,
+                        "has_headers": meta.has_headers,
+                        "has_data": meta.has_data
+                    }
+                }
+                f.write(("," if total else "") + "\n    " +
+                        json.dumps(entry, ensure_ascii=False))
+            elif format_output == "markdown":
+                f.write(f"## Chunk {meta.chunk_id}\n\n")
+                f.write(
+                    f"**Tokens:** {meta.token_count} | **Type:** {meta.content_type}\n\n")
+                f.write(f"{text}\n\n")
+                f.write("---\n\n")
+            else:
+                if total > 0:
+                    f.write(f"\n{'='*50}\n")
+                f.write(
+                    f"CHUNK {meta.chunk_id} | {meta.token_count} tokens | {meta.content_type}\n")
+                f.write(f"{'='*50}\n\n")
+                f.write(text)
+                f.write("\n\n")
+            total += 1
+
+        if format_output == "json":
+            metadata = {
+                "total_chunks": total,
+                "strategy": "overlap",
+                "max_tokens": max_tokens,
+                "source_file": str(input_path),
+                "streamed": True
+            }
+            f.write('\n  ],\n  "metadata": ' +
+                    json.dumps(metadata, ensure_ascii=False) + '\n}\n')
+
+    return total
+
+
 def main():
     """Command line interface."""
     if len(sys.argv) < 2:
@@ -281,6 +479,7 @@ def main():
         print("  --strategy STRAT    'overlap' or 'sections' (default: overlap)")
         print("  --max-tokens N      Maximum tokens per chunk (default: 15000)")
         print("  --format FORMAT     'text', 'json', or 'markdown' (default: text)")
+        print("  --stream            Chunk incrementally without loading the whole file")
         print("\nExample:")
         print("  python smart_chunk.py document.txt --strategy sections --format json")
         sys.exit(1)
@@ -291,6 +490,7 @@ def main():
     strategy = "overlap"
     max_tokens = 15000
     format_output = "text"
+    stream = False
 
     i = 2
     while i < len(sys.argv):
@@ -306,13 +506,16 @@ def main():
         elif sys.argv[i] == "--format" and i + 1 < len(sys.argv):
             format_output = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == "--stream":
+            stream = True
+            i += 1
         else:
             print(f"Unknown argument: {sys.argv[i]}")
             sys.exit(1)
 
     try:
         result = smart_chunk_file(
-            input_file, output_file, strategy, max_tokens, format_output)
+            input_file, output_file, strategy, max_tokens, format_output, stream)
         print(f"Smart chunking complete: {result}")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
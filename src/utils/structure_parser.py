@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Incremental parser for streamed Stage 2 slide-structure output.
+Text deltas are fed in as they arrive; each **SLIDE N: block is emitted as
+soon as the next block header (or the end of the stream) shows it is complete.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+SLIDE_HEADER = re.compile(r'\*\*SLIDE \d+:')
+TOTAL_LINE = re.compile(r'TOTAL SLIDES:\s*\**\s*(\d+)', re.IGNORECASE)
+
+
+class StructureStreamParser:
+    """Split streamed structure text into slide entries incrementally."""
+
+    def __init__(self):
+        self.buffer = ""
+        # Slide count announced on the first line, if the model gave one
+        self.total: Optional[int] = None
+        self.emitted = 0
+        self._seen_header = False
+
+    def _entry(self, block: str) -> Dict[str, str]:
+        self.emitted += 1
+        return {
+            'slide_number': self.emitted,
+            'structure': f"SLIDE {self.emitted}: {block.strip()}"
+        }
+
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        """Add streamed text; return the slide entries completed by it."""
+        self.buffer += text
+
+        if not self._seen_header:
+            match = SLIDE_HEADER.search(self.buffer)
+            preamble = self.buffer[:match.start()] if match else self.buffer
+            total = TOTAL_LINE.search(preamble)
+            if total:
+                self.total = int(total.group(1))
+            if not match:
+                return []
+            # Everything before the first header is preamble, as with re.split
+            self._seen_header = True
+            self.buffer = self.buffer[match.start():]
+
+        # The buffer always starts at the header of the block still being written
+        headers = list(SLIDE_HEADER.finditer(self.buffer))
+        if len(headers) < 2:
+            return []
+        completed = [self._entry(self.buffer[start.end():end.start()])
+                     for start, end in zip(headers, headers[1:])]
+        self.buffer = self.buffer[headers[-1].start():]
+        return completed
+
+    def close(self) -> List[Dict[str, str]]:
+        """Flush the final block once the stream has ended."""
+        buffer, self.buffer = self.buffer, ""
+        match = SLIDE_HEADER.match(buffer)
+        if not match:
+            return []
+        return [self._entry(buffer[match.end():])]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Per-call telemetry for model API calls.
+Every call (including cache hits and failures) is recorded as a CallEvent
+with its stage, slide, model, token usage, latency, retries and outcome.
+At the end of a run the events are written as a JSON report and as a
+Prometheus text-format file, so throughput and cost per deck can be tracked
+across deployments.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from utils.model_router import MODEL_PRICES
+
+
+@dataclass
+class CallEvent:
+    """One model call as seen by the generator."""
+    stage: str
+    model: str
+    slide: Optional[int] = None
+    cache_hit: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    # API time of the successful attempt, excluding rate-limit waits
+    latency: float = 0.0
+    # Wall time of the whole call: rate-limit waits, retries and backoff included
+    total_seconds: float = 0.0
+    # Streamed calls only: seconds until the first content token
+    time_to_first_token: Optional[float] = None
+    finish_reason: Optional[str] = None
+    attempts: int = 0
+    # Whether a hedge was actually sent, and whether its response was used
+    hedged: bool = False
+    hedge_won: bool = False
+    error: Optional[str] = None
+    timestamp: float = 0.0
+
+    @property
+    def cost_usd(self) -> Optional[float]:
+        """Estimated API cost; None for a model without a price."""
+        if self.cache_hit:
+            return 0.0
+        price = MODEL_PRICES.get(self.model)
+        if price is None:
+            return None
+        return (self.prompt_tokens * price[0] + self.completion_tokens * price[1]) / 1_000_000
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class RunTelemetry:
+    """Collects CallEvents and writes the run report."""
+
+    def __init__(self):
+        self.events: List[CallEvent] = []
+        self.started = time.time()
+
+    def record(self, event: CallEvent):
+        if not event.timestamp:
+            event.timestamp = time.time()
+        self.events.append(event)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals per stage and for the run."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for event in self.events:
+            entry = stages.setdefault(event.stage, {
+                "calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "hedged": 0,
+                "hedge_wins": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cached_prompt_tokens": 0, "cost_usd": 0.0, "latencies": [], "truncated": 0})
+            entry["calls"] += 1
+            entry["cache_hits"] += event.cache_hit
+            entry["errors"] += event.error is not None
+            entry["retries"] += max(0, event.attempts - 1)
+            entry["hedged"] += event.hedged
+            entry["hedge_wins"] += event.hedge_won
+            entry["prompt_tokens"] += event.prompt_tokens
+            entry["completion_tokens"] += event.completion_tokens
+            entry["cached_prompt_tokens"] += event.cached_prompt_tokens
+            entry["cost_usd"] += event.cost_usd or 0.0
+            entry["truncated"] += event.finish_reason == "length"
+            if not event.cache_hit and event.error is None:
+                entry["latencies"].append(event.latency)
+
+        for entry in stages.values():
+            latencies = entry.pop("latencies")
+            entry["latency_p50"] = round(_percentile(latencies, 0.5), 3)
+            entry["latency_p95"] = round(_percentile(latencies, 0.95), 3)
+            entry["latency_max"] = round(max(latencies, default=0.0), 3)
+            entry["cost_usd"] = round(entry["cost_usd"], 4)
+
+        wall = time.time() - self.started
+        completion_tokens = sum(e.completion_tokens for e in self.events)
+        return {
+            "wall_seconds": round(wall, 2),
+            "calls": len(self.events),
+            "cache_hits": sum(e.cache_hit for e in self.events),
+            "errors": sum(e.error is not None for e in self.events),
+            "prompt_tokens": sum(e.prompt_tokens for e in self.events),
+            "completion_tokens": completion_tokens,
+            "completion_tokens_per_second": round(completion_tokens / wall, 1) if wall else 0.0,
+            "cost_usd": round(sum(e.cost_usd or 0.0 for e in self.events), 4),
+            "stages": stages,
+        }
+
+    def write_json(self, path: Union[str, Path], **metadata: Any):
+        """Write run metadata, the summary and every call event as JSON."""
+        report = dict(metadata, summary=self.summary(),
+                      events=[dict(asdict(e), cost_usd=e.cost_usd) for e in self.events])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    def write_prometheus(self, path: Union[str, Path], labels: Optional[Dict[str, str]] = None):
+        """Write the run's metrics in Prometheus text exposition format."""
+        labels = labels or {}
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_labels, value in samples:
+                lines.append(f"{name}{_labels(dict(labels, **sample_labels))} {value}")
+
+        # Per stage and model, so routing decisions show up in the totals
+        groups: Dict[tuple, List[CallEvent]] = {}
+        for event in self.events:
+            groups.setdefault((event.stage, event.model), []).append(event)
+
+        def per_group(value) -> List[tuple]:
+            return [({"stage": stage, "model": model}, value(events))
+                    for (stage, model), events in groups.items()]
+
+        metric("deck_model_calls_total", "counter", "Model calls, including cache hits.",
+               per_group(len))
+        metric("deck_model_cache_hits_total", "counter", "Calls served from the response cache.",
+               per_group(lambda events: sum(e.cache_hit for e in events)))
+        metric("deck_model_errors_total", "counter", "Calls that failed after all retries.",
+               per_group(lambda events: sum(e.error is not None for e in events)))
+        metric("deck_model_retries_total", "counter", "Extra attempts made by the retry policy.",
+               per_group(lambda events: sum(max(0, e.attempts - 1) for e in events)))
+        metric("deck_prompt_tokens_total", "counter", "Prompt tokens sent to the API.",
+               per_group(lambda events: sum(e.prompt_tokens for e in events)))
+        metric("deck_completion_tokens_total", "counter", "Completion tokens received.",
+               per_group(lambda events: sum(e.completion_tokens for e in events)))
+        metric("deck_cost_usd_total", "counter", "Estimated API cost in US dollars.",
+               per_group(lambda events: round(sum(e.cost_usd or 0.0 for e in events), 6)))
+
+        lines.append("# HELP deck_call_latency_seconds API latency of successful calls.")
+        lines.append("# TYPE deck_call_latency_seconds summary")
+        for (stage, model), events in groups.items():
+            latencies = [e.latency for e in events if not e.cache_hit and e.error is None]
+            base = dict(labels, stage=stage, model=model)
+            for quantile in (0.5, 0.9, 0.99):
+                lines.append(f"deck_call_latency_seconds"
+                             f"{_labels(dict(base, quantile=quantile))} "
+                             f"{_percentile(latencies, quantile):.3f}")
+            lines.append(f"deck_call_latency_seconds_sum{_labels(base)} {sum(latencies):.3f}")
+            lines.append(f"deck_call_latency_seconds_count{_labels(base)} {len(latencies)}")
+
+        summary = self.summary()
+        metric("deck_run_seconds", "gauge", "Wall time of the run.",
+               [({}, summary["wall_seconds"])])
+        metric("deck_run_completion_tokens_per_second", "gauge",
+               "Completion tokens per second of wall time.",
+               [({}, summary["completion_tokens_per_second"])])
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
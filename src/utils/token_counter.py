@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Shared token counting for the Intelligence-to-Deck pipeline.
+Provides pluggable backends (tiktoken, an offline pure-Python BPE reader and
+a character heuristic) behind one TokenCounter that memoizes counts per
+text segment, so re-counting mostly unchanged documents is cheap.
+
+Backend selection (first match wins):
+  TOKEN_COUNTER_BACKEND=tiktoken|bpe|heuristic
+  TOKEN_COUNTER_BPE_FILE=/path/to/cl100k_base.tiktoken   (for the bpe backend)
+  otherwise tiktoken when installed, else the heuristic.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+
+# cl100k_base pre-tokenizer; needs the `regex` module for \p{...} classes
+CL100K_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+# Closest equivalent expressible with the standard library `re` module
+FALLBACK_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+# Paragraph boundaries used to split text into independently cached segments
+SEGMENT_PATTERN = re.compile(r'(?<=\n\n)')
+
+
+class HeuristicBackend:
+    """Rough estimate: 1 token ≈ 4 characters of English text."""
+    name = "heuristic"
+    cheap = True
+
+    def count(self, text: str) -> int:
+        return len(text) // 4
+
+
+class TiktokenBackend:
+    """Exact counts via the tiktoken library.
+
+    Works offline once the encoding file is in TIKTOKEN_CACHE_DIR.
+    """
+    name = "tiktoken"
+    cheap = False
+
+    def __init__(self, model: Optional[str] = None, encoding_name: str = "cl100k_base"):
+        if tiktoken is None:
+            raise ImportError(
+                "tiktoken package not installed. Run: pip install tiktoken")
+        try:
+            self.encoding = tiktoken.encoding_for_model(
+                model) if model else tiktoken.get_encoding(encoding_name)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+class BPEFileBackend:
+    """Offline byte-level BPE that reads a tiktoken ranks file directly.
+
+    The file format is one ``<base64 token> <rank>`` pair per line, e.g.
+    ``cl100k_base.tiktoken``. Counts are exact when the `regex` module is
+    installed; otherwise a standard-library approximation of the
+    pre-tokenizer is used.
+    """
+    name = "bpe"
+    cheap = False
+
+    def __init__(self, ranks_file: str):
+        self.ranks: Dict[bytes, int] = {}
+        with open(ranks_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    token, rank = line.split()
+                    self.ranks[base64.b64decode(token)] = int(rank)
+        self.pattern = (regex.compile(CL100K_PATTERN) if regex
+                        else re.compile(FALLBACK_PATTERN))
+        self._piece_count = lru_cache(maxsize=65536)(self._bpe_count)
+
+    def _bpe_count(self, piece: bytes) -> int:
+        """Number of tokens the BPE merges produce for one pre-tokenized piece."""
+        if piece in self.ranks:
+            return 1
+        parts: List[bytes] = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best: Optional[Tuple[int, int]] = None
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, i)
+            if best is None:
+                break
+            i = best[1]
+            parts[i:i + 2] = [parts[i] + parts[i + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        return sum(self._piece_count(piece.encode('utf-8'))
+                   for piece in self.pattern.findall(text))
+
+
+class TokenCounter:
+    """Token counter with a memoized fast path keyed by segment hash."""
+
+    def __init__(self, backend=None, cache_size: int = 65536):
+        self.backend = backend or HeuristicBackend()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    def _count_segment(self, segment: str) -> int:
+        key = hashlib.blake2b(segment.encode('utf-8'), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        count = self.backend.count(segment)
+
+        with self._lock:
+            self._cache[key] = count
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        if not text:
+            return 0
+        if self.backend.cheap:
+            return self.backend.count(text)
+        # Paragraphs are counted and cached separately; splitting after a
+        # blank line shifts the total by at most about one token per paragraph
+        return sum(self._count_segment(segment)
+                   for segment in SEGMENT_PATTERN.split(text) if segment)
+
+
+_counters: Dict[Tuple[str, Optional[str]], TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def _make_backend(name: str, model: Optional[str]):
+    if name == "tiktoken":
+        return TiktokenBackend(model)
+    if name == "bpe":
+        ranks_file = os.getenv('TOKEN_COUNTER_BPE_FILE')
+        if not ranks_file:
+            raise ValueError(
+                "TOKEN_COUNTER_BPE_FILE must point to a .tiktoken ranks file")
+        return BPEFileBackend(ranks_file)
+    if name == "heuristic":
+        return HeuristicBackend()
+    raise ValueError(f"Unknown token counter backend: {name}")
+
+
+def get_token_counter(model: Optional[str] = None,
+                      backend: Optional[str] = None) -> TokenCounter:
+    """Return the shared TokenCounter for a backend/model pair."""
+    requested = backend or os.getenv('TOKEN_COUNTER_BACKEND')
+    name = requested or ("tiktoken" if tiktoken is not None else "heuristic")
+    key = (name, model if name == "tiktoken" else None)
+
+    with _counters_lock:
+        if key not in _counters:
+            try:
+                _counters[key] = TokenCounter(_make_backend(name, model))
+            except Exception as e:
+                if requested:
+                    raise
+                # tiktoken is installed but its encoding file is unavailable offline
+                print(f"⚠️  Token counter falling back to heuristic: {e}")
+                _counters[key] = TokenCounter(HeuristicBackend())
+        return _counters[key]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens in text with the default backend."""
+    return get_token_counter(model).count(text)
@@ -3,13 +3,22 @@
 Complete Intelligence-to-Deck workflow automation.
 Processes raw content → cleaned content → AI slides → formatted output.
 Uses inputs/ and outputs/ directory structure.
+All stages run in-process through DeckPipeline; batch mode processes many
+documents in one process with a shared worker pool.
 """
 
+import asyncio
+import glob
+import json
 import os
 import sys
-import subprocess
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
 def setup_directories():
@@ -25,18 +34,6 @@ def setup_directories():
     print(f"   • outputs/ - Generated presentations will be saved here")
 
 
-def run_command(cmd: list, description: str) -> bool:
-    """Run a command and handle errors with real-time output."""
-    print(f"🔄 {description}...")
-    try:
-        # Use real-time output instead of capturing
-        result = subprocess.run(cmd, check=True, text=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error in {description}: {e}")
-        return False
-
-
 def check_google_slides_credentials() -> bool:
     """Check if Google Slides credentials are available."""
     credentials_file = Path("credentials.json")
@@ -52,9 +49,195 @@ def check_google_slides_credentials() -> bool:
     return True
 
 
+def save_pipeline_outputs(result, input_path: Path, base_name: str,
+                          content_type: str) -> Optional[Path]:
+    """Write the generated script and the format-specific output to outputs/.
+
+    Returns the final output path, or None for Google Slides (which lives online).
+    """
+    from generate_slides import write_script
+
+    slides_file = Path("outputs") / f"{base_name}_comprehensive_script.txt"
+    write_script(slides_file, str(input_path), content_type,
+                 result.script, result.timings.get("generate", 0.0), result.slides)
+
+    if result.output_format == "marp":
+        final_file = Path("outputs") / f"{base_name}_presentation.md"
+        with open(final_file, 'w', encoding='utf-8') as f:
+            f.write(result.output)
+        return final_file
+
+    if result.output_format == "json":
+        final_file = Path("outputs") / f"{base_name}_slides.json"
+        with open(final_file, 'w') as f:
+            json.dump(result.output, f, indent=2)
+        return final_file
+
+    if result.output_format == "slides":
+        return None
+
+    return slides_file
+
+
+def collect_batch_inputs(pattern: str) -> List[Path]:
+    """Resolve a directory or glob pattern into the list of documents to process."""
+    path = Path(pattern)
+    if path.is_dir():
+        candidates = sorted(path.iterdir())
+    else:
+        candidates = sorted(Path(match)
+                            for match in glob.glob(pattern, recursive=True))
+    return [p for p in candidates if p.is_file() and not p.name.startswith('.')]
+
+
+def batch_output_names(input_paths: List[Path]) -> Dict[Path, str]:
+    """Output and checkpoint base name for each batch input.
+
+    Unique file stems are used as they are. Files that share a stem (the same
+    name in different folders of a recursive glob) are named after their path
+    relative to the folder all inputs share, e.g. "2024__q1__notes".
+    """
+    stem_counts = Counter(path.stem for path in input_paths)
+    root = Path(os.path.commonpath([str(path.resolve().parent) for path in input_paths]))
+    names = {}
+    for path in input_paths:
+        if stem_counts[path.stem] == 1:
+            names[path] = path.stem
+        else:
+            relative = path.resolve().relative_to(root)
+            names[path] = "__".join(relative.with_suffix('').parts)
+
+    # Same folder and stem, different extension: keep the extension too
+    name_counts = Counter(names.values())
+    for path, name in names.items():
+        if name_counts[name] > 1:
+            names[path] = f"{name}_{path.suffix.lstrip('.')}"
+    return names
+
+
+async def process_batch_document(pipeline, input_path: Path, base_name: str, output_format: str,
+                                 theme: str, resume: bool,
+                                 semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Run prepare → generate → convert for one document; never raises."""
+    from utils.checkpoints import CheckpointStore
+
+    result = {"input": str(input_path), "success": False, "slides": 0,
+              "seconds": 0.0, "output": None, "error": None, "duplicate_tokens_removed": 0}
+
+    async with semaphore:
+        start_time = time.time()
+        try:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+
+            checkpoints = CheckpointStore(
+                Path("outputs") / "checkpoints" / base_name,
+                CheckpointStore.make_fingerprint(
+                    text, pipeline.content_type, pipeline.generator.model,
+                    pipeline.generator.router.fingerprint()),
+                resume=resume)
+            pipeline_result = await pipeline.run_async(
+                text, output_format=output_format, theme=theme, checkpoints=checkpoints)
+            final_file = save_pipeline_outputs(
+                pipeline_result, input_path, base_name, pipeline.content_type)
+
+            result["success"] = True
+            result["slides"] = pipeline_result.slide_count
+            if pipeline_result.dedup:
+                result["duplicate_tokens_removed"] = pipeline_result.dedup.tokens_removed
+            result["output"] = str(final_file)
+
+        except Exception as e:
+            print(f"❌ Error processing {input_path}: {e}")
+            result["error"] = str(e)
+
+        result["seconds"] = round(time.time() - start_time, 1)
+
+    return result
+
+
+def run_batch(pattern: str, content_type: str, output_format: str, theme: str,
+              workers: int, concurrency: int, use_cache: bool, refresh_cache: bool,
+              resume: bool, routes_file: Optional[str] = None, dedup: bool = True) -> bool:
+    """Process every document matching pattern in one process, without prompts."""
+    from generate_slides import ProfessionalSlideGenerator
+    from pipeline import DeckPipeline
+    from prepare_content import TextPreprocessor
+    from utils.llm_cache import ResponseCache
+    from utils.model_router import ModelRouter
+
+    input_paths = collect_batch_inputs(pattern)
+    if not input_paths:
+        print(f"❌ Error: No input files match '{pattern}'")
+        return False
+
+    print(f"📚 Batch mode: {len(input_paths)} documents, {workers} at a time")
+
+    try:
+        router = ModelRouter.from_env("gpt-4-turbo", routes_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: Could not load routing table: {e}")
+        return False
+
+    cache = ResponseCache(refresh=refresh_cache) if use_cache else None
+    pipeline = DeckPipeline(
+        ProfessionalSlideGenerator(concurrency=concurrency, cache=cache, router=router),
+        TextPreprocessor() if dedup else TextPreprocessor(dedup_threshold=None),
+        content_type=content_type)
+
+    names = batch_output_names(input_paths)
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(workers)
+        return await asyncio.gather(*[
+            process_batch_document(pipeline, input_path, names[input_path], output_format,
+                                   theme, resume, semaphore)
+            for input_path in input_paths
+        ])
+
+    batch_start_time = time.time()
+    results = asyncio.run(run_all())
+    batch_elapsed = time.time() - batch_start_time
+
+    succeeded = sum(1 for r in results if r["success"])
+    summary_file = Path("outputs") / "batch_summary.json"
+    with open(summary_file, 'w') as f:
+        json.dump({
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "seconds": round(batch_elapsed, 1),
+            "results": results,
+            "routing": pipeline.generator.router.summary()
+        }, f, indent=2)
+    # One generator serves the whole batch, so its telemetry covers every document
+    pipeline.generator.telemetry.write_json(
+        Path("outputs") / "batch_telemetry.json", inputs=[r["input"] for r in results])
+    pipeline.generator.telemetry.write_prometheus(
+        Path("outputs") / "batch_metrics.prom", {"deck": "batch"})
+
+    print(f"\n📊 BATCH SUMMARY:")
+    print(f"{'='*60}")
+    for r in results:
+        status = "✅" if r["success"] else "❌"
+        detail = f"{r['slides']} slides -> {r['output']}" if r["success"] else r["error"]
+        print(f"{status} {r['input']} ({r['seconds']:.1f}s): {detail}")
+    print(f"{'='*60}")
+    print(
+        f"🏁 {succeeded}/{len(results)} documents succeeded in {batch_elapsed:.1f}s")
+    print(f"📄 Summary saved to: {summary_file}")
+
+    return succeeded == len(results)
+
+
 def main():
+    if "--batch" in sys.argv:
+        main_batch()
+        return
+
     if len(sys.argv) < 2:
         print("Usage: python full_workflow.py <input_filename> [options]")
+        print("       python full_workflow.py --batch <directory|glob> [options]")
         print("\nDirectory Structure:")
         print("  • Place input files in: inputs/")
         print("  • All outputs saved to: outputs/")
@@ -63,11 +246,20 @@ def main():
         print("  --format marp|txt|json|slides  Output format (default: txt)")
         print("  --theme default|gaia         Marp theme (default: default)")
         print("  --title '<title>'            Google Slides presentation title")
+        print("  --no-cache                   Skip the on-disk LLM response cache")
+        print("  --refresh                    Ignore cached responses and re-fetch them")
+        print("  --resume                     Continue an interrupted run from its checkpoints")
+        print("  --routes FILE                Per-stage model routing table (JSON)")
+        print("  --hedge                      Duplicate Stage 3 calls slower than p90 latency")
+        print("  --keep-duplicates            Keep repeated and near-repeated sentences")
+        print("  --batch <directory|glob>     Process every matching document, no prompts")
+        print("  --workers N                  Documents processed at once in batch mode (default: 4)")
         print("\nExamples:")
         print("  python full_workflow.py script_1.txt")
         print("  python full_workflow.py transcript.txt --type technical --format marp")
         print(
             "  python full_workflow.py content.txt --format slides --title 'Business Plan'")
+        print("  python full_workflow.py --batch 'inputs/*.txt' --format json --workers 8")
         print("\nFile locations:")
         print("  Input: inputs/script_1.txt")
         print("  Output: outputs/script_1_presentation.*")
@@ -92,6 +284,7 @@ def main():
     output_format = "txt"
     theme = "default"
     presentation_title = None
+    routes_file = None
 
     for i, arg in enumerate(sys.argv):
         if arg == "--type" and i + 1 < len(sys.argv):
@@ -102,6 +295,8 @@ def main():
             theme = sys.argv[i + 1]
         elif arg == "--title" and i + 1 < len(sys.argv):
             presentation_title = sys.argv[i + 1]
+        elif arg == "--routes" and i + 1 < len(sys.argv):
+            routes_file = sys.argv[i + 1]
 
     # Set default presentation title if not provided
     if not presentation_title:
@@ -125,36 +320,69 @@ def main():
         print("❌ Error: Google Slides credentials required for Google Slides generation")
         sys.exit(1)
 
-    script_dir = Path(__file__).parent
+    # Imported here so the usage message works without the OpenAI package
+    from generate_slides import ProfessionalSlideGenerator
+    from pipeline import DeckPipeline
+    from prepare_content import TextPreprocessor
+    from utils.checkpoints import CheckpointStore
+    from utils.llm_cache import ResponseCache
+    from utils.hedging import HedgePolicy
+    from utils.model_router import ModelRouter
 
-    # Define output paths
-    cleaned_file = Path("outputs") / f"{base_name}_cleaned.txt"
     slides_file = Path("outputs") / f"{base_name}_comprehensive_script.txt"
 
-    # Step 1: Clean and prepare content
-    if not run_command([
-        "python3", str(script_dir / "prepare_content.py"),
-        str(input_path), str(cleaned_file)
-    ], "Cleaning and preparing content"):
+    with open(input_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    try:
+        router = ModelRouter.from_env("gpt-4-turbo", routes_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: Could not load routing table: {e}")
         sys.exit(1)
 
-    # Step 2: Generate slides with AI
-    if not run_command([
-        "python3", str(script_dir / "generate_slides.py"),
-        input_filename, "--type", content_type
-    ], f"Generating comprehensive slides ({content_type} format)"):
+    cache = None
+    if "--no-cache" not in sys.argv:
+        cache = ResponseCache(refresh="--refresh" in sys.argv)
+    pipeline = DeckPipeline(
+        ProfessionalSlideGenerator(
+            cache=cache, router=router,
+            hedging=HedgePolicy() if "--hedge" in sys.argv else None),
+        (TextPreprocessor(dedup_threshold=None) if "--keep-duplicates" in sys.argv
+         else TextPreprocessor()),
+        content_type=content_type)
+
+    checkpoints = CheckpointStore(
+        Path("outputs") / "checkpoints" / base_name,
+        CheckpointStore.make_fingerprint(
+            text, content_type, pipeline.generator.model,
+            pipeline.generator.router.fingerprint()),
+        resume="--resume" in sys.argv)
+
+    # Prepare → generate → convert, all in memory
+    print(
+        f"🔄 Generating comprehensive slides ({content_type} format, {output_format} output)...")
+    try:
+        result = pipeline.run(text, output_format=output_format, theme=theme,
+                              title=presentation_title, checkpoints=checkpoints)
+        if result.dedup:
+            print(f"🧹 Near-duplicates: {result.dedup.summary()}")
+        final_file = save_pipeline_outputs(
+            result, input_path, base_name, content_type)
+        pipeline.generator.router.save(
+            Path("outputs") / f"{base_name}_routing.json")
+        pipeline.generator.telemetry.write_json(
+            Path("outputs") / f"{base_name}_telemetry.json",
+            input=str(input_path), content_type=content_type,
+            output_format=output_format, slides=result.slide_count,
+            timings={stage: round(seconds, 2) for stage, seconds in result.timings.items()},
+            duplicate_tokens_removed=result.dedup.tokens_removed if result.dedup else 0)
+        pipeline.generator.telemetry.write_prometheus(
+            Path("outputs") / f"{base_name}_metrics.prom", {"deck": base_name})
+    except Exception as e:
+        print(f"❌ Error in workflow: {e}")
         sys.exit(1)
 
-    # Step 3: Convert to final format
     if output_format == "marp":
-        final_file = Path("outputs") / f"{base_name}_presentation.md"
-        if not run_command([
-            "python3", str(script_dir / ".." / "utils" /
-                           "exporters" / "marp_generator.py"),
-            str(slides_file), str(final_file), theme
-        ], f"Converting to Marp ({theme} theme)"):
-            sys.exit(1)
-
         print(f"\n✅ Complete! Your presentation is ready:")
         print(f"📄 Marp file: {final_file}")
         print(f"\n🎯 Next steps:")
@@ -163,17 +391,8 @@ def main():
             f"  2. Generate PDF: marp {final_file} -o outputs/{base_name}.pdf")
 
     elif output_format == "slides":
-        # Google Slides generation via Google Slides API
-        print(f"🚀 Generating Google Slides presentation...")
-
-        # Build command for Google Slides
-        slides_cmd = [
-            "python3", str(script_dir / ".." / "utils" /
-                           "exporters" / "google_slides.py"),
-            str(slides_file), presentation_title
-        ]
-
-        if not run_command(slides_cmd, "Generating Google Slides presentation"):
+        if not result.output:
+            print("❌ Error generating Google Slides presentation")
             sys.exit(1)
 
         print(f"\n✅ Complete! Your Google Slides presentation is ready:")
@@ -185,49 +404,9 @@ def main():
         print(f"  4. Export as PDF or PowerPoint if needed")
 
     elif output_format == "json":
-        # Convert slides to JSON structure
-        json_file = Path("outputs") / f"{base_name}_slides.json"
-        print(f"🔄 Converting to JSON format...")
-
-        try:
-            with open(slides_file, 'r') as f:
-                content = f.read()
-
-            # Simple JSON structure
-            import json
-            import re
-
-            slides = []
-            # Skip first empty part
-            slide_blocks = re.split(r'SLIDE \d+:', content)[1:]
-
-            for i, block in enumerate(slide_blocks, 1):
-                lines = block.strip().split('\n')
-                title = lines[0].strip() if lines else f"Slide {i}"
-
-                slide_data = {
-                    "slide_number": i,
-                    "title": title,
-                    "content": block.strip()
-                }
-                slides.append(slide_data)
-
-            with open(json_file, 'w') as f:
-                json.dump(
-                    {"slides": slides, "total_slides": len(slides)}, f, indent=2)
-
-            print(f"✅ JSON generated: {json_file}")
-            final_file = json_file
-
-        except Exception as e:
-            print(f"❌ Error generating JSON: {e}")
-            sys.exit(1)
+        print(f"✅ JSON generated: {final_file}")
 
     else:  # txt format
-        final_file = Path("outputs") / f"{base_name}_comprehensive_script.txt"
-        # Copy slides file to final location with better name
-        import shutil
-        shutil.copy2(slides_file, final_file)
         print(f"\n✅ Complete! Your comprehensive slide script is ready:")
         print(f"📄 Text file: {final_file}")
 
@@ -235,7 +414,6 @@ def main():
     print(f"\n📊 WORKFLOW SUMMARY:")
     print(f"{'='*60}")
     print(f"📥 Input: {input_path}")
-    print(f"🧹 Cleaned: {cleaned_file}")
     print(f"🎯 Content type: {content_type}")
     print(f"📤 Output format: {output_format}")
     if output_format == "slides":
@@ -254,18 +432,69 @@ def main():
         print(f"🎨 Ready for collaboration and customization")
 
     # Cleanup intermediate files option
+    if output_format == "txt":
+        return
+
     print(f"\n🗑️  Cleanup intermediate files? (y/n): ", end="")
     response = input().strip().lower()
     if response == 'y':
         try:
-            if cleaned_file.exists():
-                os.remove(cleaned_file)
-            if output_format != "txt" and slides_file.exists():
+            if slides_file.exists():
                 os.remove(slides_file)
             print("✅ Intermediate files cleaned up")
         except Exception as e:
             print(f"⚠️  Warning: Could not remove some files: {e}")
 
 
+def main_batch():
+    """Command line entry point for --batch mode."""
+    pattern = None
+    content_type = "business"
+    output_format = "txt"
+    theme = "default"
+    workers = 4
+    concurrency = 4
+    routes_file = None
+
+    for i, arg in enumerate(sys.argv):
+        if arg == "--batch" and i + 1 < len(sys.argv):
+            pattern = sys.argv[i + 1]
+        elif arg == "--type" and i + 1 < len(sys.argv):
+            content_type = sys.argv[i + 1]
+        elif arg == "--format" and i + 1 < len(sys.argv):
+            output_format = sys.argv[i + 1]
+        elif arg == "--theme" and i + 1 < len(sys.argv):
+            theme = sys.argv[i + 1]
+        elif arg == "--workers" and i + 1 < len(sys.argv):
+            workers = max(1, int(sys.argv[i + 1]))
+        elif arg == "--concurrency" and i + 1 < len(sys.argv):
+            concurrency = int(sys.argv[i + 1])
+        elif arg == "--routes" and i + 1 < len(sys.argv):
+            routes_file = sys.argv[i + 1]
+
+    if not pattern:
+        print("❌ Error: --batch requires a directory or glob pattern")
+        sys.exit(1)
+
+    if output_format not in ("txt", "marp", "json"):
+        print("❌ Error: Batch mode supports --format txt, marp or json")
+        sys.exit(1)
+
+    if not os.getenv('OPENAI_API_KEY'):
+        print("❌ Error: OPENAI_API_KEY environment variable not set")
+        print("Set it with: export OPENAI_API_KEY='your-api-key'")
+        sys.exit(1)
+
+    setup_directories()
+
+    if not run_batch(pattern, content_type, output_format, theme, workers, concurrency,
+                     use_cache="--no-cache" not in sys.argv,
+                     refresh_cache="--refresh" in sys.argv,
+                     resume="--resume" in sys.argv,
+                     routes_file=routes_file,
+                     dedup="--keep-duplicates" not in sys.argv):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
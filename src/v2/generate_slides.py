@@ -3,30 +3,301 @@
 Multi-stage professional slide script generator with brand consistency.
 Generates 15-20 comprehensive slides using multiple AI iterations.
 Uses inputs/ folder for source files and outputs/ folder for results.
+Runs on the async OpenAI client; the sync entry point wraps the async one.
 """
 
+import asyncio
 import os
 import sys
 import json
-import re
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import (Optional, Dict, Any, List, AsyncIterator, Awaitable, Callable,
+                    Iterable, Tuple, Union)
+
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.checkpoints import CheckpointStore  # noqa: E402
+from utils.hedging import HedgePolicy  # noqa: E402
+from utils.llm_backends import (ChatBackend, OpenAIBackend, RecordingBackend,  # noqa: E402
+                                ReplayBackend)
+from utils.llm_cache import ResponseCache  # noqa: E402
+from utils.model_router import ModelRouter  # noqa: E402
+from utils.passage_index import PassageIndex  # noqa: E402
+from utils.prompt_assembly import PromptAssembler, PromptStats  # noqa: E402
+from utils.rate_limiter import AsyncRateLimiter, retry_after_seconds  # noqa: E402
+from utils.retry import RATE_LIMITED, CircuitBreaker, RetryPolicy, classify_error  # noqa: E402
+from utils.slide_ir import Slide, parse_script, slides_path_for, write_slides  # noqa: E402
+from utils.smart_chunk import SmartChunker  # noqa: E402
+from utils.structure_parser import StructureStreamParser  # noqa: E402
+from utils.telemetry import CallEvent, RunTelemetry  # noqa: E402
+from utils.token_counter import TokenCounter, get_token_counter  # noqa: E402
+
+# Slides per Stage 4 polish call
+POLISH_WINDOW = 5
+
+# Stages whose calls may be hedged: many independent calls, the slowest gates the deck
+HEDGED_STAGES = ("stage3",)
+
+# Output budgets (max_tokens) are sized to what each stage is asked to write.
+# Reserving less keeps the rate limiter's TPM reservations close to real use;
+# an answer that still hits the limit is continued instead of redone.
+TOKENS_PER_WORD = 1.4
+MAX_SLIDES = 20
+ANALYSIS_WORDS = 1100
+STRUCTURE_WORDS_PER_SLIDE = 90
+# Title, 120-150 words of notes, 180-220 words of content, visual and transition
+SLIDE_WORDS = 400
+SUMMARY_WORDS = 2500
+# The map-reduce summary prompts ask for 900 words per partial summary
+SUMMARY_PART_WORDS = 900
+# A polished window is about as long as its input
+POLISH_GROWTH = 1.25
+MAX_CONTINUATIONS = 2
+CONTINUE_PROMPT = ("Your previous answer was cut off by the length limit. Continue exactly "
+                   "where it stopped, without repeating any of it or adding a preamble.")
+
+
+def output_budget(words: int, slides: int = 1, overhead: int = 40) -> int:
+    """max_tokens for `slides` answers of about `words` words plus their formatting."""
+    return slides * (int(words * TOKENS_PER_WORD) + overhead)
+
+
+# Map-reduce summarization of oversized inputs: section size, partial summary
+# length and how many partial-summary tokens one reduce call may take in
+SUMMARY_CHUNK_TOKENS = 16000
+SUMMARY_PART_TOKENS = output_budget(SUMMARY_PART_WORDS)
+SUMMARY_REDUCE_BUDGET = 12000
+
+
+def slide_stop_sequences(slide_number: int) -> List[str]:
+    """Stop sequences that end an answer before it starts slide `slide_number`.
+
+    The number is part of each sequence so "**SLIDE CONTENT:**" never matches.
+    """
+    return [f"\nSLIDE {slide_number}:", f"\n**SLIDE {slide_number}:",
+            f"\n## SLIDE {slide_number}:"]
+
+
+# Static per-stage instructions. Per-call values (content, slide number,
+# structure) are appended after these by PromptAssembler so that every call
+# of a stage starts with the same bytes and hits the provider prompt cache.
+SYSTEM_ROLE = """You are a senior presentation team - strategy consultant, presentation designer, slide writer and editor - producing comprehensive 15-20 slide executive presentations. Complete the task in each request exactly as specified, following these guidelines throughout."""
+
+ANALYSIS_INSTRUCTIONS = """
+TASK: Analyze the content at the end of this message to create a comprehensive presentation outline for 15-20 slides.
 
-try:
-    import openai
-except ImportError:
-    print("Error: openai package not installed. Run: pip install openai")
-    sys.exit(1)
+ANALYSIS REQUIREMENTS:
+1. Identify 6-8 major themes/topics that can be expanded into multiple slides
+2. Extract the most important data points, metrics, and examples
+3. Determine the logical narrative flow across 15-20 slides
+4. Identify opportunities for SIMPLE, TEXT-FREE visuals throughout
+5. Define the core business insight or value proposition
+6. Plan for deeper dive sections that warrant multiple slides
+
+OUTPUT FORMAT:
+**CORE MESSAGE:** [One powerful sentence summarizing the entire presentation]
+
+**MAJOR THEMES FOR SLIDE EXPANSION:**
+1. [Theme 1] - [Description with 2-3 slide potential breakdown]
+2. [Theme 2] - [Description with 2-3 slide potential breakdown]
+3. [Theme 3] - [Description with 2-3 slide potential breakdown]
+4. [Theme 4] - [Description with 2-3 slide potential breakdown]
+5. [Theme 5] - [Description with 2-3 slide potential breakdown]
+6. [Theme 6] - [Description with 2-3 slide potential breakdown]
+7. [Theme 7] - [Description with 2-3 slide potential breakdown]
+8. [Theme 8] - [Description with 2-3 slide potential breakdown]
+
+**EXTENDED NARRATIVE ARC (15-20 slides):**
+- Opening & Context (Slides 1-3): Hook, situation setup, scope definition
+- Problem Definition (Slides 4-6): Challenge analysis, current state, impact
+- Deep Analysis (Slides 7-11): Key insights, data findings, root causes, implications
+- Solutions & Strategy (Slides 12-16): Recommendations, implementation approach, methodology
+- Impact & Next Steps (Slides 17-20): Expected outcomes, timeline, action items, conclusion
+
+**KEY DATA POINTS & METRICS:**
+- [Specific number/metric 1 with context]
+- [Specific number/metric 2 with context]
+- [Specific number/metric 3 with context]
+- [Specific number/metric 4 with context]
+- [Specific number/metric 5 with context]
+- [Additional metrics and quantifiable insights]
+
+**SAFE VISUAL OPPORTUNITIES (NO TEXT IN IMAGES):**
+- [Simple charts, basic diagrams, timelines or comparison tables suited to this content]
+
+**CONTENT DEPTH STRATEGY:**
+- Which topics deserve multiple slides for thorough coverage
+- Where to include detailed case studies or examples
+- Opportunities for step-by-step breakdowns
+- Areas requiring both overview and detail slides
+"""
+
+STRUCTURE_INSTRUCTIONS = """
+TASK: Based on the content analysis at the end of this message, create a detailed structure for each slide in a 15-20 slide presentation.
+
+STRUCTURE REQUIREMENTS:
+- Create 15-20 individual slide specifications
+- Each slide should have a clear purpose and unique angle
+- Ensure logical flow and build throughout presentation
+- Specify safe visual approach for each slide
+- Balance content density across slides
+- Include detailed talking points guidance
+
+Begin your response with one line "TOTAL SLIDES: [N]" stating how many slides you will specify, then give every slide in order.
+
+SLIDE STRUCTURE FORMAT (for each slide):
+**SLIDE [NUMBER]: [Title Focus]**
+- Objective: [What this slide accomplishes]
+- Key Content: [Main points to cover - 3-4 bullet points]
+- Visual Approach: [Simple chart, basic diagram, or "TEXT ONLY"]
+- Talking Points: [Specific guidance for presenter]
+- Transition: [How it connects to next slide]
+
+Create all 15-20 slides following this structure. Focus on comprehensive coverage with each slide adding unique value.
+"""
+
+SLIDE_INSTRUCTIONS = """
+TASK: Write detailed, professional content for the single slide described at the end of this message.
+
+DETAILED SLIDE REQUIREMENTS:
+- Follow exact formatting structure below
+- 180-220 words of total content
+- Professional business language
+- Specific, actionable information
+- SAFE visual integration only
+- Appropriate pacing for the slide's position in the presentation
+
+OUTPUT FORMAT (MANDATORY):
+
+SLIDE [N]: [Compelling Title - Max 8 words]
+
+**SPEAKER NOTES:**
+[Detailed speaking points - 120-150 words covering context, key insights, supporting details, and transition. Consider this slide's position in the overall presentation flow. Write as if coaching the presenter on what to say and emphasize.]
+
+**SLIDE CONTENT:**
+• [Primary headline point - action-oriented with specific detail]
+• [Supporting point with concrete data/example/metric]
+• [Third point with specific evidence or case example]
+• [Fourth point focusing on impact or next step]
+
+**VISUAL SPECIFICATION:**
+[SAFE VISUAL ONLY: Choose from these options:
+- "TEXT ONLY" (when complex visuals would be needed)
+- Simple bar chart showing [specific data from content]
+- Basic line chart displaying [specific metrics from content]
+- Simple pie chart with [specific percentages from content]
+- Basic flowchart: [Step 1] → [Step 2] → [Step 3]
+- Timeline: [Date 1] - [Event 1], [Date 2] - [Event 2]
+- Professional stock photo: [simple description, no text]
+- Simple before/after comparison table]
+
+**TRANSITION TO NEXT SLIDE:**
+[One compelling sentence that bridges to the next topic and maintains narrative flow across the presentation]
+"""
+
+POLISH_INSTRUCTIONS = """
+TASK: Apply final brand polish and consistency to the slides at the end of this message.
+
+POLISH REQUIREMENTS:
+1. Ensure consistent tone and professional language
+2. Strengthen transitions and flow
+3. Verify visual specifications are simple and safe (no text in images)
+4. Optimize content density and clarity
+5. Maintain brand voice throughout
+6. Remove any suggestions for complex graphics, infographics or text overlays
+
+OUTPUT THE POLISHED SLIDES exactly as formatted, but enhanced for maximum professional impact.
+"""
+
+SUMMARY_INSTRUCTIONS = """
+TASK: Create a strategic summary of the content at the end of this message, optimized for a comprehensive 15-20 slide executive presentation (2500 words max).
+
+FOCUS AREAS FOR EXTENDED PRESENTATION:
+- Key business insights and strategic implications (multiple angles)
+- Important metrics, data points, and performance indicators (comprehensive coverage)
+- Critical problems, solutions, and recommendations (detailed breakdown)
+- Success stories, case studies, and concrete examples (multiple examples)
+- Process improvements and methodological insights (step-by-step details)
+- Actionable next steps and implementation strategies (comprehensive roadmap)
+- Supporting context and background information (fuller picture)
+
+PRESERVE FOR 15-20 SLIDE COVERAGE:
+- Specific numbers, percentages, and quantitative data
+- Names, dates, and concrete examples
+- Logical relationships and cause-effect connections
+- Strategic recommendations and action items
+- Detailed processes and methodologies
+- Multiple perspectives and angles on key topics
+"""
+
+SUMMARY_MAP_INSTRUCTIONS = """
+TASK: Summarize the document section at the end of this message (900 words max). It is one part of a larger document; the partial summaries will later be merged into a strategic summary for a 15-20 slide executive presentation.
+
+PRESERVE:
+- Specific numbers, percentages, and quantitative data
+- Names, dates, and concrete examples
+- Problems, solutions, recommendations and action items
+- Processes, methodologies and cause-effect relationships
+
+Write compact factual prose or bullets. Do not add an introduction or conclusion.
+"""
+
+SUMMARY_REDUCE_INSTRUCTIONS = """
+TASK: Merge the partial summaries at the end of this message, which cover consecutive parts of one document, into a single consolidated summary (900 words max).
+
+- Keep every specific number, name, date and concrete example
+- Merge duplicate points instead of repeating them
+- Preserve the order in which topics appear in the document
+"""
 
 
 class ProfessionalSlideGenerator:
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4-turbo"):
-        """Initialize with OpenAI API key and model."""
-        self.client = openai.OpenAI(
-            api_key=api_key or os.getenv('OPENAI_API_KEY'))
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4-turbo",
+                 concurrency: int = 4, parallel_polish: bool = False,
+                 cache: Optional[ResponseCache] = None,
+                 token_counter: Optional[TokenCounter] = None,
+                 grounding_passages: int = 4, grounding_tokens: int = 800,
+                 rate_limiter: Optional[AsyncRateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 router: Optional[ModelRouter] = None,
+                 hedging: Optional[HedgePolicy] = None,
+                 telemetry: Optional[RunTelemetry] = None,
+                 backend: Optional[ChatBackend] = None):
+        """Initialize with OpenAI API key, model, concurrency and response cache.
+
+        Each Stage 3 prompt gets up to ``grounding_passages`` source passages
+        totalling at most ``grounding_tokens`` tokens (0 disables grounding).
+        Every API call waits on ``rate_limiter`` (default: OPENAI_RPM /
+        OPENAI_TPM, refined from the provider's rate-limit headers) and is
+        retried under ``retry_policy`` behind ``circuit_breaker``. ``router``
+        picks each stage's model (default: the MODEL_ROUTES table, else
+        ``model`` everywhere). With ``hedging``, slow Stage 3 calls are
+        duplicated and the first response wins. Every call is recorded in
+        ``telemetry``. Requests go to ``backend`` (default: the OpenAI API).
+        """
+        self.backend = backend or OpenAIBackend(api_key or os.getenv('OPENAI_API_KEY'))
+        self.rate_limiter = rate_limiter or AsyncRateLimiter(
+            rpm=int(os.getenv('OPENAI_RPM', '500')),
+            tpm=int(os.getenv('OPENAI_TPM', '30000')))
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
         self.model = model
+        self.router = router or ModelRouter.from_env(model)
+        self.hedging = hedging
+        self.telemetry = telemetry or RunTelemetry()
+        self.concurrency = max(1, concurrency)
+        self.parallel_polish = parallel_polish
+        self.cache = cache
+        self.token_counter = token_counter or get_token_counter(model)
+        self.grounding_passages = grounding_passages
+        self.grounding_tokens = grounding_tokens
         self.brand_guidelines = self._get_brand_guidelines()
+        # One system message shared verbatim by every call of every stage
+        self.prompt_stats = PromptStats()
+        self.prompts = PromptAssembler(
+            f"{SYSTEM_ROLE}\n{self.brand_guidelines}", self.token_counter, self.prompt_stats)
 
         # Create directory structure
         self.setup_directories()
@@ -101,96 +372,270 @@ BRAND VOICE & STYLE GUIDELINES:
 ❌ Any visual that requires AI to generate text within images
 """
 
-    def estimate_tokens(self, text: str) -> int:
-        """Accurate token estimation."""
-        return len(text.split()) * 1.3
-
-    def stage1_content_analysis(self, content: str, content_type: str) -> Dict[str, Any]:
-        """Stage 1: Analyze content and create presentation outline."""
-
-        print("🔍 Analyzing content structure and themes...")
-        start_time = time.time()
-
-        analysis_prompt = f"""
-Analyze this content to create a comprehensive presentation outline for 15-20 slides.
-
-CONTENT TYPE: {content_type.upper()}
-CONTENT TO ANALYZE:
-{content}
-
-ANALYSIS REQUIREMENTS:
-1. Identify 6-8 major themes/topics that can be expanded into multiple slides
-2. Extract the most important data points, metrics, and examples
-3. Determine the logical narrative flow across 15-20 slides
-4. Identify opportunities for SIMPLE, TEXT-FREE visuals throughout
-5. Define the core business insight or value proposition
-6. Plan for deeper dive sections that warrant multiple slides
-
-CRITICAL: For visuals, ONLY suggest simple charts, basic diagrams, or "TEXT ONLY" slides.
-DO NOT recommend complex graphics, infographics with text, or any visuals requiring text generation.
+    def _request(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                 stage: str, stop: Optional[List[str]] = None) -> Dict[str, Any]:
+        request = {
+            "model": self.router.model_for(stage),
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if stop:
+            request["stop"] = stop
+        return request
+
+    async def _chat(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                    stage: str = "other", slide: Optional[int] = None,
+                    stop: Optional[List[str]] = None) -> str:
+        """Send a chat completion request, continuing it if it stops at max_tokens."""
+        content, finish_reason = await self._complete(
+            messages, max_tokens, temperature, stage, slide, stop)
+        return await self._continue(content, finish_reason, messages, max_tokens,
+                                    temperature, stage, slide, stop)
+
+    async def _continue(self, content: str, finish_reason: Optional[str],
+                        messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                        stage: str, slide: Optional[int], stop: Optional[List[str]]) -> str:
+        """Ask for the rest of an answer cut off by max_tokens, up to MAX_CONTINUATIONS times."""
+        for _ in range(MAX_CONTINUATIONS):
+            if finish_reason != "length":
+                break
+            where = f" slide {slide}" if slide else ""
+            print(f"   ✂️ {stage}{where} hit max_tokens ({max_tokens}); requesting the rest")
+            more, finish_reason = await self._complete(
+                messages + [{"role": "assistant", "content": content},
+                            {"role": "user", "content": CONTINUE_PROMPT}],
+                max_tokens, temperature, stage, slide, stop)
+            content += more
+        return content
+
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int,
+                        temperature: float, stage: str = "other", slide: Optional[int] = None,
+                        stop: Optional[List[str]] = None) -> Tuple[str, Optional[str]]:
+        """Send one chat completion request, serving identical requests from the cache.
+
+        Returns the content and its finish_reason.
+        """
+        request = self._request(messages, max_tokens, temperature, stage, stop)
+        event = CallEvent(stage=stage, model=request["model"], slide=slide)
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(**request)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                event.cache_hit = True
+                self.telemetry.record(event)
+                return cached['content'], cached.get('finish_reason')
+
+        hedge = self.hedging if stage in HEDGED_STAGES else None
+        hedge_outcome: Dict[str, bool] = {}
+
+        def make_call():
+            event.attempts += 1
+            if hedge is not None:
+                return hedge.run(lambda sent: self._create_completion(request, sent),
+                                 hedge_outcome)
+            return self._create_completion(request)
+
+        call_start = time.monotonic()
+        try:
+            response, event.latency = await self.retry_policy.call(
+                make_call, breaker=self.circuit_breaker, label=f"{stage} call")
+        except Exception as e:
+            event.hedged = hedge_outcome.get("hedged", False)
+            self._record_call(event, messages, call_start, error=e)
+            raise
+        event.hedged = hedge_outcome.get("hedged", False)
+        event.hedge_won = hedge_outcome.get("hedge_won", False)
+        content = response.choices[0].message.content
+
+        event.finish_reason = response.choices[0].finish_reason
+        self._record_call(event, messages, call_start, content,
+                          getattr(response, 'usage', None))
+
+        if self.cache:
+            self.cache.set(cache_key, {"content": content, "finish_reason": event.finish_reason})
+        return content, event.finish_reason
+
+    async def _chat_stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                           temperature: float, stage: str = "other",
+                           stop: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Stream a chat completion as text deltas, caching the full response.
+
+        Opening the stream goes through the rate limiter and retry policy; a
+        failure after text has been yielded is raised to the caller. An answer
+        cut off by max_tokens is continued and the rest yielded as one delta.
+        """
+        parts: List[str] = []
+        outcome: Dict[str, Optional[str]] = {}
+        async for delta in self._stream_once(messages, max_tokens, temperature, stage,
+                                             stop, outcome):
+            parts.append(delta)
+            yield delta
+
+        content = "".join(parts)
+        full = await self._continue(content, outcome.get("finish_reason"), messages,
+                                    max_tokens, temperature, stage, None, stop)
+        if len(full) > len(content):
+            yield full[len(content):]
+
+    async def _stream_once(self, messages: List[Dict[str, str]], max_tokens: int,
+                           temperature: float, stage: str, stop: Optional[List[str]],
+                           outcome: Dict[str, Optional[str]]) -> AsyncIterator[str]:
+        """One streamed request; its finish_reason is left in ``outcome``."""
+        request = self._request(messages, max_tokens, temperature, stage, stop)
+        event = CallEvent(stage=stage, model=request["model"])
+
+        cache_key = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(**request)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                event.cache_hit = True
+                self.telemetry.record(event)
+                outcome["finish_reason"] = cached.get('finish_reason')
+                yield cached['content']
+                return
+
+        def make_call():
+            event.attempts += 1
+            # The final chunk then carries the usage block, as a non-streamed response would
+            return self._create_completion(
+                dict(request, stream=True, stream_options={"include_usage": True}))
+
+        call_start = time.monotonic()
+        parts = []
+        usage = None
+        try:
+            stream, open_latency = await self.retry_policy.call(
+                make_call, breaker=self.circuit_breaker, label=f"{stage} call")
+
+            stream_start = time.monotonic()
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    # Treat a stalled stream like any other timed-out call
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), self.retry_policy.base_timeout)
+                except StopAsyncIteration:
+                    break
+                usage = getattr(chunk, 'usage', None) or usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                event.finish_reason = getattr(choice, 'finish_reason', None) or event.finish_reason
+                if choice.delta.content:
+                    if event.time_to_first_token is None:
+                        event.time_to_first_token = open_latency + \
+                            time.monotonic() - stream_start
+                    parts.append(choice.delta.content)
+                    yield parts[-1]
+        except Exception as e:
+            self._record_call(event, messages, call_start, "".join(parts), usage, error=e)
+            raise
+
+        content = "".join(parts)
+        event.latency = open_latency + time.monotonic() - stream_start
+        self._record_call(event, messages, call_start, content, usage)
+        outcome["finish_reason"] = event.finish_reason
+        if self.cache:
+            self.cache.set(cache_key, {"content": content, "finish_reason": event.finish_reason})
+
+    def _record_call(self, event: CallEvent, messages: List[Dict[str, str]],
+                     call_start: float, content: str = "", usage: Any = None,
+                     error: Optional[BaseException] = None):
+        """Fill in token usage and outcome, then report the call to stats, router and telemetry."""
+        event.total_seconds = time.monotonic() - call_start
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            event.prompt_tokens = usage.prompt_tokens
+            event.completion_tokens = usage.completion_tokens
+            event.cached_prompt_tokens = getattr(details, 'cached_tokens', None) or 0
+            self.prompt_stats.record_usage(
+                event.stage, event.prompt_tokens, event.cached_prompt_tokens)
+        elif error is None:
+            # No usage block (e.g. an older streaming API): estimate locally
+            event.prompt_tokens = self._prompt_tokens(messages)
+            event.completion_tokens = self.estimate_tokens(content or "")
+
+        if error is not None:
+            event.error = type(error).__name__
+        else:
+            self.router.record(event.stage, event.model, event.latency,
+                               event.prompt_tokens, event.completion_tokens)
+        self.telemetry.record(event)
+
+    async def _create_completion(self, request: Dict[str, Any],
+                                 sent: Optional[asyncio.Event] = None) -> Tuple[Any, float]:
+        """Send one chat completion request to the backend through the rate limiter.
+
+        Returns the response and the seconds the API call took, excluding the
+        wait for rate-limit headroom; ``sent`` is set once that wait is over.
+        The call itself is bounded by the retry policy's per-call timeout.
+        Rate-limit headers from the response update the limiter, and a 429
+        pauses every caller for its Retry-After before the error is re-raised
+        for the retry policy.
+        """
+        # The provider counts max_tokens against the tokens-per-minute limit
+        request_tokens = request["max_tokens"] + self._prompt_tokens(request["messages"])
+
+        await self.rate_limiter.acquire(request_tokens)
+        if sent is not None:
+            sent.set()
+        call_start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                self.backend.create(request),
+                self.retry_policy.timeout_for(request["max_tokens"]))
+        except Exception as e:
+            # Failed calls produce no completion, so they should not use up TPM budget
+            self.rate_limiter.release(request_tokens)
+            if classify_error(e) == RATE_LIMITED:
+                response = getattr(e, 'response', None)
+                self.rate_limiter.pause(
+                    retry_after_seconds(getattr(response, 'headers', None)) or 1.0)
+            raise
 
-OUTPUT FORMAT:
-**CORE MESSAGE:** [One powerful sentence summarizing the entire presentation]
+        self.rate_limiter.update_from_headers(result.headers)
+        return result.response, time.monotonic() - call_start
 
-**MAJOR THEMES FOR SLIDE EXPANSION:**
-1. [Theme 1] - [Description with 2-3 slide potential breakdown]
-2. [Theme 2] - [Description with 2-3 slide potential breakdown]  
-3. [Theme 3] - [Description with 2-3 slide potential breakdown]
-4. [Theme 4] - [Description with 2-3 slide potential breakdown]
-5. [Theme 5] - [Description with 2-3 slide potential breakdown]
-6. [Theme 6] - [Description with 2-3 slide potential breakdown]
-7. [Theme 7] - [Description with 2-3 slide potential breakdown]
-8. [Theme 8] - [Description with 2-3 slide potential breakdown]
+    def estimate_tokens(self, text: str) -> int:
+        """Count tokens with the shared token counter for this model."""
+        return self.token_counter.count(text)
 
-**EXTENDED NARRATIVE ARC (15-20 slides):**
-- Opening & Context (Slides 1-3): Hook, situation setup, scope definition
-- Problem Definition (Slides 4-6): Challenge analysis, current state, impact
-- Deep Analysis (Slides 7-11): Key insights, data findings, root causes, implications
-- Solutions & Strategy (Slides 12-16): Recommendations, implementation approach, methodology
-- Impact & Next Steps (Slides 17-20): Expected outcomes, timeline, action items, conclusion
+    def _prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self.estimate_tokens(message["content"]) for message in messages)
 
-**KEY DATA POINTS & METRICS:**
-- [Specific number/metric 1 with context]
-- [Specific number/metric 2 with context]
-- [Specific number/metric 3 with context]
-- [Specific number/metric 4 with context]
-- [Specific number/metric 5 with context]
-- [Additional metrics and quantifiable insights]
+    async def stage1_content_analysis(self, content: str, content_type: str,
+                                checkpoints: Optional[CheckpointStore] = None) -> Dict[str, Any]:
+        """Stage 1: Analyze content and create presentation outline."""
 
-**SAFE VISUAL OPPORTUNITIES (NO TEXT IN IMAGES):**
-- Simple bar/line charts for metrics (data only, no text overlays)
-- Basic process flowcharts (boxes and arrows only)
-- Timeline diagrams with dates/milestones
-- Simple before/after comparison tables
-- Professional stock photos (no text required)
-- Color-coded categories or sections
-- Basic organizational charts
-- Clean dashboard-style metric displays
+        saved_analysis = checkpoints.load("stage1_analysis") if checkpoints else None
+        if saved_analysis is not None:
+            print("♻️ Stage 1: Restored content analysis from checkpoint")
+            return {"analysis": saved_analysis, "content": content, "content_type": content_type}
 
-**CONTENT DEPTH STRATEGY:**
-- Which topics deserve multiple slides for thorough coverage
-- Where to include detailed case studies or examples
-- Opportunities for step-by-step breakdowns
-- Areas requiring both overview and detail slides
-"""
+        print("🔍 Analyzing content structure and themes...")
+        start_time = time.time()
 
         try:
             print("📡 Sending analysis request to OpenAI...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a senior strategy consultant who analyzes content to create compelling executive presentations spanning 15-20 slides for comprehensive coverage. {self.brand_guidelines}"},
-                    {"role": "user", "content": analysis_prompt}
-                ],
-                max_tokens=3500,
-                temperature=0.1
+            analysis_result = await self._chat(
+                messages=self.prompts.build(
+                    "stage1", ANALYSIS_INSTRUCTIONS,
+                    f"CONTENT TYPE: {content_type.upper()}\nCONTENT TO ANALYZE:\n{content}"),
+                max_tokens=output_budget(ANALYSIS_WORDS),
+                temperature=0.1,
+                stage="stage1"
             )
-
-            analysis_result = response.choices[0].message.content
             elapsed_time = time.time() - start_time
             print(
                 f"✅ Stage 1: Content analysis complete ({elapsed_time:.1f}s)")
 
+            if checkpoints:
+                checkpoints.save("stage1_analysis", analysis_result)
+
             return {
                 "analysis": analysis_result,
                 "content": content,
@@ -201,172 +646,255 @@ OUTPUT FORMAT:
             print(f"❌ Error in Stage 1 analysis: {e}")
             return {"analysis": "", "content": content, "content_type": content_type}
 
-    def stage2_slide_structure(self, analysis_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    async def stage2_slide_structure(self, analysis_data: Dict[str, Any],
+                               checkpoints: Optional[CheckpointStore] = None) -> List[Dict[str, str]]:
         """Stage 2: Create detailed slide structure for 15-20 slides."""
+        return [slide_info async for slide_info, _ in
+                self.stream_slide_structure(analysis_data, checkpoints)]
 
-        print("🏗️ Designing presentation structure and slide flow...")
-        start_time = time.time()
+    async def stream_slide_structure(self, analysis_data: Dict[str, Any],
+                                     checkpoints: Optional[CheckpointStore] = None
+                                     ) -> AsyncIterator[Tuple[Dict[str, str], int]]:
+        """Stage 2, streamed: yield (slide_info, total_slides) as each block completes.
 
-        structure_prompt = f"""
-Based on this content analysis, create a detailed structure for each slide in a 15-20 slide presentation.
-
-CONTENT ANALYSIS:
-{analysis_data['analysis']}
-
-STRUCTURE REQUIREMENTS:
-- Create 15-20 individual slide specifications
-- Each slide should have a clear purpose and unique angle
-- Ensure logical flow and build throughout presentation
-- Specify safe visual approach for each slide
-- Balance content density across slides
-- Include detailed talking points guidance
+        Slides are yielded while the model is still writing later ones once it
+        has announced its slide count. Without that announcement they are held
+        until the stream ends, so every slide sees the real total.
+        """
 
-SLIDE STRUCTURE FORMAT (for each slide):
-**SLIDE [NUMBER]: [Title Focus]**
-- Objective: [What this slide accomplishes]
-- Key Content: [Main points to cover - 3-4 bullet points]
-- Visual Approach: [Simple chart, basic diagram, or "TEXT ONLY"]
-- Talking Points: [Specific guidance for presenter]
-- Transition: [How it connects to next slide]
-
-Create all 15-20 slides following this structure. Focus on comprehensive coverage with each slide adding unique value.
-"""
+        saved_structure = checkpoints.load("stage2_structure") if checkpoints else None
+        if saved_structure is not None:
+            print(
+                f"♻️ Stage 2: Restored structure for {len(saved_structure)} slides from checkpoint")
+            for slide_info in saved_structure:
+                yield slide_info, len(saved_structure)
+            return
 
+        print("🏗️ Designing presentation structure and slide flow...")
+        start_time = time.time()
+        parser = StructureStreamParser()
+        slides_structure: List[Dict[str, str]] = []
+        held: List[Dict[str, str]] = []
+
+        def ready(entries):
+            """Entries that can be handed to Stage 3 now, with their total."""
+            slides_structure.extend(entries)
+            held.extend(entries)
+            if parser.total is None:
+                return []
+            released = [(info, max(parser.total, info['slide_number'])) for info in held]
+            held.clear()
+            return released
+
+        messages = self.prompts.build(
+            "stage2", STRUCTURE_INSTRUCTIONS,
+            f"CONTENT ANALYSIS:\n{analysis_data['analysis']}")
+        max_tokens = output_budget(STRUCTURE_WORDS_PER_SLIDE, MAX_SLIDES)
+        stop = slide_stop_sequences(MAX_SLIDES + 1)
         try:
-            print("📡 Sending structure request to OpenAI...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a presentation design expert creating comprehensive slide structures for executive presentations. {self.brand_guidelines}"},
-                    {"role": "user", "content": structure_prompt}
-                ],
-                max_tokens=4000,
-                temperature=0.2
-            )
-
-            structure_result = response.choices[0].message.content
-            elapsed_time = time.time() - start_time
-
-            # Parse the structure into individual slide entries
-            slides_structure = []
-            slide_blocks = re.split(r'\*\*SLIDE \d+:', structure_result)
-
-            # Skip first empty block
-            for i, block in enumerate(slide_blocks[1:], 1):
-                slides_structure.append({
-                    'slide_number': i,
-                    'structure': f"SLIDE {i}: {block.strip()}"
-                })
-
-            print(
-                f"✅ Stage 2: Created structure for {len(slides_structure)} slides ({elapsed_time:.1f}s)")
-            return slides_structure
+            print("📡 Streaming structure request to OpenAI...")
+            async for delta in self._chat_stream(
+                    messages, max_tokens=max_tokens, temperature=0.2, stage="stage2",
+                    stop=stop):
+                for released in ready(parser.feed(delta)):
+                    yield released
+            for released in ready(parser.close()):
+                yield released
 
         except Exception as e:
             print(f"❌ Error in Stage 2 structure: {e}")
-            # Fallback: create basic structure
-            return [{'slide_number': i, 'structure': f"SLIDE {i}: Basic content"} for i in range(1, 16)]
-
-    def stage3_individual_slides(self, slides_structure: List[Dict[str, str]], content: str) -> List[str]:
-        """Stage 3: Generate detailed content for each slide individually."""
-
-        detailed_slides = []
+            emitted = len(slides_structure)
+            try:
+                # Re-request in full and keep only slides not yet handed out
+                structure_result = await self._chat(
+                    messages, max_tokens=max_tokens, temperature=0.2, stage="stage2",
+                    stop=stop)
+                fallback_parser = StructureStreamParser()
+                entries = fallback_parser.feed(structure_result) + fallback_parser.close()
+            except Exception as retry_error:
+                print(f"❌ Stage 2 retry failed: {retry_error}")
+                # Fallback: create basic structure
+                entries = [{'slide_number': i, 'structure': f"SLIDE {i}: Basic content"}
+                           for i in range(1, 16)]
+            slides_structure.extend(entries[emitted:])
+            held.extend(entries[emitted:])
+
+        elapsed_time = time.time() - start_time
         total_slides = len(slides_structure)
-        stage_start_time = time.time()
+        for slide_info in held:
+            yield slide_info, total_slides
 
         print(
-            f"✍️ Generating detailed content for {total_slides} individual slides...")
+            f"✅ Stage 2: Created structure for {total_slides} slides ({elapsed_time:.1f}s)")
+        if checkpoints:
+            checkpoints.save("stage2_structure", slides_structure)
+
+    async def stage3_individual_slides(self, slides_structure: List[Dict[str, str]], content: str,
+                                 checkpoints: Optional[CheckpointStore] = None) -> List[str]:
+        """Stage 3: Generate detailed content for each slide concurrently.
+
+        Up to ``self.concurrency`` slides are in flight at once. Results are
+        returned in slide order, and a failed slide only affects its own entry.
+        Slides already saved in ``checkpoints`` are reused instead of regenerated.
+        ``content`` is indexed once and each slide prompt receives only the
+        source passages that best match its structure.
+        """
+        total_slides = len(slides_structure)
+        _, detailed_slides = await self.stage3_from_stream(
+            [(slide_info, total_slides) for slide_info in slides_structure],
+            content, checkpoints)
+        return detailed_slides
 
-        for i, slide_info in enumerate(slides_structure, 1):
-            slide_start_time = time.time()
-            print(f"🔄 Slide {i}/{total_slides}: Creating detailed content...")
+    async def stage3_from_stream(self,
+                                 slide_stream: Union[AsyncIterator[Tuple[Dict[str, str], int]],
+                                                     Iterable[Tuple[Dict[str, str], int]]],
+                                 content: str,
+                                 checkpoints: Optional[CheckpointStore] = None,
+                                 on_window: Optional[Callable[[int, List[Awaitable[str]], int], None]] = None
+                                 ) -> Tuple[List[Dict[str, str]], List[str]]:
+        """Stage 3 fed by (slide_info, total_slides) pairs as they become available.
+
+        Each slide starts generating as soon as it arrives, so Stage 3 overlaps
+        a streamed Stage 2. ``on_window(start_slide, slide_tasks, total_slides)``
+        is called for every POLISH_WINDOW consecutive slides (and the final
+        remainder) as soon as their tasks exist, so Stage 4 can start early.
+        Returns the slide structures and detailed slides, both in slide order.
+        """
+        stage_start_time = time.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
 
-            slide_prompt = f"""
-Create detailed, professional content for this specific slide in a {total_slides}-slide presentation.
+        index_task = None
+        if content and self.grounding_passages > 0:
+            # Indexing is CPU-bound, so keep it off the event loop
+            index_task = loop.run_in_executor(
+                None, lambda: PassageIndex.from_text(
+                    content, token_counter=self.token_counter))
 
-CRITICAL VISUAL SAFETY: Only specify simple, text-free visuals. When uncertain, use "TEXT ONLY".
+        async def generate_limited(i, slide_info, total_slides):
+            passage_index = await index_task if index_task else None
+            async with semaphore:
+                return await self._generate_single_slide(
+                    i, slide_info, total_slides, checkpoints, passage_index)
 
-SLIDE STRUCTURE:
-{slide_info['structure']}
+        async def restored(slide_content):
+            return slide_content
+
+        print(
+            f"✍️ Generating detailed content for each slide as its structure arrives ({self.concurrency} in parallel)...")
+
+        slides_structure: List[Dict[str, str]] = []
+        tasks = []
+        restored_count = 0
+
+        async def slide_pairs():
+            if hasattr(slide_stream, '__aiter__'):
+                async for pair in slide_stream:
+                    yield pair
+            else:
+                for pair in slide_stream:
+                    yield pair
+
+        async for slide_info, total_slides in slide_pairs():
+            slides_structure.append(slide_info)
+            i = len(slides_structure)
+            saved_slide = checkpoints.load(f"stage3_slide_{i:02d}") if checkpoints else None
+            # A slide is only reused if it was written for this same structure entry
+            if (isinstance(saved_slide, dict)
+                    and saved_slide.get('source') == self._slide_source_hash(slide_info, total_slides)):
+                restored_count += 1
+                tasks.append(asyncio.ensure_future(restored(saved_slide['content'])))
+            else:
+                tasks.append(asyncio.ensure_future(
+                    generate_limited(i, slide_info, total_slides)))
+
+            if on_window and len(tasks) % POLISH_WINDOW == 0:
+                on_window(len(tasks) - POLISH_WINDOW + 1,
+                          tasks[-POLISH_WINDOW:], total_slides)
+
+        if on_window and len(tasks) % POLISH_WINDOW:
+            remainder = len(tasks) % POLISH_WINDOW
+            on_window(len(tasks) - remainder + 1, tasks[-remainder:], len(tasks))
+
+        if restored_count:
+            print(f"♻️ Restored {restored_count}/{len(tasks)} slides from checkpoint")
+        if index_task and restored_count < len(tasks):
+            passage_index = await index_task
+            print(f"📚 Indexed {len(passage_index.passages)} source passages")
+
+        detailed_slides = list(await asyncio.gather(*tasks))
 
-SLIDE POSITION CONTEXT:
-- This is slide {i} of {total_slides}
+        total_elapsed = time.time() - stage_start_time
+        print(
+            f"✅ Stage 3: Generated {len(detailed_slides)} individual slides ({total_elapsed:.1f}s total)")
+        return slides_structure, detailed_slides
+
+    def _source_excerpts(self, slide_info: Dict[str, str],
+                         passage_index: Optional[PassageIndex]) -> str:
+        """Prompt section with the source passages most relevant to a slide."""
+        if passage_index is None:
+            return ""
+        passages = passage_index.top_passages(
+            slide_info['structure'], k=self.grounding_passages,
+            token_budget=self.grounding_tokens)
+        if not passages:
+            return ""
+
+        excerpts = "\n\n".join(
+            f"[Excerpt {n}]\n{passage}" for n, passage in enumerate(passages, 1))
+        return f"""
+SOURCE EXCERPTS (ground facts, figures and examples in these; do not invent data):
+{excerpts}"""
+
+    @staticmethod
+    def _slide_source_hash(slide_info: Dict[str, str], total_slides: int) -> str:
+        """Hash of the structure entry and slide count a Stage 3 slide is written from."""
+        return CheckpointStore.make_fingerprint(slide_info['structure'], str(total_slides))
+
+    async def _generate_single_slide(self, i: int, slide_info: Dict[str, str], total_slides: int,
+                                     checkpoints: Optional[CheckpointStore] = None,
+                                     passage_index: Optional[PassageIndex] = None) -> str:
+        """Generate the detailed content for one slide; never raises."""
+        slide_start_time = time.time()
+        print(f"🔄 Slide {i}/{total_slides}: Creating detailed content...")
+        source_excerpts = self._source_excerpts(slide_info, passage_index)
+
+        slide_variables = f"""
+SLIDE TO WRITE:
+- Slide number N = {i} of {total_slides} (begin your output with "SLIDE {i}:")
 - Presentation section: {self._get_section_context(i, total_slides)}
 - Audience attention level: {self._get_attention_context(i, total_slides)}
 
-DETAILED SLIDE REQUIREMENTS:
-- Follow exact formatting structure below
-- 180-220 words of total content
-- Professional business language
-- Specific, actionable information
-- SAFE visual integration only
-- Appropriate pacing for slide position
-
-OUTPUT FORMAT (MANDATORY):
-
-SLIDE {i}: [Compelling Title - Max 8 words]
-
-**SPEAKER NOTES:**
-[Detailed speaking points - 120-150 words covering context, key insights, supporting details, and transition. Consider this slide's position in the overall presentation flow. Write as if coaching the presenter on what to say and emphasize.]
-
-**SLIDE CONTENT:**
-• [Primary headline point - action-oriented with specific detail]
-• [Supporting point with concrete data/example/metric]
-• [Third point with specific evidence or case example]  
-• [Fourth point focusing on impact or next step]
-
-**VISUAL SPECIFICATION:**
-[SAFE VISUAL ONLY: Choose from these options:
-- "TEXT ONLY" (when complex visuals would be needed)
-- Simple bar chart showing [specific data from content]
-- Basic line chart displaying [specific metrics from content]
-- Simple pie chart with [specific percentages from content]
-- Basic flowchart: [Step 1] → [Step 2] → [Step 3]
-- Timeline: [Date 1] - [Event 1], [Date 2] - [Event 2]
-- Professional stock photo: [simple description, no text]
-- Simple before/after comparison table
-DO NOT suggest complex graphics, infographics, or any visuals requiring text generation.]
-
-**TRANSITION TO NEXT SLIDE:**
-[One compelling sentence that bridges to the next topic and maintains narrative flow across {total_slides} slides]
-
-VISUAL SAFETY REMINDER:
-- Never suggest images with text overlays
-- Avoid complex infographics or detailed diagrams
-- When uncertain about visual complexity, choose "TEXT ONLY"
-- Stick to simple data charts and basic diagrams only
-"""
-
-            try:
-                print(f"   📡 Sending slide {i} request to OpenAI...")
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": f"You are an expert slide content writer creating slide {i} of {total_slides} in an executive-level presentation. CRITICAL: Only recommend simple, text-free visuals or 'TEXT ONLY'. {self.brand_guidelines}"},
-                        {"role": "user", "content": slide_prompt}
-                    ],
-                    max_tokens=800,
-                    temperature=0.2
-                )
-
-                slide_content = response.choices[0].message.content
-                detailed_slides.append(slide_content)
+SLIDE STRUCTURE:
+{slide_info['structure']}
+{source_excerpts}"""
 
-                slide_elapsed = time.time() - slide_start_time
-                print(f"   ✅ Slide {i} complete ({slide_elapsed:.1f}s)")
+        try:
+            print(f"   📡 Sending slide {i} request to OpenAI...")
+            slide_content = await self._chat(
+                messages=self.prompts.build(
+                    "stage3", SLIDE_INSTRUCTIONS, slide_variables),
+                max_tokens=output_budget(SLIDE_WORDS),
+                temperature=0.2,
+                stage="stage3",
+                slide=i,
+                # Stage 3 writes one slide: stop where the next slide would begin.
+                # A bare "---" is not a stop: slides may contain Markdown rules
+                stop=slide_stop_sequences(i + 1)
+            )
 
-                # Brief pause to avoid rate limits
-                time.sleep(0.3)
+            slide_elapsed = time.time() - slide_start_time
+            print(f"   ✅ Slide {i} complete ({slide_elapsed:.1f}s)")
 
-            except Exception as e:
-                print(f"   ❌ Error generating slide {i}: {e}")
-                detailed_slides.append(
-                    f"SLIDE {i}: [Error generating content]")
+            if checkpoints:
+                checkpoints.save(f"stage3_slide_{i:02d}", {
+                    'source': self._slide_source_hash(slide_info, total_slides),
+                    'content': slide_content})
+            return slide_content
 
-        total_elapsed = time.time() - stage_start_time
-        print(
-            f"✅ Stage 3: Generated {len(detailed_slides)} individual slides ({total_elapsed:.1f}s total)")
-        return detailed_slides
+        except Exception as e:
+            print(f"   ❌ Error generating slide {i}: {e}")
+            return f"SLIDE {i}: [Error generating content]"
 
     def _get_section_context(self, slide_num: int, total_slides: int) -> str:
         """Get context about which section of the presentation this slide belongs to."""
@@ -394,183 +922,388 @@ VISUAL SAFETY REMINDER:
         else:
             return "High - final impact and call to action"
 
-    def stage4_brand_polish(self, detailed_slides: List[str], content_type: str) -> str:
+    async def stage4_brand_polish(self, detailed_slides: List[str], content_type: str,
+                            checkpoints: Optional[CheckpointStore] = None) -> str:
         """Stage 4: Apply final brand polish and consistency check across all slides."""
 
         # For stage 4, we'll process slides in chunks to stay under token limits
-        return self._polish_slides_in_chunks(detailed_slides, content_type)
-
-    def _polish_slides_in_chunks(self, detailed_slides: List[str], content_type: str) -> str:
-        """Polish slides in smaller chunks to avoid token limits."""
+        return await self._polish_slides_in_chunks(detailed_slides, content_type, checkpoints)
+
+    def _polish_semaphore(self) -> asyncio.Semaphore:
+        """Polish windows run concurrently only with ``self.parallel_polish``."""
+        return asyncio.Semaphore(self.concurrency if self.parallel_polish else 1)
+
+    def _schedule_polish(self, slides: Awaitable[List[str]], start_slide: int,
+                         total_slides: int, content_type: str,
+                         checkpoints: Optional[CheckpointStore],
+                         semaphore: asyncio.Semaphore) -> "asyncio.Future[str]":
+        """Start polishing one window as soon as its slides are available."""
+        async def polish_when_ready():
+            chunk = list(await slides)
+            async with semaphore:
+                return await self._polish_chunk(
+                    chunk, start_slide, start_slide + len(chunk) - 1,
+                    total_slides, content_type, checkpoints)
+
+        return asyncio.ensure_future(polish_when_ready())
+
+    async def _polish_slides_in_chunks(self, detailed_slides: List[str], content_type: str,
+                                 checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Polish slides in smaller chunks to avoid token limits.
+
+        Chunks are independent, so with ``self.parallel_polish`` they are all
+        submitted at once (capped by ``self.concurrency``) and merged back in order.
+        """
         total_slides = len(detailed_slides)
-        chunk_size = 5  # Process 5 slides at a time
-        polished_chunks = []
         stage_start_time = time.time()
+        semaphore = self._polish_semaphore()
 
+        mode = "parallel chunks" if self.parallel_polish else "chunks"
         print(
-            f"✨ Polishing {total_slides} slides in chunks of {chunk_size}...")
+            f"✨ Polishing {total_slides} slides in {mode} of {POLISH_WINDOW}...")
+        # asyncio.sleep(0, result=...) turns an existing chunk into an awaitable
+        polish_tasks = [
+            self._schedule_polish(
+                asyncio.sleep(0, result=detailed_slides[i:i + POLISH_WINDOW]),
+                i + 1, total_slides, content_type, checkpoints, semaphore)
+            for i in range(0, total_slides, POLISH_WINDOW)]
+        polished_chunks = await asyncio.gather(*polish_tasks)
+
+        total_elapsed = time.time() - stage_start_time
+        print(
+            f"✅ Stage 4: Brand polish complete for {total_slides} slides ({total_elapsed:.1f}s total)")
+        return "\n\n---\n\n".join(polished_chunks)
 
-        for i in range(0, len(detailed_slides), chunk_size):
-            chunk_start_time = time.time()
-            chunk = detailed_slides[i:i + chunk_size]
-            chunk_text = "\n\n---\n\n".join(chunk)
-            start_slide = i + 1
-            end_slide = min(i + chunk_size, len(detailed_slides))
+    async def _polish_chunk(self, chunk: List[str], start_slide: int, end_slide: int,
+                      total_slides: int, content_type: str,
+                      checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Polish one chunk of slides; falls back to the unpolished chunk on error."""
+        chunk_text = "\n\n---\n\n".join(chunk)
 
-            print(f"🔄 Polishing slides {start_slide}-{end_slide}...")
+        # Only reuse a polished chunk if its Stage 3 input is unchanged
+        checkpoint_name = f"stage4_polish_{start_slide:02d}_{end_slide:02d}"
+        source_hash = CheckpointStore.make_fingerprint(chunk_text)
+        saved_chunk = checkpoints.load(checkpoint_name) if checkpoints else None
+        if saved_chunk is not None and saved_chunk['source'] == source_hash:
+            print(f"♻️ Slides {start_slide}-{end_slide}: restored polish from checkpoint")
+            return saved_chunk['polished']
 
-            polish_prompt = f"""
-Apply brand polish and consistency to slides {start_slide}-{end_slide} of a {total_slides}-slide presentation.
+        chunk_start_time = time.time()
 
-CRITICAL: Ensure all visual specifications remain SIMPLE and TEXT-FREE. Never add complex graphics.
+        print(f"🔄 Polishing slides {start_slide}-{end_slide}...")
 
+        polish_variables = f"""
+SLIDES {start_slide}-{end_slide} OF {total_slides}
 CONTENT TYPE: {content_type.upper()}
 SLIDES TO POLISH:
-{chunk_text}
+{chunk_text}"""
 
-POLISH REQUIREMENTS:
-1. Ensure consistent tone and professional language
-2. Strengthen transitions and flow
-3. Verify visual specifications are simple and safe (no text in images)
-4. Optimize content density and clarity
-5. Maintain brand voice throughout
-6. Ensure visual recommendations follow safety guidelines
-
-VISUAL SAFETY CHECK:
-- Confirm all visuals are simple charts, basic diagrams, or "TEXT ONLY"
-- Remove any suggestions for complex graphics or text-heavy images
-- Ensure no text overlays or infographics are recommended
-
-OUTPUT THE POLISHED SLIDES exactly as formatted, but enhanced for maximum professional impact.
-"""
-
-            try:
-                print(
-                    f"   📡 Sending polish request for slides {start_slide}-{end_slide}...")
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": f"You are a senior presentation consultant applying final polish to executive slides. CRITICAL: Maintain simple, text-free visual specifications only. {self.brand_guidelines}"},
-                        {"role": "user", "content": polish_prompt}
-                    ],
-                    max_tokens=3500,
-                    temperature=0.1
-                )
+        try:
+            print(
+                f"   📡 Sending polish request for slides {start_slide}-{end_slide}...")
+            polished_chunk = await self._chat(
+                messages=self.prompts.build(
+                    "stage4", POLISH_INSTRUCTIONS, polish_variables),
+                max_tokens=max(output_budget(SLIDE_WORDS),
+                               int(self.estimate_tokens(chunk_text) * POLISH_GROWTH)),
+                temperature=0.1,
+                stage="stage4",
+                slide=start_slide,
+                stop=slide_stop_sequences(end_slide + 1)
+            )
 
-                polished_chunk = response.choices[0].message.content
-                polished_chunks.append(polished_chunk)
+            chunk_elapsed = time.time() - chunk_start_time
+            print(
+                f"   ✅ Slides {start_slide}-{end_slide} polished ({chunk_elapsed:.1f}s)")
 
-                chunk_elapsed = time.time() - chunk_start_time
-                print(
-                    f"   ✅ Slides {start_slide}-{end_slide} polished ({chunk_elapsed:.1f}s)")
+            if checkpoints:
+                checkpoints.save(checkpoint_name, {
+                    'source': source_hash, 'polished': polished_chunk})
+            return polished_chunk
 
-                time.sleep(0.5)  # Pause between chunks
+        except Exception as e:
+            print(
+                f"   ❌ Error polishing slides {start_slide}-{end_slide}: {e}")
+            # Use original if polishing fails
+            return chunk_text
 
-            except Exception as e:
-                print(
-                    f"   ❌ Error polishing slides {start_slide}-{end_slide}: {e}")
-                # Use original if polishing fails
-                polished_chunks.append(chunk_text)
+    def generate_comprehensive_script(self, content: str, content_type: str = "business",
+                                      checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Synchronous wrapper around generate_comprehensive_script_async."""
+        return asyncio.run(self.generate_comprehensive_script_async(
+            content, content_type, checkpoints))
 
-        total_elapsed = time.time() - stage_start_time
-        print(
-            f"✅ Stage 4: Brand polish complete for {total_slides} slides ({total_elapsed:.1f}s total)")
-        return "\n\n---\n\n".join(polished_chunks)
+    async def generate_comprehensive_script_async(self, content: str, content_type: str = "business",
+                                                  checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Execute all 4 stages to generate a comprehensive 15-20 slide script.
 
-    def generate_comprehensive_script(self, content: str, content_type: str = "business") -> str:
-        """Execute all 4 stages to generate a comprehensive 15-20 slide script."""
+        When ``checkpoints`` is given, every completed unit of work is saved and
+        a resumed store skips the units it already holds. Several decks can be
+        generated concurrently by awaiting this coroutine from one event loop.
+        """
 
         overall_start_time = time.time()
+        input_tokens = self.estimate_tokens(content)
         print(f"🚀 Starting 4-stage professional slide generation (15-20 slides)...")
         print(f"📊 Content type: {content_type}")
-        print(f"📄 Estimated input tokens: {self.estimate_tokens(content)}")
+        print(
+            f"📄 Input tokens: {input_tokens} ({self.token_counter.name} counter)")
         print(f"🎨 Visual safety: Simple diagrams and charts only, no complex graphics")
 
+        # Stage 3 retrieves passages from the full source, even when summarized
+        source_content = content
+
         # Handle large content
-        if self.estimate_tokens(content) > 120000:
+        if input_tokens > 120000:
             print("📄 Content too large, creating strategic summary...")
-            content = self._create_strategic_summary(content)
+            content = await self._create_strategic_summary(content, checkpoints)
 
         # Stage 1: Content Analysis
         print("\n" + "="*60)
         print("🔍 STAGE 1: CONTENT ANALYSIS")
         print("="*60)
-        analysis_data = self.stage1_content_analysis(content, content_type)
+        analysis_data = await self.stage1_content_analysis(
+            content, content_type, checkpoints)
 
-        # Stage 2: Slide Structure
+        # Stages 2-4: structure streams into slide generation, and each
+        # 5-slide window is polished as soon as its slides are done
         print("\n" + "="*60)
-        print("🏗️ STAGE 2: SLIDE STRUCTURE DESIGN")
+        print("🏗️ STAGES 2-4: SLIDE STRUCTURE → INDIVIDUAL SLIDES → BRAND POLISH")
         print("="*60)
-        slides_structure = self.stage2_slide_structure(analysis_data)
+        polish_semaphore = self._polish_semaphore()
+        polish_tasks = []
 
-        # Stage 3: Individual Slides
-        print("\n" + "="*60)
-        print("✍️ STAGE 3: INDIVIDUAL SLIDE GENERATION")
-        print("="*60)
-        detailed_slides = self.stage3_individual_slides(
-            slides_structure, content)
+        def polish_window(start_slide, slide_tasks, total_slides):
+            polish_tasks.append(self._schedule_polish(
+                asyncio.gather(*slide_tasks), start_slide, total_slides,
+                content_type, checkpoints, polish_semaphore))
 
-        # Stage 4: Brand Polish
-        print("\n" + "="*60)
-        print("✨ STAGE 4: BRAND POLISH & FINAL REVIEW")
-        print("="*60)
-        final_script = self.stage4_brand_polish(detailed_slides, content_type)
+        _, detailed_slides = await self.stage3_from_stream(
+            self.stream_slide_structure(analysis_data, checkpoints),
+            source_content, checkpoints, on_window=polish_window)
+
+        stage3_done_time = time.time()
+        polished_chunks = await asyncio.gather(*polish_tasks)
+        final_script = "\n\n---\n\n".join(polished_chunks)
+        print(
+            f"✅ Stage 4: Brand polish complete for {len(detailed_slides)} slides "
+            f"({time.time() - stage3_done_time:.1f}s after the last slide)")
 
         overall_elapsed = time.time() - overall_start_time
         print(
             f"\n🎉 All stages complete! Total generation time: {overall_elapsed:.1f}s")
+        if self.cache:
+            print(
+                f"💾 Response cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        if self.rate_limiter.total_wait:
+            print(
+                f"🚦 Rate limiter: waited {self.rate_limiter.total_wait:.1f}s for RPM/TPM headroom")
+        print("🧮 Prompt tokens by stage:")
+        for line in self.prompt_stats.report():
+            print(f"   • {line}")
+        if self.hedging:
+            for line in self.hedging.report():
+                print(f"🪁 Stage 3 hedging: {line}")
+        routing = self.router.report()
+        if routing:
+            print("🔀 Model routing:")
+            for line in routing:
+                print(f"   • {line}")
 
         return final_script
 
-    def _create_strategic_summary(self, content: str) -> str:
-        """Create a strategic summary focused on presentation needs."""
-        summary_prompt = f"""
-Create a strategic summary of this content optimized for a comprehensive 15-20 slide executive presentation.
+    async def _create_strategic_summary(self, content: str,
+                                  checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Create a strategic summary focused on presentation needs.
 
-FOCUS AREAS FOR EXTENDED PRESENTATION:
-- Key business insights and strategic implications (multiple angles)
-- Important metrics, data points, and performance indicators (comprehensive coverage)
-- Critical problems, solutions, and recommendations (detailed breakdown)
-- Success stories, case studies, and concrete examples (multiple examples)
-- Process improvements and methodological insights (step-by-step details)
-- Actionable next steps and implementation strategies (comprehensive roadmap)
-- Supporting context and background information (fuller picture)
-
-PRESERVE FOR 15-20 SLIDE COVERAGE:
-- Specific numbers, percentages, and quantitative data
-- Names, dates, and concrete examples
-- Logical relationships and cause-effect connections
-- Strategic recommendations and action items
-- Detailed processes and methodologies
-- Multiple perspectives and angles on key topics
-
-CONTENT TO SUMMARIZE:
-{content}
-
-Strategic Summary for Extended Presentation (2500 words max):"""
+        Oversized inputs are map-reduced: SmartChunker sections are summarized
+        in parallel, and the partial summaries are merged in a tree until one
+        call can write the final strategic summary. Partial summaries are
+        cached by the hash of their input text.
+        """
+        saved_summary = checkpoints.load("summary") if checkpoints else None
+        if saved_summary is not None:
+            print("♻️ Restored strategic summary from checkpoint")
+            return saved_summary
 
+        start_time = time.time()
+        chunker = SmartChunker(max_tokens=SUMMARY_CHUNK_TOKENS,
+                               token_counter=self.token_counter)
+        # Chunking a large document is CPU-bound, so keep it off the event loop
+        chunk_meta = await asyncio.get_running_loop().run_in_executor(
+            None, chunker.chunk_with_overlap, content)
+        # Slice by position so the chunker's context-bridge markers are left out
+        sections = [content[meta.start_pos:meta.end_pos].strip()
+                    for _, meta in chunk_meta]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        print(
+            f"🗺️ Summarizing {len(sections)} sections of ~{SUMMARY_CHUNK_TOKENS} tokens ({self.concurrency} in parallel)...")
+        partials = await asyncio.gather(*[
+            self._summarize_part(SUMMARY_MAP_INSTRUCTIONS, "DOCUMENT SECTION", section,
+                                 "summary-map", semaphore, checkpoints)
+            for section in sections])
+
+        level = 1
+        while True:
+            groups = self._group_by_tokens(partials, SUMMARY_REDUCE_BUDGET)
+            if len(groups) == 1:
+                break
+            print(
+                f"🔗 Reduce level {level}: merging {len(partials)} partial summaries into {len(groups)}...")
+            # A trailing single summary moves up a level unchanged
+            partials = await asyncio.gather(*[
+                self._summarize_part(SUMMARY_REDUCE_INSTRUCTIONS, "PARTIAL SUMMARIES",
+                                     "\n\n---\n\n".join(group), "summary-reduce",
+                                     semaphore, checkpoints)
+                if len(group) > 1 else asyncio.sleep(0, result=group[0])
+                for group in groups])
+            level += 1
+
+        combined = "\n\n---\n\n".join(partials)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a senior strategy consultant who creates comprehensive summaries that preserve all key insights needed for detailed 15-20 slide executive presentations."},
-                    {"role": "user", "content": summary_prompt}
-                ],
-                max_tokens=3500,
-                temperature=0.2
+            summary = await self._chat(
+                messages=self.prompts.build(
+                    "summary", SUMMARY_INSTRUCTIONS,
+                    f"CONTENT TO SUMMARIZE (partial summaries in document order):\n{combined}"),
+                max_tokens=output_budget(SUMMARY_WORDS),
+                temperature=0.2,
+                stage="summary"
             )
+        except Exception as e:
+            # The merged partial summaries already cover the whole document
+            print(f"❌ Error creating final strategic summary: {e}")
+            print("   Using the merged partial summaries instead")
+            return combined
 
-            return response.choices[0].message.content
+        print(
+            f"✅ Strategic summary: {self.estimate_tokens(content)} → {self.estimate_tokens(summary)} tokens ({time.time() - start_time:.1f}s)")
+        if checkpoints:
+            checkpoints.save("summary", summary)
+        return summary
+
+    def _group_by_tokens(self, texts: List[str], budget: int) -> List[List[str]]:
+        """Split texts, in order, into groups whose combined tokens fit the budget."""
+        groups: List[List[str]] = [[]]
+        used = 0
+        for text in texts:
+            tokens = self.estimate_tokens(text)
+            # Always merge at least two texts per group so the tree shrinks
+            if groups[-1] and used + tokens > budget and len(groups[-1]) > 1:
+                groups.append([])
+                used = 0
+            groups[-1].append(text)
+            used += tokens
+        return groups
+
+    async def _summarize_part(self, instructions: str, label: str, text: str, stage: str,
+                              semaphore: asyncio.Semaphore,
+                              checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Summarize one section or group of summaries; cached by text hash, never raises."""
+        part_hash = CheckpointStore.make_fingerprint(
+            self.router.model_for(stage), instructions, text)
+        checkpoint_name = f"{stage}_{part_hash[:16]}"
+        cache_key = ResponseCache.make_key(kind=stage, text_hash=part_hash)
+
+        saved = checkpoints.load(checkpoint_name) if checkpoints else None
+        if saved is None and self.cache:
+            cached = self.cache.get(cache_key)
+            saved = cached['content'] if cached else None
+        if saved is not None:
+            return saved
 
+        try:
+            async with semaphore:
+                summary = await self._chat(
+                    messages=self.prompts.build(stage, instructions, f"{label}:\n{text}"),
+                    max_tokens=SUMMARY_PART_TOKENS,
+                    temperature=0.2,
+                    stage=stage
+                )
         except Exception as e:
-            print(f"Error creating strategic summary: {e}")
-            return content[:12000]
+            # Keep the part in the tree rather than dropping it: trim it to the
+            # size of a partial summary
+            print(f"   ❌ Error summarizing part: {e}")
+            tokens = self.estimate_tokens(text)
+            keep = len(text) * SUMMARY_PART_TOKENS // max(tokens, 1)
+            return text[:keep]
+
+        if checkpoints:
+            checkpoints.save(checkpoint_name, summary)
+        if self.cache:
+            self.cache.set(cache_key, {"content": summary})
+        return summary
+
+
+def build_script_header(source_file: str, content_type: str, slide_count: int,
+                        generation_time: float) -> str:
+    """Build the metadata header written above a generated script."""
+    return f"""
+{'='*100}
+COMPREHENSIVE PROFESSIONAL PRESENTATION SCRIPT
+{'='*100}
+
+Source File: {source_file}
+Content Type: {content_type.upper()}
+Total Slides: {slide_count}
+Generation Method: 4-Stage AI Process (Analysis → Structure → Content → Polish)
+Generation Time: {generation_time:.1f} seconds
+Visual Safety: Simple diagrams and charts only, no complex graphics
+Brand Standards: Applied Throughout
+Quality Level: Executive-Ready Extended Format
+
+SCRIPT FEATURES:
+✅ {slide_count} comprehensive slides with consistent quality
+✅ 180-220 words per slide maintained throughout
+✅ Professional speaker notes for extended presentation
+✅ SAFE visual requirements - simple charts and diagrams only
+✅ NO complex graphics, infographics, or text-heavy images
+✅ Brand voice consistency across extended format
+✅ Strategic narrative flow optimized for 15-20 slide length
+✅ Actionable content ready for slide software
+
+VISUAL SAFETY STANDARDS:
+• Simple bar/line/pie charts only
+• Basic flowcharts and timelines
+• Professional stock photos (no text overlays)
+• "TEXT ONLY" when complex visuals would be needed
+• NO infographics or complex diagrams
+• NO text generation within images
+
+PRESENTATION STRUCTURE:
+• Opening & Context (Slides 1-3)
+• Problem/Opportunity Definition (Slides 4-6)  
+• Deep Analysis & Insights (Slides 7-11)
+• Solutions & Strategy (Slides 12-16)
+• Impact & Next Steps (Slides 17-{slide_count})
+
+{'='*100}
+
+"""
+
+
+def write_script(output_path: Path, source_file: str, content_type: str,
+                 script: str, generation_time: float,
+                 slides: Optional[List[Slide]] = None) -> int:
+    """Save a generated script with its metadata header; returns the slide count.
+
+    The parsed slides are saved next to it as a JSON-lines slide cache, so
+    exporters can load them without re-parsing the script.
+    """
+    if slides is None:
+        slides = parse_script(script)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(build_script_header(source_file, content_type,
+                                    len(slides), generation_time) + script)
+    write_slides(slides_path_for(output_path), slides)
+    return len(slides)
 
 
 def main():
     if len(sys.argv) < 2:
         print(
-            "Usage: python generate_slides.py <input_filename> [--type business|technical|general]")
+            "Usage: python generate_slides.py <input_filename> [--type business|technical|general] [--concurrency N] [--parallel-polish] [--no-cache|--refresh] [--resume] [--rpm N] [--tpm N] [--routes FILE] [--hedge [--hedge-budget F]] [--record FILE | --replay FILE [--replay-latency SPEC]]")
         print("\nDirectory Structure:")
         print("  • Place input files in: inputs/")
         print("  • Generated scripts saved to: outputs/")
@@ -580,6 +1313,15 @@ def main():
         print("  • Visual safety: Simple charts and diagrams only")
         print("  • No complex graphics or text-heavy images")
         print("  • Individual slide optimization")
+        print("  • Concurrent slide generation (--concurrency, default: 4)")
+        print("  • Parallel Stage 4 polish of all chunks (--parallel-polish)")
+        print("  • On-disk response cache in outputs/.llm_cache (--no-cache, --refresh)")
+        print("  • Stage checkpoints in outputs/checkpoints/ (--resume continues an interrupted run)")
+        print("  • RPM/TPM rate limiting (--rpm, --tpm; default: OPENAI_RPM/OPENAI_TPM or 500/30000)")
+        print("  • Per-stage model routing table (--routes FILE or MODEL_ROUTES)")
+        print("  • Hedged Stage 3 calls past p90 latency (--hedge; extra calls capped by --hedge-budget, default: 0.2)")
+        print("  • Record API calls to a cassette (--record FILE) and replay them offline (--replay FILE)")
+        print("    with synthetic latency (--replay-latency recorded|recorded:X|fixed:S|uniform:A,B|lognormal:M,SIGMA|none)")
         print("  • Professional visual specifications")
         print("\nExample: python generate_slides.py script_1.txt --type business")
         print("  Reads from: inputs/script_1.txt")
@@ -594,11 +1336,39 @@ def main():
     output_filename = f"{base_name}_comprehensive_script.txt"
     output_path = Path("outputs") / output_filename
 
-    # Parse content type
+    # Parse content type, concurrency, cache and resume options
     content_type = "business"
+    concurrency = 4
+    parallel_polish = "--parallel-polish" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
+    refresh_cache = "--refresh" in sys.argv
+    resume = "--resume" in sys.argv
+    rpm = int(os.getenv('OPENAI_RPM', '500'))
+    tpm = int(os.getenv('OPENAI_TPM', '30000'))
+    routes_file = None
+    hedge_budget = 0.2
+    record_file = None
+    replay_file = None
+    replay_latency = "recorded"
     for i, arg in enumerate(sys.argv):
         if arg == "--type" and i + 1 < len(sys.argv):
             content_type = sys.argv[i + 1]
+        elif arg == "--concurrency" and i + 1 < len(sys.argv):
+            concurrency = int(sys.argv[i + 1])
+        elif arg == "--rpm" and i + 1 < len(sys.argv):
+            rpm = int(sys.argv[i + 1])
+        elif arg == "--tpm" and i + 1 < len(sys.argv):
+            tpm = int(sys.argv[i + 1])
+        elif arg == "--routes" and i + 1 < len(sys.argv):
+            routes_file = sys.argv[i + 1]
+        elif arg == "--hedge-budget" and i + 1 < len(sys.argv):
+            hedge_budget = float(sys.argv[i + 1])
+        elif arg == "--record" and i + 1 < len(sys.argv):
+            record_file = sys.argv[i + 1]
+        elif arg == "--replay" and i + 1 < len(sys.argv):
+            replay_file = sys.argv[i + 1]
+        elif arg == "--replay-latency" and i + 1 < len(sys.argv):
+            replay_latency = sys.argv[i + 1]
 
     # Read input
     try:
@@ -614,75 +1384,79 @@ def main():
         print("❌ Error: Input file is empty")
         sys.exit(1)
 
-    # Check API key
-    if not os.getenv('OPENAI_API_KEY'):
+    # Check API key (a replayed run never calls the API)
+    if not replay_file and not os.getenv('OPENAI_API_KEY'):
         print("❌ Error: OPENAI_API_KEY environment variable not set")
         sys.exit(1)
 
+    backend = None
+    try:
+        if replay_file:
+            backend = ReplayBackend(replay_file, latency=replay_latency)
+            print(f"📼 Replaying {replay_file} (latency: {replay_latency})")
+        if record_file:
+            backend = RecordingBackend(
+                backend or OpenAIBackend(os.getenv('OPENAI_API_KEY')), record_file)
+            print(f"⏺️ Recording API calls to {record_file}")
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if backend and use_cache:
+        # Cache hits would bypass the cassette
+        print("💡 Response cache disabled while recording or replaying")
+        use_cache = False
+
     # Generate comprehensive professional script
-    generator = ProfessionalSlideGenerator()
+    cache = ResponseCache(refresh=refresh_cache) if use_cache else None
+    try:
+        router = ModelRouter.from_env("gpt-4-turbo", routes_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: Could not load routing table: {e}")
+        sys.exit(1)
+    generator = ProfessionalSlideGenerator(
+        concurrency=concurrency, parallel_polish=parallel_polish, cache=cache,
+        rate_limiter=AsyncRateLimiter(rpm=rpm, tpm=tpm), router=router,
+        hedging=HedgePolicy(max_extra=hedge_budget) if "--hedge" in sys.argv else None,
+        backend=backend)
+
+    # Checkpoints are tied to this input, content type, model and routing table
+    checkpoints = CheckpointStore(
+        Path("outputs") / "checkpoints" / base_name,
+        CheckpointStore.make_fingerprint(
+            content, content_type, generator.model, router.fingerprint()),
+        resume=resume)
+    if checkpoints.resumed:
+        print(f"♻️ Resuming from checkpoints in {checkpoints.run_dir}")
 
     start_time = time.time()
     professional_script = generator.generate_comprehensive_script(
-        content, content_type)
+        content, content_type, checkpoints)
     generation_time = time.time() - start_time
 
-    # Count actual slides generated
-    slide_count = len(re.findall(r'SLIDE \d+:', professional_script))
-
-    # Create comprehensive output with metadata
-    script_header = f"""
-{'='*100}
-COMPREHENSIVE PROFESSIONAL PRESENTATION SCRIPT
-{'='*100}
-
-Source File: inputs/{input_filename}
-Content Type: {content_type.upper()}
-Total Slides: {slide_count}
-Generation Method: 4-Stage AI Process (Analysis → Structure → Content → Polish)
-Generation Time: {generation_time:.1f} seconds
-Visual Safety: Simple diagrams and charts only, no complex graphics
-Brand Standards: Applied Throughout
-Quality Level: Executive-Ready Extended Format
-
-SCRIPT FEATURES:
-✅ {slide_count} comprehensive slides with consistent quality
-✅ 180-220 words per slide maintained throughout
-✅ Professional speaker notes for extended presentation
-✅ SAFE visual requirements - simple charts and diagrams only
-✅ NO complex graphics, infographics, or text-heavy images
-✅ Brand voice consistency across extended format
-✅ Strategic narrative flow optimized for 15-20 slide length
-✅ Actionable content ready for slide software
-
-VISUAL SAFETY STANDARDS:
-• Simple bar/line/pie charts only
-• Basic flowcharts and timelines
-• Professional stock photos (no text overlays)
-• "TEXT ONLY" when complex visuals would be needed
-• NO infographics or complex diagrams
-• NO text generation within images
-
-PRESENTATION STRUCTURE:
-• Opening & Context (Slides 1-3)
-• Problem/Opportunity Definition (Slides 4-6)  
-• Deep Analysis & Insights (Slides 7-11)
-• Solutions & Strategy (Slides 12-16)
-• Impact & Next Steps (Slides 17-{slide_count})
-
-{'='*100}
-
-"""
-
-    # Save output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(script_header + professional_script)
+    # Save output with metadata header
+    slide_count = write_script(output_path, f"inputs/{input_filename}", content_type,
+                               professional_script, generation_time)
+    routing_path = Path("outputs") / f"{base_name}_routing.json"
+    generator.router.save(routing_path)
+    telemetry_path = Path("outputs") / f"{base_name}_telemetry.json"
+    metrics_path = Path("outputs") / f"{base_name}_metrics.prom"
+    generator.telemetry.write_json(
+        telemetry_path, input=str(input_path), content_type=content_type,
+        slides=slide_count, generation_seconds=round(generation_time, 2))
+    generator.telemetry.write_prometheus(metrics_path, {"deck": base_name})
+    telemetry = generator.telemetry.summary()
 
     # Success summary
     print(f"\n🎉 COMPREHENSIVE PRESENTATION SCRIPT GENERATED!")
     print(f"{'='*70}")
     print(f"📥 Input: {input_path}")
     print(f"📤 Output: {output_path}")
+    print(f"🧩 Slide data: {slides_path_for(output_path)}")
+    print(f"🔀 Model routing: {routing_path}")
+    print(f"📈 Telemetry: {telemetry_path}, {metrics_path}")
+    print(f"   {telemetry['calls']} calls ({telemetry['cache_hits']} cached, {telemetry['errors']} failed), "
+          f"{telemetry['prompt_tokens']} prompt + {telemetry['completion_tokens']} completion tokens, "
+          f"~${telemetry['cost_usd']:.2f}")
     print(f"📊 Total slides: {slide_count}")
     print(f"⏱️ Generation time: {generation_time:.1f} seconds")
     print(f"🎯 Content type: {content_type.upper()}")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+In-process Intelligence-to-Deck pipeline.
+Chains content preparation, AI slide generation and export in memory,
+passing Python objects between stages instead of intermediate files.
+"""
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prepare_content import TextPreprocessor
+from generate_slides import ProfessionalSlideGenerator
+
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.checkpoints import CheckpointStore  # noqa: E402
+from utils.exporters.marp_generator import MarpGenerator  # noqa: E402
+from utils.near_dedup import DedupReport  # noqa: E402
+from utils.slide_ir import Slide, parse_script  # noqa: E402
+
+
+@dataclass
+class PipelineResult:
+    """Everything produced by one pipeline run."""
+    script: str
+    slide_count: int
+    output_format: str
+    # Marp markdown, JSON-ready dict, Google Slides presentation ID or the script
+    output: Any = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # The script parsed once into the slide IR every exporter renders from
+    slides: List[Slide] = field(default_factory=list)
+    # Near-duplicate sentences removed during preparation, if enabled
+    dedup: Optional[DedupReport] = None
+
+
+class DeckPipeline:
+    """Run prepare → generate → export inside one process."""
+
+    def __init__(self,
+                 generator: Optional[ProfessionalSlideGenerator] = None,
+                 preprocessor: Optional[TextPreprocessor] = None,
+                 content_type: str = "business"):
+        self.generator = generator or ProfessionalSlideGenerator()
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.content_type = content_type
+
+    def prepare(self, text: str) -> str:
+        """Drop near-duplicate sentences and clean raw source text for generation."""
+        return self.preprocessor.prepare(text)
+
+    async def generate_async(self, content: str,
+                             checkpoints: Optional[CheckpointStore] = None) -> str:
+        """Run the 4-stage generator on prepared content."""
+        return await self.generator.generate_comprehensive_script_async(
+            content, self.content_type, checkpoints)
+
+    def to_marp(self, slides: List[Slide], theme: str = "default") -> str:
+        """Render parsed slides as Marp markdown."""
+        if not slides:
+            raise ValueError(
+                "No slides found in script. Make sure it follows 'SLIDE N:' format.")
+        return MarpGenerator(theme=theme).generate_marp_presentation(slides)
+
+    def to_json(self, slides: List[Slide]) -> Dict[str, Any]:
+        """Convert parsed slides into a JSON-ready structure.
+
+        Besides the parsed fields, each slide keeps the keys of the original
+        export: "slide_number" and the slide's script text as "content".
+        """
+        return {"slides": [dict(slide.to_dict(), slide_number=slide.number,
+                                content=slide.to_text())
+                           for slide in slides],
+                "total_slides": len(slides)}
+
+    def to_google_slides(self, slides: List[Slide], title: str,
+                         credentials_file: str = "credentials.json") -> Optional[str]:
+        """Create a Google Slides presentation; returns its ID."""
+        # Imported lazily so the Google client libraries are only needed for this format
+        from utils.exporters.google_slides import GoogleSlidesClient
+
+        client = GoogleSlidesClient(credentials_file)
+        return client.generate_presentation_from_slides(slides, title)
+
+    async def run_async(self, text: str,
+                        output_format: str = "txt",
+                        theme: str = "default",
+                        title: Optional[str] = None,
+                        checkpoints: Optional[CheckpointStore] = None) -> PipelineResult:
+        """Run the whole pipeline on raw source text."""
+        timings = {}
+
+        stage_start = time.time()
+        content = self.prepare(text)
+        # Read straight after the synchronous prepare, so concurrent runs cannot interleave
+        dedup = (self.preprocessor.dedup_report
+                 if self.preprocessor.dedup_threshold is not None else None)
+        timings["prepare"] = time.time() - stage_start
+        if not content:
+            raise ValueError("Input content is empty")
+
+        stage_start = time.time()
+        script = await self.generate_async(content, checkpoints)
+        timings["generate"] = time.time() - stage_start
+
+        stage_start = time.time()
+        slides = parse_script(script)
+        if output_format == "marp":
+            output = self.to_marp(slides, theme)
+        elif output_format == "json":
+            output = self.to_json(slides)
+        elif output_format == "slides":
+            # The Google client is blocking, so keep it off the event loop
+            output = await asyncio.get_running_loop().run_in_executor(
+                None, self.to_google_slides, slides, title or "Presentation")
+        else:
+            output = script
+        timings["export"] = time.time() - stage_start
+
+        return PipelineResult(
+            script=script,
+            slide_count=len(slides),
+            output_format=output_format,
+            output=output,
+            timings=timings,
+            slides=slides,
+            dedup=dedup
+        )
+
+    def run(self, text: str, **kwargs: Any) -> PipelineResult:
+        """Synchronous wrapper around run_async."""
+        return asyncio.run(self.run_async(text, **kwargs))
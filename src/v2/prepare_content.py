@@ -7,12 +7,46 @@ Handles cleaning and intelligent chunking of large documents.
 import re
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
+
+# Shared utilities live in src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.token_counter import TokenCounter, get_token_counter  # noqa: E402
+from utils.smart_chunk import read_blocks  # noqa: E402
+from utils.near_dedup import (DEFAULT_THRESHOLD, DedupReport, DedupResult,  # noqa: E402
+                              remove_near_duplicates, stream_remove_near_duplicates)
 
 
 class TextPreprocessor:
-    def __init__(self, max_chunk_size: int = 45000):
-        self.max_chunk_size = max_chunk_size
+    def __init__(self, max_chunk_tokens: int = 11250,
+                 token_counter: Optional[TokenCounter] = None,
+                 dedup_threshold: Optional[float] = DEFAULT_THRESHOLD):
+        self.max_chunk_tokens = max_chunk_tokens
+        self.token_counter = token_counter or get_token_counter()
+        # Sentences at least this similar to an earlier one are dropped; None keeps them
+        self.dedup_threshold = dedup_threshold
+        self.dedup_report: Optional[DedupReport] = None
+
+    def remove_near_duplicates(self, text: str) -> DedupResult:
+        """Drop repeated and near-repeated sentences (MinHash/LSH, one pass).
+
+        The result maps offsets in the kept text back to the original.
+        """
+        result = remove_near_duplicates(text, self.dedup_threshold or DEFAULT_THRESHOLD, self.token_counter)
+        self.dedup_report = result.report
+        return result
+
+    def stream_remove_near_duplicates(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Streaming counterpart of remove_near_duplicates."""
+        self.dedup_report = DedupReport()
+        return stream_remove_near_duplicates(blocks, self.dedup_report,
+                                             self.dedup_threshold or DEFAULT_THRESHOLD, self.token_counter)
+
+    def prepare(self, text: str) -> str:
+        """Remove near-duplicate sentences (unless disabled), then clean."""
+        if self.dedup_threshold is not None:
+            text = self.remove_near_duplicates(text).text
+        return self.clean_text(text)
 
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content."""
@@ -31,6 +65,77 @@ class TextPreprocessor:
 
         return text.strip()
 
+    def stream_clean(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Clean text block by block; joining the pieces equals clean_text(whole text).
+
+        The partial word at the end of each block is carried into the next
+        one so words and [inaudible]-style markers are never split.
+        """
+        carry = ""
+        first = True
+        for block in blocks:
+            text = carry + block
+            cut = max(text.rfind(' '), text.rfind('\n'), text.rfind('\t'),
+                      text.rfind('\r'))
+            if cut < 0:
+                carry = text
+                continue
+            carry = text[cut:]
+            piece = self.clean_text(text[:cut])
+            if piece:
+                yield piece if first else ' ' + piece
+                first = False
+
+        piece = self.clean_text(carry)
+        if piece:
+            yield piece if first else ' ' + piece
+
+    def find_sentence_break(self, text: str, limit: int) -> int:
+        """Last natural or sentence break at or before limit, else limit."""
+        breaks = [bp for bp in self.find_natural_breaks(text[:limit]) if bp > 0]
+        if breaks:
+            return breaks[-1]
+        sentence_end = max(text.rfind('. ', 0, limit), text.rfind('? ', 0, limit),
+                           text.rfind('! ', 0, limit))
+        if sentence_end > 0:
+            return sentence_end + 1
+        space = text.rfind(' ', 0, limit)
+        return space if space > 0 else limit
+
+    def stream_chunk_document(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Streaming counterpart of smart_chunk_document.
+        Yields chunks as soon as they reach the token budget, holding about
+        one chunk of text in memory.
+        """
+        count = self.token_counter.count
+        buffer = ""
+        buffer_tokens = 0
+        chunk_index = 0
+
+        for piece in pieces:
+            buffer += piece
+            buffer_tokens += count(piece)
+
+            while buffer_tokens > self.max_chunk_tokens:
+                # Map the token budget onto a character position in the buffer
+                limit = max(1, int(len(buffer) * self.max_chunk_tokens / buffer_tokens))
+                cut = self.find_sentence_break(buffer, limit)
+                chunk = buffer[:cut].strip()
+                if chunk_index > 0:
+                    chunk = "[CONTINUING FROM PREVIOUS SECTION]\n\n" + chunk
+                yield chunk + "\n\n[CONTINUED IN NEXT SECTION]"
+                chunk_index += 1
+
+                buffer = buffer[cut:]
+                buffer_tokens = count(buffer)
+
+        if buffer.strip() or chunk_index == 0:
+            chunk = buffer.strip()
+            if chunk_index > 0:
+                chunk = "[CONTINUING FROM PREVIOUS SECTION]\n\n" + chunk
+            yield chunk
+
     def find_natural_breaks(self, text: str) -> List[int]:
         """Find natural break points in text (headers, paragraphs, etc.)."""
         break_points = []
@@ -54,25 +159,30 @@ class TextPreprocessor:
         Intelligently chunk document while preserving context.
         Returns list of text chunks suitable for Claude processing.
         """
-        if len(text) <= self.max_chunk_size:
+        count = self.token_counter.count
+        if count(text) <= self.max_chunk_tokens:
             return [text]
 
         chunks = []
         current_chunk = ""
+        current_tokens = 0
         break_points = self.find_natural_breaks(text)
         last_break = 0
 
         for break_point in break_points:
             # Get text from last break to current break
             section = text[last_break:break_point]
+            section_tokens = count(section)
 
             # If adding this section would exceed chunk size, finalize current chunk
-            if len(current_chunk) + len(section) > self.max_chunk_size and current_chunk:
+            if current_tokens + section_tokens > self.max_chunk_tokens and current_chunk:
                 current_chunk += "\n\n[CONTINUED IN NEXT SECTION]"
                 chunks.append(current_chunk.strip())
                 current_chunk = "[CONTINUING FROM PREVIOUS SECTION]\n\n"
+                current_tokens = 0
 
             current_chunk += section
+            current_tokens += section_tokens
             last_break = break_point
 
         # Add remaining text
@@ -86,22 +196,44 @@ class TextPreprocessor:
         return chunks
 
 
-def prepare_content(input_file: str, output_file: Optional[str] = None) -> str:
+def prepare_content_stream(input_path: Path, output_path: Path,
+                           preprocessor: TextPreprocessor) -> int:
+    """Clean, chunk and write a file incrementally; returns the chunk count."""
+    blocks = read_blocks(str(input_path))
+    if preprocessor.dedup_threshold is not None:
+        blocks = preprocessor.stream_remove_near_duplicates(blocks)
+    chunks = preprocessor.stream_chunk_document(preprocessor.stream_clean(blocks))
+
+    total = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        # Hold back the first chunk: a single chunk is written without a header
+        first = next(chunks, "")
+        second = next(chunks, None)
+        if second is None:
+            f.write(first)
+            return 1
+
+        # The total is unknown until the stream ends, so headers omit it
+        for chunk in (first, second):
+            total += 1
+            f.write(f"=== CHUNK {total} ===\n\n{chunk}\n\n")
+        for chunk in chunks:
+            total += 1
+            f.write(f"=== CHUNK {total} ===\n\n{chunk}\n\n")
+
+    return total
+
+
+def prepare_content(input_file: str, output_file: Optional[str] = None,
+                    stream: bool = False, dedup: bool = True) -> str:
     """
     Main function to prepare content for Claude processing.
     Returns the output file path.
     """
-    # Read input file
     input_path = Path(input_file)
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
     # Initialize preprocessor
-    preprocessor = TextPreprocessor()
-
-    # Clean and chunk the content
-    cleaned_text = preprocessor.clean_text(content)
-    chunks = preprocessor.smart_chunk_document(cleaned_text)
+    preprocessor = TextPreprocessor() if dedup else TextPreprocessor(dedup_threshold=None)
 
     # Determine output path
     if output_file is None:
@@ -110,6 +242,23 @@ def prepare_content(input_file: str, output_file: Optional[str] = None) -> str:
     else:
         output_path = Path(output_file)
 
+    if stream:
+        total = prepare_content_stream(input_path, output_path, preprocessor)
+        if preprocessor.dedup_report:
+            print(f"Near-duplicates: {preprocessor.dedup_report.summary()}")
+        print(f"Processed {total} chunk(s) -> {output_path}")
+        return str(output_path)
+
+    # Read input file
+    with open(input_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # Drop near-duplicate sentences, clean and chunk the content
+    cleaned_text = preprocessor.prepare(content)
+    if preprocessor.dedup_report:
+        print(f"Near-duplicates: {preprocessor.dedup_report.summary()}")
+    chunks = preprocessor.smart_chunk_document(cleaned_text)
+
     # Write output
     with open(output_path, 'w', encoding='utf-8') as f:
         if len(chunks) == 1:
@@ -128,16 +277,22 @@ def prepare_content(input_file: str, output_file: Optional[str] = None) -> str:
 
 def main():
     """Command line interface."""
-    if len(sys.argv) < 2:
-        print("Usage: python prepare_content.py input_file [output_file]")
+    args = [arg for arg in sys.argv[1:] if arg not in ("--stream", "--keep-duplicates")]
+    stream = "--stream" in sys.argv[1:]
+    dedup = "--keep-duplicates" not in sys.argv[1:]
+
+    if not args:
+        print("Usage: python prepare_content.py input_file [output_file] [--stream] [--keep-duplicates]")
         print("Example: python prepare_content.py transcript.txt prepared.txt")
+        print("  --stream           Process the file incrementally (for very large inputs)")
+        print("  --keep-duplicates  Keep repeated and near-repeated sentences")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    input_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
 
     try:
-        result = prepare_content(input_file, output_file)
+        result = prepare_content(input_file, output_file, stream, dedup)
         print(f"Content preparation complete: {result}")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,94 @@
+"""Tests for utils.hedging."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from utils.hedging import HedgePolicy  # noqa: E402
+
+
+def call(seconds, queued=0.0):
+    """make_call whose original request takes `seconds` after `queued` in the limiter."""
+    async def make_call(sent):
+        if sent is None:
+            return "hedge"
+        await asyncio.sleep(queued)
+        sent.set()
+        await asyncio.sleep(seconds)
+        return "original"
+    return make_call
+
+
+def policy(p90, samples=5, calls=10, **kwargs):
+    hedging = HedgePolicy(**kwargs)
+    for _ in range(samples):
+        hedging.observe(p90)
+    hedging.calls = calls
+    return hedging
+
+
+def run(hedging, make_call):
+    outcome = {}
+    result = asyncio.run(hedging.run(make_call, outcome))
+    return result, outcome
+
+
+def test_no_hedge_before_enough_samples():
+    hedging = policy(0.01, samples=4)
+    assert run(hedging, call(0.1)) == ("original", {})
+    assert hedging.hedges == 0
+    assert len(hedging.latencies) == 5
+
+
+def test_no_hedge_within_threshold():
+    hedging = policy(0.2)
+    assert run(hedging, call(0.01)) == ("original", {})
+    assert hedging.hedges == 0
+
+
+def test_rate_limiter_wait_does_not_trigger_hedge():
+    hedging = policy(0.1)
+    assert run(hedging, call(0.01, queued=0.3)) == ("original", {})
+    assert hedging.hedges == 0
+
+
+def test_hedge_fires_past_threshold_and_wins():
+    hedging = policy(0.05)
+    start = time.monotonic()
+    result, outcome = run(hedging, call(5.0))
+    assert time.monotonic() - start < 1.0
+    assert result == "hedge"
+    assert outcome == {"hedged": True, "hedge_won": True}
+    assert (hedging.hedges, hedging.hedge_wins) == (1, 1)
+    # The original's elapsed time is recorded as a lower bound, not the hedge's
+    assert hedging.latencies[-1] >= 0.05
+
+
+def test_original_winning_after_hedge_is_reported():
+    async def make_call(sent):
+        if sent is None:
+            await asyncio.sleep(5.0)
+            return "hedge"
+        sent.set()
+        await asyncio.sleep(0.1)
+        return "original"
+
+    hedging = policy(0.02)
+    result, outcome = run(hedging, make_call)
+    assert result == "original"
+    assert outcome == {"hedged": True}
+    assert (hedging.hedges, hedging.hedge_wins) == (1, 0)
+
+
+def test_hedges_respect_extra_request_cap():
+    # Many fast samples hold the p90 at 0.01s while unhedged slow calls are observed
+    hedging = policy(0.01, samples=100, calls=4, max_extra=0.2, window=200)
+    hedged = 0
+    for _ in range(10):
+        _, outcome = run(hedging, call(0.05))
+        hedged += outcome.get("hedged", False)
+        assert hedging.hedges <= hedging.max_extra * hedging.calls
+    assert hedging.calls == 14
+    assert hedged == hedging.hedges == 2
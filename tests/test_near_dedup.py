@@ -0,0 +1,125 @@
+"""Tests for utils.near_dedup."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from utils.near_dedup import (NUM_HASHES, DedupReport, NearDuplicateFilter,  # noqa: E402
+                              remove_near_duplicates, stream_remove_near_duplicates)
+
+SAMPLE = Path(__file__).resolve().parent.parent / "inputs" / "script_2.txt"
+
+
+def random_signature(rng):
+    return tuple(rng.randrange(1 << 16) for _ in range(NUM_HASHES))
+
+
+def test_signature_is_minimum_over_shingles():
+    dedup = NearDuplicateFilter()
+    words = "the team will review the launch plan on friday".split()
+    expected = [0xFFFF] * NUM_HASHES
+    for first, second in zip(words, words[1:]):
+        value = [a ^ b for a, b in zip(dedup.word_hash(first)[0], dedup.word_hash(second)[1])]
+        expected = [min(a, b) for a, b in zip(expected, value)]
+    assert dedup.signature(words) == tuple(expected)
+
+
+def test_single_word_signature_is_its_first_table_entry():
+    dedup = NearDuplicateFilter()
+    assert dedup.signature(["launch"]) == dedup.word_hash("launch")[0]
+
+
+def test_similarity_counts_equal_positions():
+    dedup = NearDuplicateFilter()
+    rng = random.Random(2)
+    for _ in range(500):
+        first = random_signature(rng)
+        second = tuple(value if rng.random() < 0.6 else rng.randrange(1 << 16)
+                       for value in first)
+        equal = sum(a == b for a, b in zip(first, second))
+        assert dedup.similarity(first, second) == pytest.approx(equal / NUM_HASHES)
+    assert dedup.similarity(first, first) == 1.0
+
+
+def test_exact_repeats_are_removed():
+    sentence = "We agreed to move the quarterly planning review to the second week of May."
+    result = remove_near_duplicates(f"{sentence} {sentence}\n{sentence}\n")
+    assert result.report.removed == 2
+    assert result.text.count(sentence) == 1
+
+
+def test_different_names_are_kept():
+    text = ("Alice from the platform team will own the database migration starting next sprint. "
+            "Bob from the platform team will own the database migration starting next sprint.")
+    result = remove_near_duplicates(text)
+    assert result.report.removed == 0
+    assert result.text == text
+
+
+@pytest.mark.parametrize("negated", [
+    "After the review they will not renew the enterprise contract this year.",
+    "After the review they won't renew the enterprise contract this year.",
+    "After the review they will never renew the enterprise contract this year.",
+])
+def test_negations_are_kept(negated):
+    plain = "After the review they will renew the enterprise contract this year."
+    for text in (f"{plain} {negated}", f"{negated} {plain}"):
+        result = remove_near_duplicates(text)
+        assert result.report.removed == 0
+        assert result.text == text
+
+
+def test_different_figures_are_kept():
+    text = ("Revenue grew 12% in the third quarter compared with the same period last year. "
+            "Revenue grew 15% in the third quarter compared with the same period last year.")
+    assert remove_near_duplicates(text).report.removed == 0
+
+
+def test_one_word_change_is_kept_at_default_threshold():
+    text = ("We saw the churn rate fall sharply after the onboarding redesign went live. "
+            "We saw the churn rate drop sharply after the onboarding redesign went live.")
+    assert remove_near_duplicates(text).report.removed == 0
+    assert remove_near_duplicates(text, threshold=0.6).report.removed == 1
+
+
+def test_source_offset_maps_back_to_original():
+    repeated = "The pilot starts in three regions and expands after the first review."
+    text = f"{repeated} Budget approval is still pending from finance. {repeated} Done here now."
+    result = remove_near_duplicates(text)
+    tail = result.text.index("Done")
+    assert text[result.source_offset(tail):].startswith("Done here now.")
+
+
+def test_stream_matches_batch():
+    text = SAMPLE.read_text(encoding='utf-8')
+    batch = remove_near_duplicates(text)
+    for size in (97, 1000, 8192):
+        report = DedupReport()
+        blocks = (text[i:i + size] for i in range(0, len(text), size))
+        assert "".join(stream_remove_near_duplicates(blocks, report)) == batch.text
+        assert report.removed == batch.report.removed
+
+
+def test_window_bounds_filter_state():
+    dedup = NearDuplicateFilter(window=50)
+    rng = random.Random(3)
+    vocabulary = [f"word{i}" for i in range(500)]
+    for _ in range(1000):
+        dedup.is_duplicate(" ".join(rng.choices(vocabulary, k=12)) + ".")
+    assert len(dedup.kept) == 50
+    assert len(dedup.exact) <= 50
+    assert all(len(bucket) <= 50 for bucket in dedup.buckets)
+    assert all(unit_id in dedup.kept for bucket in dedup.buckets for unit_id in bucket.values())
+
+
+def test_repeat_outside_window_is_kept():
+    dedup = NearDuplicateFilter(window=2)
+    first = "The vendor shortlist will be finalised before the end of the month."
+    assert not dedup.is_duplicate(first)
+    assert dedup.is_duplicate(first)
+    dedup.is_duplicate("Hiring for the data team resumes once the budget is signed off.")
+    dedup.is_duplicate("Security asked for a penetration test before any public launch.")
+    assert not dedup.is_duplicate(first)
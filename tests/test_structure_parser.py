@@ -0,0 +1,74 @@
+"""Tests for utils.structure_parser."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from utils.structure_parser import StructureStreamParser  # noqa: E402
+
+STRUCTURE = """TOTAL SLIDES: 3
+
+**SLIDE 1: Opening**
+- Purpose: set the scene
+- Key message: the plan is on track
+
+**SLIDE 2: Results**
+- Purpose: show the quarter
+- Key message: revenue grew 12%
+
+**SLIDE 3: Next steps**
+- Purpose: ask for budget
+- Key message: approve the pilot
+"""
+
+
+def parse(chunks):
+    parser = StructureStreamParser()
+    entries = []
+    for chunk in chunks:
+        entries.extend(parser.feed(chunk))
+    return parser, entries + parser.close()
+
+
+def test_whole_text_gives_every_slide():
+    parser, entries = parse([STRUCTURE])
+    assert parser.total == 3
+    assert [entry['slide_number'] for entry in entries] == [1, 2, 3]
+    assert entries[1]['structure'].startswith("SLIDE 2: Results**")
+    assert "revenue grew 12%" in entries[1]['structure']
+    assert "SLIDE 3" not in entries[1]['structure']
+
+
+def test_slides_split_across_chunk_boundaries():
+    _, expected = parse([STRUCTURE])
+    for size in (1, 2, 3, 5, 8, 13):
+        chunks = [STRUCTURE[i:i + size] for i in range(0, len(STRUCTURE), size)]
+        parser, entries = parse(chunks)
+        assert entries == expected
+        assert parser.total == 3
+
+
+def test_header_split_mid_token_waits_for_the_next_header():
+    parser = StructureStreamParser()
+    head, tail = STRUCTURE.split("**SLIDE 2:")
+    assert parser.feed(head + "**SLI") == []
+    entries = parser.feed("DE 2:" + tail.split("**SLIDE 3:")[0])
+    assert [entry['slide_number'] for entry in entries] == [1]
+    assert entries[0]['structure'].startswith("SLIDE 1: Opening**")
+
+
+def test_trailing_partial_slide_is_flushed_on_close():
+    cut = STRUCTURE.index("approve")
+    parser = StructureStreamParser()
+    entries = parser.feed(STRUCTURE[:cut])
+    assert [entry['slide_number'] for entry in entries] == [1, 2]
+    last = parser.close()
+    assert [entry['slide_number'] for entry in last] == [3]
+    assert last[0]['structure'].endswith("Key message:")
+    assert parser.close() == []
+
+
+def test_text_without_headers_gives_nothing():
+    parser, entries = parse(["TOTAL SLIDES: 2\n", "Still thinking about the outline."])
+    assert entries == []
+    assert parser.total == 2